@@ -1,11 +1,56 @@
-
-
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     database_url: str
 
+    # ----- CP-SAT solver -----
+    # thời gian tối đa cho một lần giải (giây)
+    solver_time_limit_sec: float = 60.0
+    # số luồng tìm kiếm của CP-SAT cho mỗi lần giải
+    solver_num_workers: int = 8
+    # số worker process giải đồng thời (pool tạo sẵn)
+    solver_pool_workers: int = 2
+    # thay worker process sau N lần giải để giới hạn bộ nhớ
+    solver_pool_max_tasks_per_worker: int = 50
+    # "spawn" an toàn với process web nhiều luồng, "fork" khởi động nhanh hơn
+    solver_pool_start_method: str = "spawn"
+    # giới hạn cứng thời gian thực cho một lần giải (giây)
+    solver_hard_time_limit_sec: float = 600.0
+    # thời gian chờ solver trả lời giải tốt nhất sau khi yêu cầu dừng
+    solver_stop_grace_sec: float = 5.0
+    # tổng số luồng CP-SAT cho một batch, None = số CPU của máy
+    solver_batch_cpu_budget: int | None = None
+    # cache kết quả job-shop: số entry trong bộ nhớ, thư mục cache trên đĩa (tùy chọn)
+    solver_cache_size: int = 256
+    solver_cache_dir: str | None = None
+    # capture model CP-SAT để chạy lại offline (python -m app.jobshop.replay):
+    # thư mục lưu (None = tắt); tự capture lần giải chạy lâu hơn N giây (None = chỉ
+    # khi request bật build.capture)
+    solver_capture_dir: str | None = None
+    solver_capture_min_sec: float | None = None
+    # ghi telemetry mỗi lần giải vào bảng solver_run
+    solver_telemetry_enabled: bool = True
+
+    # ----- Xếp lịch nhân viên -----
+    # time limit / số luồng CP-SAT, None = như solver_time_limit_sec / solver_num_workers
+    employee_time_limit_sec: float | None = None
+    employee_num_workers: int | None = None
+    # khung giờ làm việc trong ngày (giờ nguyên)
+    employee_day_start_hour: int = 8
+    employee_day_end_hour: int = 17
+    # số lựa chọn (employee, ngày) tối đa của mỗi job trong model CP-SAT
+    employee_max_candidates_per_job: int = 8
+    # từ bao nhiêu job thì chia bài theo ngày / kỹ năng / factory, None = không chia
+    employee_decompose_min_jobs: int | None = 1000
+    # số job tối đa của một bài con
+    employee_cluster_max_jobs: int = 300
+    # phần time limit dành cho bước ghép lại (xếp các job còn sót)
+    employee_reconcile_share: float = 0.2
+
+    # số kết quả solve chạy nền được giữ lại trong bộ nhớ
+    solve_job_retention: int = 500
+
     class Config:
         env_file = ".env"
 
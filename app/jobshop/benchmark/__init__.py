@@ -0,0 +1,6 @@
+"""
+Bộ benchmark job-shop: bài JSP kinh điển (OR-Library) và bài sinh ngẫu nhiên
+giống cycle của factory, chạy qua các mode solver và so với baseline.
+
+    python -m app.jobshop.benchmark --suite all --baseline baseline.json
+"""
@@ -0,0 +1,99 @@
+import argparse
+import sys
+
+from app.jobshop.benchmark.instances import classic_instances, cycle_instances, reschedule_instances
+from app.jobshop.benchmark.runner import MODES, check_optima, compare, load_baseline, run_suite, save_baseline
+
+
+def _format(record) -> str:
+    gap = f"{record['gap']:.1%}" if record["gap"] is not None else "-"
+    first = record["first_feasible_sec"]
+    return (
+        f"{record['instance']:<16} {record['mode']:<8} seed={record['seed']} "
+        f"workers={record['num_workers']} {record['status']:<10} "
+        f"makespan={record['makespan']} gap={gap} "
+        f"first={first if first is None else round(first, 3)} "
+        f"wall={record['wall_time_sec']:.3f}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.jobshop.benchmark",
+        description="Benchmark job-shop solver, so sánh với baseline")
+    parser.add_argument("--suite", choices=["classic", "cycle", "reschedule", "all"], default="classic")
+    parser.add_argument("--instances-dir", help="thư mục file OR-Library (ft10.txt, la01.txt, ...)")
+    parser.add_argument("--only", nargs="+", help="chỉ chạy các instance có tên này")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--cycle-seed", type=int, default=0, help="seed sinh bài cycle")
+    parser.add_argument("--baseline", help="file baseline JSON để so sánh")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="ghi kết quả lần chạy này vào --baseline")
+    parser.add_argument("--output", help="ghi kết quả lần chạy này ra file JSON")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-sec", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    instances = []
+    if args.suite in ("classic", "all"):
+        instances += classic_instances(args.instances_dir)
+    if args.suite in ("cycle", "all"):
+        instances += cycle_instances(args.cycle_seed)
+    if args.suite in ("reschedule", "all"):
+        instances += reschedule_instances()
+    if args.only:
+        instances = [instance for instance in instances if instance.name in args.only]
+
+    results = run_suite(
+        instances,
+        modes=args.modes,
+        seeds=args.seeds,
+        workers=args.workers,
+        time_limit_sec=args.time_limit,
+        on_result=lambda record: print(_format(record), flush=True),
+    )
+    # bài có makespan tối ưu biết trước: sai là lỗi, không cần baseline
+    errors = check_optima(results)
+    for item in errors:
+        print(
+            f"WRONG {item['instance']} {item['mode']} seed={item['seed']} "
+            f"workers={item['num_workers']} {item['status']}: "
+            f"makespan {item['current']}, optimum {item['baseline']}"
+        )
+
+    run_settings = {
+        "suite": args.suite,
+        "cycle_seed": args.cycle_seed,
+        "time_limit_sec": args.time_limit,
+    }
+    if args.output:
+        save_baseline(args.output, results, run_settings)
+
+    if not args.baseline:
+        return 1 if errors else 0
+    if args.update_baseline:
+        save_baseline(args.baseline, results, run_settings)
+        print(f"baseline written to {args.baseline}")
+        return 1 if errors else 0
+
+    regressions = compare(
+        results,
+        load_baseline(args.baseline),
+        time_tolerance=args.time_tolerance,
+        min_delta_sec=args.min_delta_sec,
+    )
+    for item in regressions:
+        print(
+            f"REGRESSION {item['instance']} {item['mode']} seed={item['seed']} "
+            f"workers={item['num_workers']} {item['metric']}: "
+            f"{item['baseline']} -> {item['current']}"
+        )
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
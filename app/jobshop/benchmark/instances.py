@@ -0,0 +1,194 @@
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.schemas.schedula import JobData, ScheduleRequest, TaskHint
+
+
+# Makespan tối ưu đã biết của các bài JSP kinh điển (OR-Library)
+KNOWN_OPTIMA: Dict[str, int] = {
+    "ft06": 55, "ft10": 930, "ft20": 1165,
+    "la01": 666, "la02": 655, "la03": 597, "la04": 590, "la05": 593,
+    "la06": 926, "la07": 890, "la08": 863, "la09": 951, "la10": 958,
+    "la11": 1222, "la12": 1039, "la13": 1150, "la14": 1292, "la15": 1207,
+    "la16": 945, "la17": 784, "la18": 848, "la19": 842, "la20": 902,
+    "la21": 1046, "la22": 927, "la23": 1032, "la24": 935, "la25": 977,
+    "la26": 1218, "la27": 1235, "la28": 1216, "la29": 1152, "la30": 1355,
+    "la31": 1784, "la32": 1850, "la33": 1719, "la34": 1721, "la35": 1888,
+    "la36": 1268, "la37": 1397, "la38": 1196, "la39": 1233, "la40": 1222,
+}
+
+# ft06 (Fisher & Thompson 1963) theo định dạng OR-Library
+FT06 = """
+6 6
+2 1 0 3 1 6 3 7 5 3 4 6
+1 8 2 5 4 10 5 10 0 10 3 4
+2 5 3 4 5 8 0 9 1 1 4 7
+1 5 0 5 2 5 3 3 4 8 5 9
+2 9 1 3 4 5 5 4 0 3 3 1
+1 3 3 3 5 9 0 10 4 4 2 1
+"""
+
+
+@dataclass
+class BenchmarkInstance:
+    name: str
+    request: ScheduleRequest
+    optimum: Optional[int] = None
+
+
+def parse_orlib(text: str) -> List[JobData]:
+    """
+    Định dạng OR-Library: dòng "số job số máy", mỗi job một dòng gồm các cặp
+    (máy, duration) theo thứ tự task. Dòng trống và dòng bắt đầu bằng # bị bỏ qua.
+    """
+    lines = [
+        line.split() for line in text.splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    num_jobs, num_machines = int(lines[0][0]), int(lines[0][1])
+    jobs = []
+    for job_id, row in enumerate(lines[1:1 + num_jobs]):
+        values = [int(value) for value in row]
+        tasks = [
+            (f"M{values[i]}", values[i + 1]) for i in range(0, 2 * num_machines, 2)
+            if i + 1 < len(values)
+        ]
+        jobs.append(JobData(job_id=job_id, tasks=tasks))
+    if len(jobs) != num_jobs:
+        raise ValueError(f"Expected {num_jobs} jobs, got {len(jobs)}")
+    return jobs
+
+
+def classic_instances(instances_dir: Optional[str] = None) -> List[BenchmarkInstance]:
+    """
+    ft06 có sẵn, cộng các file OR-Library (<tên>.txt, vd. ft10.txt, la01.txt)
+    trong instances_dir; tên trùng KNOWN_OPTIMA thì có makespan tối ưu để tính gap
+    """
+    texts = {"ft06": FT06}
+    if instances_dir:
+        for filename in sorted(os.listdir(instances_dir)):
+            name, extension = os.path.splitext(filename)
+            if extension in (".txt", ".jsp", ""):
+                with open(os.path.join(instances_dir, filename)) as f:
+                    texts[name] = f.read()
+    return [
+        BenchmarkInstance(
+            name=name,
+            request=ScheduleRequest(jobs=parse_orlib(text)),
+            optimum=KNOWN_OPTIMA.get(name),
+        )
+        for name, text in texts.items()
+    ]
+
+
+def generate_cycle_instance(
+    num_jobs: int,
+    num_types: int,
+    seed: int = 0,
+    max_twins: int = 3,
+    pooled: bool = False,
+) -> ScheduleRequest:
+    """
+    Bài toán giống một cycle của factory: máy chia theo type, mỗi type có 1 đến
+    max_twins máy giống nhau; job đi qua các type theo thứ tự công đoạn (bỏ qua
+    ngẫu nhiên vài công đoạn), duration là bội của 15 phút như op tính theo giờ.
+    Op chạy được trên mọi máy cùng type: liệt kê máy thay thế, hoặc
+    machine_pools nếu pooled.
+    """
+    rng = random.Random(seed)
+    machines_by_type = [
+        [f"T{machine_type}_{twin}" for twin in range(rng.randint(1, max_twins))]
+        for machine_type in range(num_types)
+    ]
+
+    jobs = []
+    for job_id in range(num_jobs):
+        stages = [
+            machine_type for machine_type in range(num_types)
+            if rng.random() < 0.8
+        ] or [rng.randrange(num_types)]
+        tasks = []
+        alternatives = {}
+        for position, machine_type in enumerate(stages):
+            duration = 15 * rng.randint(1, 32)
+            machine, *twins = rng.sample(
+                machines_by_type[machine_type], len(machines_by_type[machine_type]))
+            tasks.append((machine, duration))
+            if twins and not pooled:
+                alternatives[position] = [(twin, duration) for twin in twins]
+        jobs.append(JobData(job_id=job_id, tasks=tasks, alternatives=alternatives or None))
+
+    machine_pools = None
+    if pooled:
+        machine_pools = {
+            f"T{machine_type}": machines
+            for machine_type, machines in enumerate(machines_by_type)
+            if len(machines) > 1
+        }
+    return ScheduleRequest(jobs=jobs, machine_pools=machine_pools)
+
+
+# (tên, số job, số type máy, pooled)
+CYCLE_SHAPES = [
+    ("cycle_s", 20, 5, False),
+    ("cycle_s_pooled", 20, 5, True),
+    ("cycle_m", 100, 10, False),
+    ("cycle_m_pooled", 100, 10, True),
+    ("cycle_l", 500, 15, False),
+]
+
+
+def cycle_instances(seed: int = 0) -> List[BenchmarkInstance]:
+    return [
+        BenchmarkInstance(
+            name=name,
+            request=generate_cycle_instance(num_jobs, num_types, seed=seed, pooled=pooled),
+        )
+        for name, num_jobs, num_types, pooled in CYCLE_SHAPES
+    ]
+
+
+def _serial_frozen(jobs: List[JobData]) -> List[TaskHint]:
+    # mọi task cố định, chạy nối tiếp nhau: luôn khả thi, kết thúc ở tổng duration
+    frozen = []
+    start = 0
+    for job in jobs:
+        for task_index, (_, duration) in enumerate(job.tasks):
+            frozen.append(TaskHint(job_id=job.job_id, task_index=task_index, start=start))
+            start += duration
+    return frozen
+
+
+def reschedule_instances() -> List[BenchmarkInstance]:
+    """
+    Bài xếp lại giữa chu kỳ (frozen / release_time) có makespan tối ưu biết
+    trước; makespan tính cả release_time và task cố định kết thúc muộn nhất
+    """
+    small = [
+        JobData(job_id=0, tasks=[("M0", 3), ("M1", 2)]),
+        JobData(job_id=1, tasks=[("M1", 2), ("M0", 4)]),
+    ]
+    ft06 = parse_orlib(FT06)
+    ft06_total = sum(duration for job in ft06 for _, duration in job.tasks)
+    return [
+        # mọi task đã cố định, release_time sau khi task cuối kết thúc
+        BenchmarkInstance(
+            name="frozen_late_release",
+            request=ScheduleRequest(jobs=small, frozen=_serial_frozen(small), release_time=20),
+            optimum=20,
+        ),
+        BenchmarkInstance(
+            name="ft06_frozen_late_release",
+            request=ScheduleRequest(
+                jobs=ft06, frozen=_serial_frozen(ft06), release_time=ft06_total + 10),
+            optimum=ft06_total + 10,
+        ),
+        # không task nào cố định: lịch tối ưu của ft06 dời sau release_time
+        BenchmarkInstance(
+            name="ft06_release",
+            request=ScheduleRequest(jobs=ft06, release_time=50),
+            optimum=KNOWN_OPTIMA["ft06"] + 50,
+        ),
+    ]
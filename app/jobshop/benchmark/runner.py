@@ -0,0 +1,182 @@
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.jobshop.benchmark.instances import BenchmarkInstance
+from app.jobshop.solver import solve_jobshop
+
+
+MODES = ("cp_sat", "dispatch", "lns")
+
+# trạng thái mà solver dừng trước time limit: so sánh được thời gian chạy
+PROVEN_STATUSES = {"OPTIMAL", "INFEASIBLE"}
+
+
+def run_instance(
+    instance: BenchmarkInstance,
+    mode: str,
+    seed: int,
+    num_workers: int,
+    time_limit_sec: float,
+) -> Dict[str, Any]:
+    """
+    Giải một bài theo một mode, đo thời gian tới lời giải đầu tiên và tổng thời gian
+    """
+    request = instance.request.model_copy(update={
+        "mode": mode,
+        "time_limit_sec": time_limit_sec,
+        "num_workers": num_workers,
+        "random_seed": seed,
+        "lns": instance.request.lns.model_copy(update={"seed": seed}),
+        "use_cache": False,
+    })
+
+    first_feasible = []
+    started = time.perf_counter()
+
+    def on_progress(event: Dict[str, Any]):
+        if not first_feasible:
+            first_feasible.append(time.perf_counter() - started)
+
+    result = solve_jobshop(request, on_progress=on_progress)
+    wall_time = time.perf_counter() - started
+
+    makespan = result["objective"]
+    gap = None
+    if makespan is not None and instance.optimum:
+        gap = (makespan - instance.optimum) / instance.optimum
+    return {
+        "instance": instance.name,
+        "mode": mode,
+        "seed": seed,
+        "num_workers": num_workers,
+        "time_limit_sec": time_limit_sec,
+        "num_tasks": sum(len(job.tasks) for job in request.jobs),
+        "status": result["status"],
+        "makespan": makespan,
+        "optimum": instance.optimum,
+        "gap": gap,
+        "best_bound": result.get("best_bound"),
+        "wall_time_sec": wall_time,
+        "first_feasible_sec": first_feasible[0] if first_feasible else None,
+    }
+
+
+def run_suite(
+    instances: Iterable[BenchmarkInstance],
+    modes: Sequence[str] = MODES,
+    seeds: Sequence[int] = (0,),
+    workers: Sequence[int] = (1,),
+    time_limit_sec: float = 10.0,
+    on_result=None,
+) -> List[Dict[str, Any]]:
+    results = []
+    for instance in instances:
+        for mode in modes:
+            for num_workers in workers:
+                for seed in seeds:
+                    record = run_instance(
+                        instance, mode, seed, num_workers, time_limit_sec)
+                    results.append(record)
+                    if on_result:
+                        on_result(record)
+    return results
+
+
+def result_key(record: Dict[str, Any]) -> Tuple[str, str, int, int]:
+    return record["instance"], record["mode"], record["seed"], record["num_workers"]
+
+
+def _finished_early(record: Dict[str, Any]) -> bool:
+    return record["mode"] == "dispatch" or record["status"] in PROVEN_STATUSES
+
+
+def _slower(current: Optional[float], baseline: Optional[float], tolerance: float, min_delta_sec: float) -> bool:
+    if current is None or baseline is None:
+        return False
+    return current > baseline * (1 + tolerance) and current - baseline > min_delta_sec
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    time_tolerance: float = 0.25,
+    min_delta_sec: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    So với baseline (cùng instance / mode / seed / num_workers), trả về các regression:
+    - status: baseline chứng minh được tối ưu, lần này không
+    - makespan: không có lời giải hoặc makespan lớn hơn baseline
+    - wall_time / first_feasible: chậm hơn baseline quá time_tolerance (và quá
+      min_delta_sec); wall_time chỉ so khi cả hai lần đều dừng trước time limit
+    """
+    previous = {result_key(record): record for record in baseline}
+    regressions = []
+
+    def flag(record: Dict[str, Any], metric: str, before: Any, now: Any):
+        regressions.append({
+            "instance": record["instance"],
+            "mode": record["mode"],
+            "seed": record["seed"],
+            "num_workers": record["num_workers"],
+            "metric": metric,
+            "baseline": before,
+            "current": now,
+        })
+
+    for record in results:
+        before = previous.get(result_key(record))
+        if before is None:
+            continue
+        if before["status"] in PROVEN_STATUSES and record["status"] not in PROVEN_STATUSES:
+            flag(record, "status", before["status"], record["status"])
+        if before["makespan"] is not None and (
+                record["makespan"] is None or record["makespan"] > before["makespan"]):
+            flag(record, "makespan", before["makespan"], record["makespan"])
+        if _finished_early(before) and _finished_early(record) and _slower(
+                record["wall_time_sec"], before["wall_time_sec"], time_tolerance, min_delta_sec):
+            flag(record, "wall_time_sec", before["wall_time_sec"], record["wall_time_sec"])
+        if _slower(record["first_feasible_sec"], before["first_feasible_sec"], time_tolerance, min_delta_sec):
+            flag(record, "first_feasible_sec", before["first_feasible_sec"], record["first_feasible_sec"])
+    return regressions
+
+
+def check_optima(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Kiểm tra không cần baseline, với bài có makespan tối ưu biết trước:
+    không có lời giải, makespan nhỏ hơn tối ưu, hoặc báo OPTIMAL mà makespan
+    khác tối ưu đều là lỗi
+    """
+    errors = []
+    for record in results:
+        optimum, makespan = record["optimum"], record["makespan"]
+        if optimum is None:
+            continue
+        if makespan is None or makespan < optimum or (
+                record["status"] == "OPTIMAL" and makespan != optimum):
+            errors.append({
+                "instance": record["instance"],
+                "mode": record["mode"],
+                "seed": record["seed"],
+                "num_workers": record["num_workers"],
+                "metric": "optimum",
+                "baseline": optimum,
+                "current": makespan,
+                "status": record["status"],
+            })
+    return errors
+
+
+def load_baseline(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: str, results: List[Dict[str, Any]], settings: Dict[str, Any]):
+    with open(path, "w") as f:
+        json.dump({
+            "created_at": datetime.utcnow().isoformat(),
+            "settings": settings,
+            "results": results,
+        }, f, indent=2)
@@ -0,0 +1,122 @@
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.jobshop.instance import JobShopInstance
+
+
+def _one_machine_bound(tasks: List[Tuple[int, int, int]]) -> int:
+    """
+    Cận dưới one-machine có head/tail: lịch Jackson cho phép ngắt quãng (luôn
+    chạy task sẵn sàng có tail lớn nhất) là lời giải tối ưu của bài nới lỏng
+    1|r_j, pmtn|max(C_j + q_j). tasks: (head, duration, tail)
+    """
+    tasks = sorted(tasks)
+    ready = []
+    bound = 0
+    now = 0
+    i = 0
+    while i < len(tasks) or ready:
+        if not ready:
+            now = max(now, tasks[i][0])
+        while i < len(tasks) and tasks[i][0] <= now:
+            head, duration, tail = tasks[i]
+            heapq.heappush(ready, (-tail, duration))
+            i += 1
+        negative_tail, remaining = heapq.heappop(ready)
+        next_release = tasks[i][0] if i < len(tasks) else None
+        run = remaining if next_release is None else min(remaining, next_release - now)
+        now += run
+        if run < remaining:
+            heapq.heappush(ready, (negative_tail, remaining - run))
+        else:
+            bound = max(bound, now - negative_tail)
+    return bound
+
+
+def lower_bounds(instance: JobShopInstance) -> Dict[str, Any]:
+    """
+    Cận dưới của makespan tính trước khi giải (vài mili giây):
+    - job: độ dài lớn nhất của một job (tính cả task cố định và release_time)
+    - machine_load: head nhỏ nhất + tổng duration + tail nhỏ nhất trên một máy
+    - one_machine: nới lỏng một máy cho phép ngắt quãng (Jackson)
+    - pool_load: như machine_load cho pool sức chứa N (tổng duration / N)
+    Task có máy thay thế ở nhiều tài nguyên khác nhau chỉ tính vào cận job
+    (duration nhỏ nhất), không tính vào cận theo máy.
+    """
+    started = time.perf_counter()
+    fixed_starts = instance.fixed_starts
+    release_time = instance.release_time
+    num_machines = len(instance.machine_codes)
+
+    def resource_of(machine: int) -> int:
+        if machine in instance.machine_pool:
+            return num_machines + instance.machine_pool[machine]
+        return machine
+
+    job_bound = max(release_time, instance.fixed_end)
+    # tài nguyên → [(head, duration, tail)]
+    resource_tasks: Dict[int, List[Tuple[int, int, int]]] = {}
+    for job_id, job in enumerate(instance.jobs_data):
+        durations = []
+        resources = []
+        for task_id, (machine, duration) in enumerate(job):
+            key = (job_id, task_id)
+            if key not in instance.alternatives or key in fixed_starts:
+                durations.append(duration)
+                resources.append(resource_of(machine))
+                continue
+            options = instance.task_options(job_id, task_id)
+            durations.append(min(duration for _, duration in options))
+            task_resources = {resource_of(machine) for machine, _ in options}
+            resources.append(task_resources.pop() if len(task_resources) == 1 else None)
+
+        tail = sum(durations)
+        ready = 0
+        for task_id, duration in enumerate(durations):
+            tail -= duration
+            if (job_id, task_id) in fixed_starts:
+                head = fixed_starts[job_id, task_id]
+            else:
+                head = max(ready, release_time)
+            ready = head + duration
+            if resources[task_id] is not None:
+                resource_tasks.setdefault(resources[task_id], []).append(
+                    (head, duration, tail))
+        job_bound = max(job_bound, ready)
+
+    machine_load = one_machine = pool_load = 0
+    for resource, tasks in resource_tasks.items():
+        head = min(task[0] for task in tasks)
+        tail = min(task[2] for task in tasks)
+        work = sum(task[1] for task in tasks)
+        if resource < num_machines:
+            machine_load = max(machine_load, head + work + tail)
+            one_machine = max(one_machine, _one_machine_bound(tasks))
+        else:
+            capacity = len(instance.pools[resource - num_machines])
+            pool_load = max(pool_load, head + -(-work // capacity) + tail)
+
+    bounds = {
+        "job": job_bound,
+        "machine_load": machine_load,
+        "one_machine": one_machine,
+    }
+    if instance.pools:
+        bounds["pool_load"] = pool_load
+    return {
+        "lower_bound": max(bounds.values()),
+        "bounds": bounds,
+        "wall_time_sec": time.perf_counter() - started,
+    }
+
+
+def optimality_gap(objective: Optional[float], bound: Optional[float]) -> Optional[float]:
+    """
+    Gap tương đối (objective - bound) / objective, 0 khi đã chứng minh tối ưu
+    """
+    if objective is None or bound is None:
+        return None
+    if objective <= 0:
+        return 0.0
+    return max(0.0, (objective - bound) / objective)
@@ -0,0 +1,123 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.schemas.schedula import ScheduleRequest
+
+
+# Các field không ảnh hưởng tới bài toán: không đưa vào khóa cache
+NON_INSTANCE_FIELDS = {
+    "time_limit_sec",
+    "num_workers",
+    "random_seed",
+    "stream_assignment",
+    "use_cache",
+    "hints",
+    "build",
+}
+
+# Trạng thái đã được chứng minh: cache vô thời hạn
+PROVEN_STATUSES = {"OPTIMAL", "INFEASIBLE"}
+
+
+def instance_key(request: ScheduleRequest) -> str:
+    """
+    Hash chuẩn hóa của bài toán: jobs (sắp theo job_id), thứ tự task,
+    machine code, duration và các tham số solver khác time limit / worker
+    """
+    data = request.model_dump(exclude=NON_INSTANCE_FIELDS)
+    data["jobs"] = sorted(
+        data["jobs"], key=lambda job: json.dumps(job, sort_keys=True))
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ScheduleCache:
+    """
+    Cache kết quả job-shop: tầng LRU trong bộ nhớ + tầng đĩa (tùy chọn).
+
+    Kết quả OPTIMAL/INFEASIBLE dùng lại mãi mãi. Kết quả FEASIBLE chỉ dùng lại
+    khi time limit yêu cầu không lớn hơn time limit đã dùng để giải nó.
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str, time_limit_sec: Optional[float]) -> Optional[Dict[str, Any]]:
+        entry = self._get_entry(key)
+        if entry is None:
+            return None
+        if entry["status"] in PROVEN_STATUSES:
+            return entry
+        if time_limit_sec is not None and time_limit_sec > entry["time_limit_sec"]:
+            # budget lớn hơn lần trước: giải lại để có thể tốt hơn
+            return None
+        return entry
+
+    def put(self, key: str, time_limit_sec: Optional[float], result: Dict[str, Any]):
+        status = result.get("status")
+        if status not in PROVEN_STATUSES and status != "FEASIBLE":
+            return
+
+        current = self._get_entry(key)
+        if current is not None and not self._is_better(current, status, time_limit_sec):
+            return
+
+        entry = {
+            "status": status,
+            "time_limit_sec": time_limit_sec,
+            "cached_at": time.time(),
+            "result": copy.deepcopy(result),
+        }
+        self._remember(key, entry)
+        if self.disk_dir:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+    @staticmethod
+    def _is_better(current: Dict[str, Any], status: str, time_limit_sec: Optional[float]) -> bool:
+        if current["status"] in PROVEN_STATUSES:
+            return False
+        if status in PROVEN_STATUSES:
+            return True
+        return (time_limit_sec or 0) >= (current["time_limit_sec"] or 0)
+
+    def _get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
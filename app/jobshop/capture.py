@@ -0,0 +1,74 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+import ortools
+from google.protobuf import text_format
+from ortools.sat import cp_model_pb2, sat_parameters_pb2
+
+from app.jobshop.cache import instance_key
+from app.schemas.schedula import ScheduleRequest
+
+
+MODEL_FILE = "model.pb"
+REQUEST_FILE = "request.json"
+META_FILE = "meta.json"
+
+
+def capture_model(
+    directory: str,
+    proto: cp_model_pb2.CpModelProto,
+    request: ScheduleRequest,
+    parameters: sat_parameters_pb2.SatParameters,
+    result: Dict[str, Any],
+) -> str:
+    """
+    Ghi lại một lần giải để chạy lại offline: <directory>/<thời điểm>-<hash>/
+    gồm model.pb (CpModelProto đúng như đã giải, kèm hint), request.json
+    (request gốc) và meta.json (tham số solver, kết quả). Trả về thư mục đã ghi.
+    """
+    name = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{instance_key(request)[:12]}"
+    path = os.path.join(directory, name)
+    os.makedirs(path, exist_ok=True)
+
+    with open(os.path.join(path, MODEL_FILE), "wb") as f:
+        f.write(proto.SerializeToString())
+    with open(os.path.join(path, REQUEST_FILE), "w") as f:
+        f.write(request.model_dump_json())
+
+    statistics = result.get("statistics", {})
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump({
+            "captured_at": datetime.utcnow().isoformat(),
+            "ortools_version": ortools.__version__,
+            "parameters": text_format.MessageToString(parameters, as_one_line=True),
+            "status": result.get("status"),
+            "objective": result.get("objective"),
+            "best_bound": result.get("best_bound"),
+            "wall_time_sec": statistics.get("wall_time_sec"),
+            "conflicts": statistics.get("conflicts"),
+            "branches": statistics.get("branches"),
+            "build": statistics.get("build"),
+        }, f, indent=2, default=str)
+    return path
+
+
+def load_capture(path: str) -> Tuple[cp_model_pb2.CpModelProto, Dict[str, Any]]:
+    """
+    Đọc model và meta của một capture (thư mục, hoặc thẳng file model.pb)
+    """
+    if os.path.isdir(path):
+        model_path = os.path.join(path, MODEL_FILE)
+    else:
+        model_path, path = path, os.path.dirname(path)
+    proto = cp_model_pb2.CpModelProto()
+    with open(model_path, "rb") as f:
+        proto.ParseFromString(f.read())
+
+    meta = {}
+    meta_path = os.path.join(path, META_FILE)
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    return proto, meta
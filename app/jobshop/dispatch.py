@@ -0,0 +1,318 @@
+import collections
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+
+# Luật ưu tiên khi chọn task trong tập xung đột của Giffler–Thompson
+DISPATCH_RULES = ("SPT", "LPT", "MWKR", "FIFO")
+
+_INF = float("inf")
+
+
+def schedule_makespan(
+    jobs_data: List[List[Tuple[int, int]]],
+    starts: List[List[int]],
+) -> int:
+    return max(
+        (start + task[1]
+         for job, job_starts in zip(jobs_data, starts)
+         for task, start in zip(job, job_starts)),
+        default=0,
+    )
+
+
+def balance_machines(
+    jobs_data: List[List[Tuple[int, int]]],
+    alternatives: Dict[Tuple[int, int], List[Tuple[int, int]]],
+) -> List[List[Tuple[int, int]]]:
+    """
+    Flexible job shop: chọn máy cho các task có máy thay thế để cân tải.
+    Task dài xếp trước, mỗi task vào máy có tải sau khi nhận task nhỏ nhất
+    (hòa thì giữ máy chính).
+    """
+    load = collections.Counter()
+    for job_id, job in enumerate(jobs_data):
+        for task_id, (machine, duration) in enumerate(job):
+            if (job_id, task_id) not in alternatives:
+                load[machine] += duration
+
+    assigned = [list(job) for job in jobs_data]
+    flexible = sorted(
+        alternatives,
+        key=lambda key: (-jobs_data[key[0]][key[1]][1], key),
+    )
+    for job_id, task_id in flexible:
+        options = [jobs_data[job_id][task_id]] + alternatives[job_id, task_id]
+        machine, duration = min(
+            options, key=lambda option: load[option[0]] + option[1])
+        assigned[job_id][task_id] = (machine, duration)
+        load[machine] += duration
+    return assigned
+
+
+def assign_pool_members(
+    tasks: List[Tuple[int, int, int, bool]],
+    members: List[int],
+) -> List[int]:
+    """
+    Gán máy cụ thể cho các task đã xếp trên một pool sức chứa len(members).
+
+    tasks: (start, end, máy mong muốn, cố định). Task cố định giữ máy của nó,
+    task khác nhận máy rảnh tại start (ưu tiên máy mong muốn) và không chồng
+    lên task cố định nào; duyệt theo start như tô màu đồ thị khoảng.
+    """
+    reserved = collections.defaultdict(list)
+    for start, end, machine, fixed in tasks:
+        if fixed:
+            reserved[machine].append((start, end))
+
+    def is_free(machine: int, start: int, end: int) -> bool:
+        return busy_until[machine] <= start and all(
+            end <= fixed_start or fixed_end <= start
+            for fixed_start, fixed_end in reserved[machine]
+        )
+
+    busy_until = {machine: -_INF for machine in members}
+    assigned = [0] * len(tasks)
+    for i in sorted(range(len(tasks)), key=lambda i: (tasks[i][0], not tasks[i][3], tasks[i][1])):
+        start, end, preferred, fixed = tasks[i]
+        if fixed or start == end:
+            # task duration 0 không chiếm máy (như trong no_overlap / cumulative)
+            machine = preferred
+        else:
+            free = [machine for machine in members if is_free(machine, start, end)]
+            if not free:
+                raise ValueError("Cannot assign pooled tasks to concrete machines")
+            machine = preferred if preferred in free else free[0]
+        assigned[i] = machine
+        busy_until[machine] = max(busy_until[machine], end)
+    return assigned
+
+
+def giffler_thompson(
+    jobs_data: List[List[Tuple[int, int]]],
+    rule: str = "MWKR",
+    fixed_starts: Optional[Dict[Tuple[int, int], int]] = None,
+    release_time: int = 0,
+) -> List[List[int]]:
+    """
+    Sinh lịch active theo Giffler–Thompson với luật ưu tiên SPT/LPT/MWKR/FIFO.
+
+    Mỗi bước: lấy máy m* có thời điểm kết thúc sớm nhất c*, tập xung đột là các
+    task đang chờ trên m* bắt đầu được trước c*, chọn task có key nhỏ nhất
+    (hòa: job nhỏ hơn). Hàng đợi của mỗi máy tách thành task đã tới (chờ máy
+    rảnh, sắp theo key) và task chưa tới (sắp theo thời điểm tới), nên việc
+    chọn ứng viên ở mỗi bước là O(log n) thay vì quét mọi job.
+    """
+    if rule not in DISPATCH_RULES:
+        raise ValueError(f"Unknown dispatch rule {rule}")
+    fixed_starts = fixed_starts or {}
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    num_jobs = len(jobs_data)
+    num_machines = 1 + max((task[0] for job in jobs_data for task in job), default=-1)
+    starts = [[0] * len(job) for job in jobs_data]
+    job_ready = [release_time] * num_jobs
+    machine_ready = [release_time] * num_machines
+
+    for (job, task), start in fixed_starts.items():
+        machine, duration = jobs_data[job][task]
+        starts[job][task] = start
+        job_ready[job] = max(job_ready[job], start + duration)
+        machine_ready[machine] = max(machine_ready[machine], start + duration)
+
+    # MWKR: tổng duration còn lại của job tính từ task hiện tại
+    work_left = []
+    for job in jobs_data:
+        suffix = [0] * (len(job) + 1)
+        for task in range(len(job) - 1, -1, -1):
+            suffix[task] = suffix[task + 1] + job[task][1]
+        work_left.append(suffix)
+
+    def priority(job: int, task: int) -> int:
+        if rule == "SPT":
+            return jobs_data[job][task][1]
+        if rule == "LPT":
+            return -jobs_data[job][task][1]
+        if rule == "MWKR":
+            return -work_left[job][task]
+        return job_ready[job]  # FIFO: job vào hàng đợi sớm nhất
+
+    # current[job]: task đang chờ (len(job) khi đã xếp xong); entry trong heap
+    # hợp lệ khi task của nó vẫn là task hiện tại của job
+    current = [0] * num_jobs
+    arrived = [False] * num_jobs
+    # task đã tới máy: (key, job, task) và (duration, job, task)
+    arrived_key = [[] for _ in range(num_machines)]
+    arrived_duration = [[] for _ in range(num_machines)]
+    # task chưa tới máy: (ready, key, job, task) và (ready + duration, job, task)
+    pending_ready = [[] for _ in range(num_machines)]
+    pending_end = [[] for _ in range(num_machines)]
+    # máy → (c_m, machine, version); entry cũ bỏ qua theo version
+    machine_heap = []
+    version = [0] * num_machines
+
+    def advance(job: int, task: int) -> int:
+        task += 1
+        while task < len(jobs_data[job]) and (job, task) in fixed_starts:
+            task += 1
+        current[job] = task
+        return task
+
+    def enqueue(job: int, task: int):
+        machine, duration = jobs_data[job][task]
+        ready = job_ready[job]
+        key = priority(job, task)
+        arrived[job] = ready <= machine_ready[machine]
+        if arrived[job]:
+            heappush(arrived_key[machine], (key, job, task))
+            heappush(arrived_duration[machine], (duration, job, task))
+        else:
+            heappush(pending_ready[machine], (ready, key, job, task))
+            heappush(pending_end[machine], (ready + duration, job, task))
+
+    def refresh(machine: int):
+        # chuyển task đã tới (ready <= machine_ready) sang hàng đợi đã tới
+        ready_now = machine_ready[machine]
+        waiting = pending_ready[machine]
+        while waiting:
+            ready, key, job, task = waiting[0]
+            valid = current[job] == task and not arrived[job]
+            if valid and ready > ready_now:
+                break
+            heappop(waiting)
+            if valid:
+                arrived[job] = True
+                heappush(arrived_key[machine], (key, job, task))
+                heappush(arrived_duration[machine], (jobs_data[job][task][1], job, task))
+
+        by_duration = arrived_duration[machine]
+        while by_duration and current[by_duration[0][1]] != by_duration[0][2]:
+            heappop(by_duration)
+        by_end = pending_end[machine]
+        while by_end and (current[by_end[0][1]] != by_end[0][2] or arrived[by_end[0][1]]):
+            heappop(by_end)
+
+        earliest_end = _INF
+        if by_duration:
+            earliest_end = ready_now + by_duration[0][0]
+        if by_end:
+            earliest_end = min(earliest_end, by_end[0][0])
+        version[machine] += 1
+        if earliest_end != _INF:
+            heappush(machine_heap, (earliest_end, machine, version[machine]))
+
+    for job in range(num_jobs):
+        if (job, 0) in fixed_starts:
+            advance(job, 0)
+        if current[job] < len(jobs_data[job]):
+            enqueue(job, current[job])
+    for machine in range(num_machines):
+        refresh(machine)
+
+    while machine_heap:
+        c_star, machine, machine_version = heappop(machine_heap)
+        if machine_version != version[machine]:
+            continue
+        ready_now = machine_ready[machine]
+
+        # tập xung đột: task đã tới (bắt đầu ngay khi máy rảnh) nếu máy rảnh
+        # trước c*, cộng các task chưa tới có ready < c*
+        best = None
+        if c_star > ready_now:
+            by_key = arrived_key[machine]
+            while by_key and current[by_key[0][1]] != by_key[0][2]:
+                heappop(by_key)
+            if by_key:
+                best = by_key[0][:2]
+        waiting = pending_ready[machine]
+        stack = [0] if waiting else []
+        while stack:
+            index = stack.pop()
+            ready, key, job, task = waiting[index]
+            if ready >= c_star:
+                continue
+            if current[job] == task and not arrived[job] and (best is None or (key, job) < best):
+                best = (key, job)
+            child = 2 * index + 1
+            stack.extend(range(child, min(child + 2, len(waiting))))
+
+        if best is not None:
+            job = best[1]
+        elif arrived_duration[machine] and ready_now + arrived_duration[machine][0][0] == c_star:
+            job = arrived_duration[machine][0][1]  # task duration 0
+        else:
+            job = pending_end[machine][0][1]
+
+        task = current[job]
+        start = max(job_ready[job], ready_now)
+        end = start + jobs_data[job][task][1]
+        starts[job][task] = start
+        job_ready[job] = machine_ready[machine] = end
+
+        task = advance(job, task)
+        if task < len(jobs_data[job]):
+            enqueue(job, task)
+            next_machine = jobs_data[job][task][0]
+            if next_machine != machine:
+                refresh(next_machine)
+        refresh(machine)
+
+    return starts
+
+
+def repair_schedule(
+    jobs_data: List[List[Tuple[int, int]]],
+    hint_starts: Dict[Tuple[int, int], int],
+    fixed_starts: Optional[Dict[Tuple[int, int], int]] = None,
+    release_time: int = 0,
+) -> List[List[int]]:
+    """
+    Dựng lịch khả thi gần với lịch gợi ý nhất:
+    xếp từng task theo thứ tự start gợi ý, đẩy lùi khi vướng task trước
+    của job hoặc task trước trên máy. Task không có gợi ý được xếp sau cùng.
+    Nếu lịch gợi ý vẫn hợp lệ thì kết quả trùng với lịch gợi ý.
+    Task trong fixed_starts giữ nguyên, các task còn lại bắt đầu từ release_time.
+    """
+    fixed_starts = fixed_starts or {}
+    no_hint = sum(task[1] for job in jobs_data for task in job) + \
+        max(hint_starts.values(), default=0) + \
+        max(fixed_starts.values(), default=0) + release_time + 1
+
+    job_ready = [release_time] * len(jobs_data)
+    machine_ready = collections.defaultdict(lambda: release_time)
+    starts = [[0] * len(job) for job in jobs_data]
+
+    for (job_id, task_id), start in fixed_starts.items():
+        machine, duration = jobs_data[job_id][task_id]
+        starts[job_id][task_id] = start
+        job_ready[job_id] = max(job_ready[job_id], start + duration)
+        machine_ready[machine] = max(machine_ready[machine], start + duration)
+
+    def push_next(job_id: int, task_id: int):
+        # bỏ qua các task đã cố định
+        while task_id < len(jobs_data[job_id]) and (job_id, task_id) in fixed_starts:
+            task_id += 1
+        if task_id < len(jobs_data[job_id]):
+            heapq.heappush(heap, (
+                hint_starts.get((job_id, task_id), no_hint),
+                job_id,
+                task_id,
+            ))
+
+    heap = []
+    for job_id in range(len(jobs_data)):
+        push_next(job_id, 0)
+
+    while heap:
+        hint, job_id, task_id = heapq.heappop(heap)
+        machine, duration = jobs_data[job_id][task_id]
+        start = max(job_ready[job_id], machine_ready[machine])
+        if hint != no_hint:
+            start = max(start, hint)
+
+        starts[job_id][task_id] = start
+        job_ready[job_id] = machine_ready[machine] = start + duration
+        push_next(job_id, task_id + 1)
+
+    return starts
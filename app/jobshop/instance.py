@@ -0,0 +1,199 @@
+import collections
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from app.jobshop.dispatch import balance_machines
+from app.schemas.schedula import ScheduleRequest
+
+
+TaskKey = Tuple[int, int]  # (job index, task index)
+
+
+@dataclass
+class JobShopInstance:
+    """
+    Bài toán job-shop đã chuẩn hóa về chỉ số nguyên, dùng chung cho mọi engine
+    (CP-SAT, dispatch, ...)
+    """
+    job_ids: List[int]
+    machine_codes: List[str]
+    # jobs_data[job][task] = (machine index, duration)
+    jobs_data: List[List[Tuple[int, int]]]
+    fixed_starts: Dict[TaskKey, int] = field(default_factory=dict)
+    hint_starts: Dict[TaskKey, int] = field(default_factory=dict)
+    release_time: int = 0
+    # flexible: máy thay thế (machine index, duration) ngoài máy trong jobs_data
+    alternatives: Dict[TaskKey, List[Tuple[int, int]]] = field(default_factory=dict)
+    # nhóm máy giống hệt nhau: pools[p] = các machine index, machine_pool[m] = p
+    pools: List[List[int]] = field(default_factory=list)
+    machine_pool: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def fixed_end(self) -> int:
+        return max(
+            (start + self.jobs_data[j][t][1]
+             for (j, t), start in self.fixed_starts.items()),
+            default=0,
+        )
+
+    @property
+    def num_tasks(self) -> int:
+        return sum(len(job) for job in self.jobs_data)
+
+    def task_options(self, job: int, task: int) -> List[Tuple[int, int]]:
+        return [self.jobs_data[job][task]] + self.alternatives.get((job, task), [])
+
+
+def build_instance(request: ScheduleRequest) -> JobShopInstance:
+    # Lấy tất cả machine code (giữ thứ tự xuất hiện), kể cả máy thay thế
+    machine_codes = list(dict.fromkeys(
+        [
+            machine_code
+            for job in request.jobs
+            for machine_code, _ in job.tasks + [
+                option
+                for options in (job.alternatives or {}).values()
+                for option in options
+            ]
+        ] + [
+            machine_code
+            for codes in (request.machine_pools or {}).values()
+            for machine_code in codes
+        ]
+    ))
+
+    # Map string → index
+    machine_to_index = {code: i for i, code in enumerate(machine_codes)}
+
+    jobs_data = [
+        [(machine_to_index[machine_code], duration)
+         for machine_code, duration in job.tasks]
+        for job in request.jobs
+    ]
+
+    job_id_to_index = {job.job_id: i for i, job in enumerate(request.jobs)}
+
+    def task_starts(items) -> Dict[TaskKey, int]:
+        return {
+            (job_id_to_index[item.job_id], item.task_index): item.start
+            for item in items or []
+            if item.job_id in job_id_to_index
+            and 0 <= item.task_index < len(jobs_data[job_id_to_index[item.job_id]])
+        }
+
+    fixed_starts = task_starts(request.frozen)
+    hint_starts = {
+        key: start for key, start in task_starts(request.hints).items()
+        if key not in fixed_starts
+    }
+
+    # pool cần ít nhất 2 máy; máy có trong nhiều pool thuộc về pool đầu tiên
+    groups = []
+    machine_group = {}
+    for codes in (request.machine_pools or {}).values():
+        members = [
+            machine_to_index[code] for code in dict.fromkeys(codes)
+            if machine_to_index[code] not in machine_group
+        ]
+        if len(members) < 2:
+            continue
+        for machine in members:
+            machine_group[machine] = len(groups)
+        groups.append(members)
+
+    # task cố định bắt đầu sau release_time chặn một máy cụ thể giữa lịch,
+    # khi đó lịch theo sức chứa có thể không gán được máy: nhóm đó vẫn mở
+    # rộng máy thay thế nhưng không giải như pool
+    blocked = {
+        machine_group[jobs_data[j][t][0]]
+        for (j, t), start in fixed_starts.items()
+        if start > request.release_time and jobs_data[j][t][0] in machine_group
+    }
+    pools = []
+    machine_pool = {}
+    for group_id, members in enumerate(groups):
+        if group_id in blocked:
+            continue
+        for machine in members:
+            machine_pool[machine] = len(pools)
+        pools.append(members)
+
+    # task đã cố định chạy trên máy đã ghi trong tasks; máy trong pool
+    # mở rộng ra mọi máy cùng pool với cùng duration
+    alternatives = {}
+    for job_index, job in enumerate(request.jobs):
+        for task_index in range(len(job.tasks)):
+            key = (job_index, task_index)
+            if key in fixed_starts:
+                continue
+            primary = jobs_data[job_index][task_index]
+            options = [primary] + [
+                (machine_to_index[machine_code], duration)
+                for machine_code, duration in (job.alternatives or {}).get(task_index, [])
+            ]
+            options += [
+                (member, duration)
+                for machine, duration in options if machine in machine_group
+                for member in groups[machine_group[machine]]
+            ]
+            extra = [option for option in dict.fromkeys(options) if option != primary]
+            if extra:
+                alternatives[key] = extra
+
+    return JobShopInstance(
+        job_ids=[job.job_id for job in request.jobs],
+        machine_codes=machine_codes,
+        jobs_data=jobs_data,
+        fixed_starts=fixed_starts,
+        hint_starts=hint_starts,
+        release_time=request.release_time,
+        alternatives=alternatives,
+        pools=pools,
+        machine_pool=machine_pool,
+    )
+
+
+def assign_machines(instance: JobShopInstance, jobs_data: List[List[Tuple[int, int]]]) -> JobShopInstance:
+    """
+    Bài toán đã chốt máy cho mọi task (không còn máy thay thế)
+    """
+    return dataclasses.replace(
+        instance, jobs_data=jobs_data, alternatives={}, pools=[], machine_pool={})
+
+
+def balanced_instance(instance: JobShopInstance) -> JobShopInstance:
+    """
+    Cho engine không tự chọn máy (dispatch, LNS): chốt máy theo cân tải trước
+    """
+    if not instance.alternatives:
+        return instance
+    return assign_machines(
+        instance, balance_machines(instance.jobs_data, instance.alternatives))
+
+
+def machines_from_starts(instance: JobShopInstance, starts: List[List[int]]) -> List[Dict[str, Any]]:
+    """
+    Lịch (start của từng task) → danh sách máy kèm task, sắp theo start
+    """
+    assigned = collections.defaultdict(list)
+    for job_index, job in enumerate(instance.jobs_data):
+        for task_index, (machine, duration) in enumerate(job):
+            start = starts[job_index][task_index]
+            assigned[machine].append({
+                "job": instance.job_ids[job_index],   # trả về job_id thật
+                "task_index": task_index,
+                "start": start,
+                "end": start + duration,
+                "duration": duration,
+                "frozen": (job_index, task_index) in instance.fixed_starts,
+            })
+
+    machines = []
+    for machine, code in enumerate(instance.machine_codes):
+        assigned[machine].sort(key=lambda t: t["start"])
+        machines.append({
+            "machine_id": code,  # trả về string
+            "tasks": assigned[machine],
+        })
+    return machines
@@ -0,0 +1,391 @@
+import bisect
+import collections
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ortools.sat.python import cp_model
+
+from app.config import settings
+from app.jobshop.dispatch import giffler_thompson, repair_schedule, schedule_makespan
+from app.jobshop.instance import JobShopInstance, TaskKey, balanced_instance, build_instance, machines_from_starts
+from app.schemas.schedula import ScheduleRequest
+from app.services.solver_pool import bind_solver, stop_requested
+
+
+# kích thước vùng nhỏ nhất khi tự co lại sau các vòng không kịp giải xong
+MIN_NEIGHBORHOOD_SIZE = 10
+
+
+@dataclass
+class ScheduleIndex:
+    """
+    Chỉ mục của lịch hiện tại để chọn vùng và dựng model con nhanh
+    """
+    # (start, job, task) của mọi task không cố định, sắp theo start
+    free_ops: List[Tuple[int, int, int]]
+    # theo máy: (start, end, job, task) của mọi task, sắp theo start
+    machine_ops: List[List[Tuple[int, int, int, int]]]
+    # vị trí của task trong machine_ops của máy nó
+    machine_position: Dict[TaskKey, int]
+    # theo máy / theo job: task không cố định, sắp theo start
+    machine_free: List[List[Tuple[int, int, int]]]
+    job_free: List[List[Tuple[int, int]]]
+    # task không cố định nằm trên đường găng (quyết định makespan)
+    critical_ops: List[Tuple[int, int, int]]
+
+
+def left_shift(instance: JobShopInstance, starts: List[List[int]]) -> List[List[int]]:
+    """
+    Dồn lịch sang trái, giữ nguyên thứ tự task trên từng máy.
+    Task cố định giữ nguyên start, task còn lại không trước release_time.
+    """
+    jobs_data = instance.jobs_data
+    order = sorted(
+        (starts[j][t], starts[j][t] + duration, t, j)
+        for j, job in enumerate(jobs_data)
+        for t, (_, duration) in enumerate(job)
+    )
+    job_ready = [instance.release_time] * len(jobs_data)
+    machine_ready = [instance.release_time] * len(instance.machine_codes)
+    shifted = [[0] * len(job) for job in jobs_data]
+    for start, _, t, j in order:
+        machine, duration = jobs_data[j][t]
+        if (j, t) not in instance.fixed_starts:
+            start = max(job_ready[j], machine_ready[machine])
+        shifted[j][t] = start
+        job_ready[j] = start + duration
+        machine_ready[machine] = max(machine_ready[machine], start + duration)
+    return shifted
+
+
+def index_schedule(instance: JobShopInstance, starts: List[List[int]]) -> ScheduleIndex:
+    num_machines = len(instance.machine_codes)
+    machine_ops = [[] for _ in range(num_machines)]
+    machine_free = [[] for _ in range(num_machines)]
+    job_free = [[] for _ in instance.jobs_data]
+    free_ops = []
+    for j, job in enumerate(instance.jobs_data):
+        for t, (machine, duration) in enumerate(job):
+            start = starts[j][t]
+            machine_ops[machine].append((start, start + duration, j, t))
+            if (j, t) in instance.fixed_starts:
+                continue
+            free_ops.append((start, j, t))
+            machine_free[machine].append((start, j, t))
+            job_free[j].append((start, t))
+
+    for ops in machine_ops:
+        ops.sort()
+    for ops in machine_free:
+        ops.sort()
+    free_ops.sort()
+    machine_position = {
+        (j, t): position
+        for ops in machine_ops
+        for position, (_, _, j, t) in enumerate(ops)
+    }
+
+    # tail: độ dài đường dài nhất từ lúc task bắt đầu tới hết lịch
+    jobs_data = instance.jobs_data
+    tail = [[0] * len(job) for job in jobs_data]
+    for start, end, j, t in sorted(
+            (op for ops in machine_ops for op in ops), reverse=True):
+        machine = jobs_data[j][t][0]
+        position = machine_position[j, t]
+        following = 0
+        if t + 1 < len(jobs_data[j]):
+            following = tail[j][t + 1]
+        if position + 1 < len(machine_ops[machine]):
+            _, _, next_j, next_t = machine_ops[machine][position + 1]
+            following = max(following, tail[next_j][next_t])
+        tail[j][t] = end - start + following
+    makespan = max((op[0] + tail[op[1]][op[2]] for op in free_ops), default=0)
+
+    return ScheduleIndex(
+        free_ops=free_ops,
+        machine_ops=machine_ops,
+        machine_position=machine_position,
+        machine_free=machine_free,
+        job_free=job_free,
+        critical_ops=[op for op in free_ops if op[0] + tail[op[1]][op[2]] == makespan],
+    )
+
+
+def _anchor(rng: random.Random, index: ScheduleIndex) -> int:
+    # một nửa số vòng xoay quanh đường găng: chỉ ở đó makespan mới giảm được
+    if index.critical_ops and rng.random() < 0.5:
+        return rng.choice(index.critical_ops)[0]
+    return rng.choice(index.free_ops)[0]
+
+
+def _around(items: list, anchor: int, count: int) -> list:
+    # đoạn liên tiếp count phần tử (sắp theo start) quanh thời điểm anchor
+    position = bisect.bisect_left(items, (anchor,))
+    first = max(0, min(position - count // 2, len(items) - count))
+    return items[first:first + count]
+
+
+def time_window_neighborhood(rng: random.Random, index: ScheduleIndex, size: int) -> Set[TaskKey]:
+    """
+    Mọi task có start nằm trong một cửa sổ thời gian quanh một thời điểm ngẫu nhiên
+    """
+    return {(j, t) for _, j, t in _around(index.free_ops, _anchor(rng, index), size)}
+
+
+def machines_neighborhood(rng: random.Random, index: ScheduleIndex, size: int) -> Set[TaskKey]:
+    """
+    Vài máy ngẫu nhiên, trên mỗi máy một đoạn task liên tiếp quanh cùng thời điểm
+    """
+    machines = [m for m, ops in enumerate(index.machine_free) if ops]
+    chosen = rng.sample(machines, min(len(machines), rng.randint(2, 4)))
+    anchor = _anchor(rng, index)
+    quota = max(1, size // len(chosen))
+    return {
+        (j, t)
+        for machine in chosen
+        for _, j, t in _around(index.machine_free[machine], anchor, quota)
+    }
+
+
+def jobs_neighborhood(rng: random.Random, index: ScheduleIndex, size: int) -> Set[TaskKey]:
+    """
+    Các job ngẫu nhiên, mỗi job một đoạn task quanh cùng thời điểm
+    (job ngắn được giải lại toàn bộ)
+    """
+    jobs = [j for j, ops in enumerate(index.job_free) if ops]
+    rng.shuffle(jobs)
+    anchor = _anchor(rng, index)
+    per_job = max(2, size // 10)
+    freed = set()
+    for j in jobs:
+        if len(freed) >= size:
+            break
+        take = min(per_job, size - len(freed))
+        freed.update((j, t) for _, t in _around(index.job_free[j], anchor, take))
+    return freed
+
+
+NEIGHBORHOODS: Dict[str, Callable[[random.Random, ScheduleIndex, int], Set[TaskKey]]] = {
+    "time_window": time_window_neighborhood,
+    "machines": machines_neighborhood,
+    "jobs": jobs_neighborhood,
+}
+
+
+def solve_neighborhood(
+    instance: JobShopInstance,
+    starts: List[List[int]],
+    index: ScheduleIndex,
+    freed: Set[TaskKey],
+    makespan: int,
+    time_limit_sec: float,
+    num_workers: Optional[int] = None,
+    seed: int = 0,
+) -> Tuple[int, Dict[TaskKey, int]]:
+    """
+    Giải lại các task trong freed, phần còn lại giữ nguyên.
+
+    Trên mỗi máy, các task liên tiếp (theo thứ tự trên máy) trong freed được
+    đổi thứ tự tự do trong khoảng từ lúc task cố định liền trước kết thúc tới lúc
+    task cố định liền sau bắt đầu. Task cố định không cần đưa vào model nên model
+    con chỉ có đúng các task trong freed. Lịch hiện tại là một lời giải (hint).
+
+    Trả về (status, start mới của các task trong freed).
+    """
+    jobs_data = instance.jobs_data
+
+    # khoảng thời gian được phép của từng task theo máy
+    positions = collections.defaultdict(list)
+    for key in freed:
+        machine = jobs_data[key[0]][key[1]][0]
+        positions[machine].append(index.machine_position[key])
+    window: Dict[TaskKey, Tuple[int, int]] = {}
+    for machine, machine_positions in positions.items():
+        ops = index.machine_ops[machine]
+        machine_positions.sort()
+        group_start = 0
+        for i, position in enumerate(machine_positions):
+            is_last = i + 1 == len(machine_positions) or machine_positions[i + 1] != position + 1
+            if not is_last:
+                continue
+            first, last = machine_positions[group_start], position
+            low = ops[first - 1][1] if first > 0 else instance.release_time
+            high = ops[last + 1][0] if last + 1 < len(ops) else makespan
+            for _, _, j, t in ops[first:last + 1]:
+                window[j, t] = (low, high)
+            group_start = i + 1
+
+    model = cp_model.CpModel()
+    start_vars: Dict[TaskKey, Any] = {}
+    end_vars: Dict[TaskKey, Any] = {}
+    machine_to_intervals = collections.defaultdict(list)
+
+    for j, t in sorted(freed):
+        machine, duration = jobs_data[j][t]
+        low, high = window[j, t]
+        # task liền trước / liền sau của job không được giải lại thì là mốc cứng
+        if t > 0 and (j, t - 1) not in freed:
+            low = max(low, starts[j][t - 1] + jobs_data[j][t - 1][1])
+        if t + 1 < len(jobs_data[j]) and (j, t + 1) not in freed:
+            high = min(high, starts[j][t + 1])
+
+        suffix = f"_{j}_{t}"
+        start_var = model.new_int_var(low, high - duration, "start" + suffix)
+        end_var = model.new_int_var(low + duration, high, "end" + suffix)
+        machine_to_intervals[machine].append(model.new_interval_var(
+            start_var, duration, end_var, "interval" + suffix))
+        start_vars[j, t] = start_var
+        end_vars[j, t] = end_var
+        model.add_hint(start_var, starts[j][t])
+        model.add_hint(end_var, starts[j][t] + duration)
+
+        if (j, t - 1) in freed:
+            model.add(start_var >= end_vars[j, t - 1])
+
+    for intervals in machine_to_intervals.values():
+        model.add_no_overlap(intervals)
+
+    # dồn vùng về sớm nhất: task cuối job trong vùng ảnh hưởng trực tiếp makespan
+    # nên có trọng số lớn hơn các task kết thúc trước task cố định
+    last_ends = [end_vars[j, t] for j, t in freed if t == len(jobs_data[j]) - 1]
+    region_end = model.new_int_var(0, makespan, "region_end")
+    model.add_max_equality(region_end, list(end_vars.values()))
+    objective = region_end
+    if last_ends:
+        last_end = model.new_int_var(0, makespan, "last_end")
+        model.add_max_equality(last_end, last_ends)
+        objective = region_end + (makespan + 1) * last_end
+    model.minimize(objective)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit_sec
+    solver.parameters.random_seed = seed
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+
+    bind_solver(solver)
+    status = solver.solve(model)
+    new_starts = {}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        new_starts = {key: solver.value(var) for key, var in start_vars.items()}
+    return status, new_starts
+
+
+def solve_lns(
+    request: ScheduleRequest,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    instance: Optional[JobShopInstance] = None,
+) -> Dict[str, Any]:
+    """
+    Large neighborhood search: bắt đầu từ lịch Giffler–Thompson (hoặc lịch gợi ý
+    đã sửa nếu tốt hơn), mỗi vòng chọn một vùng theo các chiến lược trong
+    request.lns, giải lại vùng đó bằng CP-SAT rồi dồn trái cả lịch; giữ kết quả
+    nếu makespan không tăng. Dừng khi hết time_limit_sec, đủ max_iterations
+    hoặc có yêu cầu dừng từ pool. Task có máy thay thế được chốt máy theo cân
+    tải từ đầu, LNS chỉ xếp lại thứ tự/thời gian.
+    """
+    started = time.perf_counter()
+    options = request.lns
+    instance = balanced_instance(instance or build_instance(request))
+    jobs_data = instance.jobs_data
+    rng = random.Random(options.seed)
+
+    def full_makespan(schedule: List[List[int]]) -> int:
+        return max(schedule_makespan(jobs_data, schedule),
+                   instance.release_time, instance.fixed_end)
+
+    starts = giffler_thompson(
+        jobs_data, "MWKR", instance.fixed_starts, instance.release_time)
+    if instance.hint_starts:
+        repaired = repair_schedule(
+            jobs_data, instance.hint_starts, instance.fixed_starts, instance.release_time)
+        if schedule_makespan(jobs_data, repaired) <= schedule_makespan(jobs_data, starts):
+            starts = repaired
+    starts = left_shift(instance, starts)
+    makespan = initial_makespan = full_makespan(starts)
+
+    time_limit = request.time_limit_sec or settings.solver_time_limit_sec
+    size = options.neighborhood_size
+    index = index_schedule(instance, starts)
+    if on_progress:
+        # lịch ban đầu đã là một lời giải
+        event = {
+            "solutions": 0,
+            "objective": makespan,
+            "wall_time_sec": time.perf_counter() - started,
+            "iteration": 0,
+        }
+        if request.stream_assignment:
+            event["machines"] = machines_from_starts(instance, starts)
+        on_progress(event)
+    strategy_stats = {name: {"tried": 0, "improved": 0} for name in options.strategies}
+    iterations = improvements = 0
+
+    while index.free_ops and not stop_requested():
+        remaining = time_limit - (time.perf_counter() - started)
+        if remaining <= 0:
+            break
+        if options.max_iterations is not None and iterations >= options.max_iterations:
+            break
+
+        strategy = options.strategies[iterations % len(options.strategies)]
+        freed = NEIGHBORHOODS[strategy](rng, index, size)
+        status, new_starts = solve_neighborhood(
+            instance, starts, index, freed, makespan,
+            time_limit_sec=min(options.iteration_time_limit_sec, remaining),
+            num_workers=request.num_workers,
+            seed=options.seed + iterations,
+        )
+        iterations += 1
+        strategy_stats[strategy]["tried"] += 1
+
+        # vùng giải xong sớm thì nới rộng, không kịp thì thu hẹp
+        if status == cp_model.OPTIMAL:
+            size = min(options.neighborhood_size, int(size * 1.2) + 1)
+        else:
+            size = max(MIN_NEIGHBORHOOD_SIZE, int(size * 0.8))
+        if not new_starts:
+            continue
+
+        candidate = [list(job_starts) for job_starts in starts]
+        for (j, t), start in new_starts.items():
+            candidate[j][t] = start
+        candidate = left_shift(instance, candidate)
+        candidate_makespan = full_makespan(candidate)
+        if candidate_makespan > makespan or candidate == starts:
+            continue
+
+        if candidate_makespan < makespan:
+            improvements += 1
+            strategy_stats[strategy]["improved"] += 1
+            if on_progress:
+                event = {
+                    "solutions": improvements,
+                    "objective": candidate_makespan,
+                    "wall_time_sec": time.perf_counter() - started,
+                    "iteration": iterations,
+                    "strategy": strategy,
+                }
+                if request.stream_assignment:
+                    event["machines"] = machines_from_starts(instance, candidate)
+                on_progress(event)
+        starts, makespan = candidate, candidate_makespan
+        index = index_schedule(instance, starts)
+
+    return {
+        "status": "FEASIBLE",
+        "objective": makespan,
+        "machines": machines_from_starts(instance, starts),
+        "statistics": {
+            "mode": "lns",
+            "wall_time_sec": time.perf_counter() - started,
+            "iterations": iterations,
+            "improvements": improvements,
+            "initial_makespan": initial_makespan,
+            "makespan": makespan,
+            "neighborhood_size": size,
+            "strategies": strategy_stats,
+        },
+    }
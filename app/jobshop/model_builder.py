@@ -0,0 +1,334 @@
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ortools.sat.python import cp_model
+
+from app.jobshop.instance import JobShopInstance
+
+
+Option = Tuple[int, int]  # (resource, duration)
+
+
+def _expr(var: Optional[int], offset: int = 0) -> Dict[str, Any]:
+    # var None: hằng số offset
+    if var is None:
+        return {"vars": (), "coeffs": (), "offset": offset}
+    return {"vars": (var,), "coeffs": (1,), "offset": offset}
+
+
+class ProtoBuilder:
+    """
+    Ghi thẳng vào CpModelProto, bỏ qua lớp IntVar / LinearExpr của cp_model:
+    biến và interval chỉ là chỉ số nguyên, không tạo object Python cho từng
+    biến, nhanh hơn vài lần và nhẹ bộ nhớ hơn với bài toán lớn.
+    names=False: không đặt tên biến.
+    """
+
+    def __init__(self, names: bool = True):
+        self.model = cp_model.CpModel()
+        self.proto = self.model.proto
+        self.names = names
+        self._add_var = self.proto.variables.add
+        self._add_constraint = self.proto.constraints.add
+
+    def new_var(self, low: int, high: int, name: str = "") -> int:
+        index = len(self.proto.variables)
+        if self.names and name:
+            self._add_var(domain=(low, high), name=name)
+        else:
+            self._add_var(domain=(low, high))
+        return index
+
+    def new_vars(self, low: int, high: int, names: Sequence[str]) -> List[int]:
+        first = len(self.proto.variables)
+        add_var = self._add_var
+        if self.names:
+            for name in names:
+                add_var(domain=(low, high), name=name)
+        else:
+            for _ in range(len(names)):
+                add_var(domain=(low, high))
+        return list(range(first, first + len(names)))
+
+    def add_interval(self, start: int, size: int, end: Optional[int] = None, presence: Optional[int] = None) -> int:
+        """
+        Interval [start, start + size); end là biến riêng (interval optional có
+        duration khác nhau) hoặc None = biểu thức start + size, không cần biến
+        """
+        index = len(self.proto.constraints)
+        interval = {
+            "start": _expr(start),
+            "size": {"offset": size},
+            "end": _expr(start, size) if end is None else _expr(end),
+        }
+        if presence is None:
+            self._add_constraint(interval=interval)
+        else:
+            self._add_constraint(
+                enforcement_literal=(presence,), interval=interval)
+        return index
+
+    def add_fixed_interval(self, start: int, size: int) -> int:
+        index = len(self.proto.constraints)
+        self._add_constraint(interval={
+            "start": {"offset": start},
+            "size": {"offset": size},
+            "end": {"offset": start + size},
+        })
+        return index
+
+    def add_differences(self, pairs: Sequence[Tuple[int, int, int]]):
+        """
+        Hàng loạt ràng buộc after - before >= gap, mỗi phần tử (after, before, gap)
+        """
+        add_constraint = self._add_constraint
+        for after, before, gap in pairs:
+            add_constraint(linear={
+                "vars": (after, before),
+                "coeffs": (1, -1),
+                "domain": (gap, cp_model.INT_MAX),
+            })
+
+    def add_no_overlap(self, intervals: Sequence[int]):
+        self._add_constraint(no_overlap={"intervals": intervals})
+
+    def add_cumulative(self, intervals: Sequence[int], capacity: int):
+        self._add_constraint(cumulative={
+            "capacity": {"offset": capacity},
+            "intervals": intervals,
+            "demands": [{"offset": 1}] * len(intervals),
+        })
+
+    def add_exactly_one(self, literals: Sequence[int]):
+        self._add_constraint(exactly_one={"literals": literals})
+
+    def add_max_equality(self, target: int, exprs: Sequence[Tuple[int, int]]):
+        """
+        target = max(var + offset) với exprs gồm (var, offset), var None là hằng số
+        """
+        self._add_constraint(lin_max={
+            "target": _expr(target),
+            "exprs": [_expr(var, offset) for var, offset in exprs],
+        })
+
+    def minimize(self, var: int):
+        self.proto.objective.vars.append(var)
+        self.proto.objective.coeffs.append(1)
+
+    def add_hints(self, variables: Sequence[int], values: Sequence[int]):
+        hint = self.proto.solution_hint
+        hint.vars.extend(variables)
+        hint.values.extend(values)
+
+
+class JobShopModel:
+    """
+    Model CP-SAT của một JobShopInstance, lưu theo mảng phẳng: task (job, t)
+    có chỉ số offsets[job] + t trong start / end / options.
+
+    Task chỉ có một lựa chọn không có biến end (end = start + duration).
+    Task có nhiều lựa chọn (máy thay thế / pool) có biến end và mỗi lựa chọn
+    là một optional interval với literal trong presences.
+    """
+
+    def __init__(
+        self,
+        instance: JobShopInstance,
+        horizon: int,
+        names: bool = True,
+        lower_bound: int = 0,
+    ):
+        self.instance = instance
+        self.builder = builder = ProtoBuilder(names)
+        jobs_data = instance.jobs_data
+        fixed_starts = instance.fixed_starts
+        release_time = instance.release_time
+
+        # Tài nguyên: mỗi máy ngoài pool là một tài nguyên (no_overlap), mỗi
+        # pool máy giống hệt nhau là một tài nguyên sức chứa N (cumulative):
+        # bỏ được đối xứng giữa các máy trong pool, máy cụ thể gán sau khi giải
+        self.num_machines = num_machines = len(instance.machine_codes)
+        self.offsets = offsets = []
+        keys = []
+        for job_id, job in enumerate(jobs_data):
+            offsets.append(len(keys))
+            keys.extend((job_id, task_id) for task_id in range(len(job)))
+        self.keys = keys
+
+        # (resource, duration) của từng lựa chọn, lựa chọn đầu là máy chính
+        options: List[List[Option]] = []
+        resource_of = self.resource_of
+        for job_id, job in enumerate(jobs_data):
+            for task_id, (machine, duration) in enumerate(job):
+                key = (job_id, task_id)
+                if key in instance.alternatives and key not in fixed_starts:
+                    options.append(list(dict.fromkeys(
+                        (resource_of(option_machine), option_duration)
+                        for option_machine, option_duration in instance.task_options(job_id, task_id))))
+                else:
+                    options.append([(resource_of(machine), duration)])
+        self.options = options
+
+        def task_names(prefix: str, indices: Sequence[int]) -> List[str]:
+            if not names:
+                return [""] * len(indices)
+            return [f"{prefix}_{keys[i][0]}_{keys[i][1]}" for i in indices]
+
+        # task cố định: biến có domain một giá trị
+        self.start = start = [0] * len(keys)
+        self.end: List[Optional[int]] = [None] * len(keys)
+        free = []
+        for i, key in enumerate(keys):
+            if key in fixed_starts:
+                start[i] = builder.new_var(
+                    fixed_starts[key], fixed_starts[key], names and f"start_{key[0]}_{key[1]}")
+            else:
+                free.append(i)
+        for i, var in zip(free, builder.new_vars(release_time, horizon, task_names("start", free))):
+            start[i] = var
+
+        flexible = [i for i in free if len(options[i]) > 1]
+        for i, var in zip(flexible, builder.new_vars(release_time, horizon, task_names("end", flexible))):
+            self.end[i] = var
+
+        resource_intervals: Dict[int, List[int]] = {}
+        # chỉ số task → [(presence, (resource, duration))]
+        self.presences: Dict[int, List[Tuple[int, Option]]] = {}
+        for i, key in enumerate(keys):
+            if key in fixed_starts:
+                resource, duration = options[i][0]
+                # task đã xong trước release_time không ảnh hưởng task còn lại
+                if fixed_starts[key] + duration > release_time:
+                    resource_intervals.setdefault(resource, []).append(
+                        builder.add_fixed_interval(fixed_starts[key], duration))
+                continue
+            if self.end[i] is None:
+                resource, duration = options[i][0]
+                resource_intervals.setdefault(resource, []).append(
+                    builder.add_interval(start[i], duration))
+                continue
+            # mỗi lựa chọn là một optional interval, đúng một lựa chọn được dùng
+            task_presences = []
+            for option in options[i]:
+                presence = builder.new_var(0, 1, names and (
+                    f"presence_{key[0]}_{key[1]}_r{option[0]}_d{option[1]}"))
+                resource_intervals.setdefault(option[0], []).append(
+                    builder.add_interval(start[i], option[1], self.end[i], presence))
+                task_presences.append((presence, option))
+            builder.add_exactly_one([presence for presence, _ in task_presences])
+            self.presences[i] = task_presences
+
+        for machine in range(num_machines):
+            if machine not in instance.machine_pool:
+                builder.add_no_overlap(resource_intervals.get(machine, []))
+        for pool_id, members in enumerate(instance.pools):
+            builder.add_cumulative(
+                resource_intervals.get(num_machines + pool_id, []), len(members))
+
+        # thứ tự task trong job: start(t + 1) >= end(t)
+        precedences = []
+        for job_id, job in enumerate(jobs_data):
+            offset = offsets[job_id]
+            for i in range(offset, offset + len(job) - 1):
+                if keys[i] in fixed_starts and keys[i + 1] in fixed_starts:
+                    continue
+                end_var, gap = self.end_expr(i)
+                precedences.append((start[i + 1], end_var, gap))
+        builder.add_differences(precedences)
+
+        # release_time và task cố định kết thúc muộn nhất cũng tính vào
+        # makespan (như lịch dispatch / LNS), để lower_bound (lower_bounds tính
+        # cả hai) luôn khả thi, kể cả khi mọi task đều cố định
+        self.makespan = builder.new_var(lower_bound, horizon, "makespan")
+        builder.add_max_equality(self.makespan, [
+            self.end_expr(offsets[job_id] + len(job) - 1)
+            for job_id, job in enumerate(jobs_data) if job
+        ] + [(None, max(release_time, instance.fixed_end))])
+        builder.minimize(self.makespan)
+
+    @property
+    def model(self) -> cp_model.CpModel:
+        return self.builder.model
+
+    def resource_of(self, machine: int) -> int:
+        if machine in self.instance.machine_pool:
+            return self.num_machines + self.instance.machine_pool[machine]
+        return machine
+
+    def end_expr(self, i: int) -> Tuple[int, int]:
+        # (biến, offset): end = biến + offset
+        if self.end[i] is None:
+            return self.start[i], self.options[i][0][1]
+        return self.end[i], 0
+
+    def add_hints(self, starts: List[List[int]], jobs_data: List[List[Tuple[int, int]]], makespan: int):
+        """
+        Gợi ý lịch starts với máy theo jobs_data (lịch heuristic / warm start)
+        """
+        variables, values = [], []
+        for i, (job_id, task_id) in enumerate(self.keys):
+            if (job_id, task_id) in self.instance.fixed_starts:
+                continue
+            start = starts[job_id][task_id]
+            machine, duration = jobs_data[job_id][task_id]
+            variables.append(self.start[i])
+            values.append(start)
+            if self.end[i] is not None:
+                variables.append(self.end[i])
+                values.append(start + duration)
+                hinted_option = (self.resource_of(machine), duration)
+                for presence, option in self.presences[i]:
+                    variables.append(presence)
+                    values.append(int(option == hinted_option))
+        variables.append(self.makespan)
+        values.append(makespan)
+        self.builder.add_hints(variables, values)
+
+    def solution_starts(self, solution: Sequence[int]) -> List[List[int]]:
+        """
+        solution: giá trị mọi biến theo chỉ số (response_proto.solution)
+        """
+        start = self.start
+        return [
+            [solution[start[i]] for i in range(offset, offset + len(job))]
+            for offset, job in zip(self.offsets, self.instance.jobs_data)
+        ]
+
+    def chosen_option(self, i: int, solution: Sequence[int]) -> Option:
+        if i in self.presences:
+            return next(
+                option for presence, option in self.presences[i] if solution[presence])
+        return self.options[i][0]
+
+
+def build_report(
+    build: Callable[[], JobShopModel],
+    memory: bool = False,
+) -> Tuple[JobShopModel, Dict[str, Any]]:
+    """
+    Dựng model và đo thời gian / kích thước; memory=True đo thêm bộ nhớ cấp
+    phát lúc dựng model (tracemalloc, làm chậm bước dựng model vài lần)
+    """
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        job_model = build()
+        build_time = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    proto = job_model.builder.proto
+    report = {
+        "build_time_sec": build_time,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "names": job_model.builder.names,
+    }
+    if memory:
+        report["peak_memory_mb"] = peak / 2 ** 20
+        report["proto_size_mb"] = proto.ByteSize() / 2 ** 20
+    return job_model, report
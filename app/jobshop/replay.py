@@ -0,0 +1,128 @@
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from google.protobuf import text_format
+from ortools.sat.python import cp_model
+
+from app.jobshop.capture import load_capture
+from app.solver_progress import ProgressCallback
+
+
+def replay(
+    proto,
+    base_parameters: str = "",
+    parameters: Sequence[str] = (),
+    num_workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    time_limit_sec: Optional[float] = None,
+    hint: bool = True,
+    log: bool = False,
+) -> Dict[str, Any]:
+    """
+    Giải lại một model đã capture. Tham số solver: base_parameters (tham số lúc
+    capture, dạng text proto) rồi lần lượt parameters ("key: value"), cuối cùng
+    num_workers / seed / time_limit_sec nếu có
+    """
+    model = cp_model.CpModel()
+    model.proto.CopyFrom(proto)
+    if not hint:
+        model.proto.ClearField("solution_hint")
+
+    solver = cp_model.CpSolver()
+    text_format.Merge(base_parameters, solver.parameters)
+    for text in parameters:
+        text_format.Merge(text, solver.parameters)
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    if seed is not None:
+        solver.parameters.random_seed = seed
+    if time_limit_sec is not None:
+        solver.parameters.max_time_in_seconds = time_limit_sec
+    solver.parameters.log_search_progress = log
+
+    first_feasible = []
+    started = time.perf_counter()
+
+    def on_progress(event: Dict[str, Any]):
+        if not first_feasible:
+            first_feasible.append(time.perf_counter() - started)
+
+    status = solver.solve(model, ProgressCallback(on_progress))
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "num_workers": solver.parameters.num_workers,
+        "seed": solver.parameters.random_seed,
+        "status": solver.status_name(status),
+        "objective": solver.objective_value if found else None,
+        "best_bound": solver.best_objective_bound if found else None,
+        "wall_time_sec": time.perf_counter() - started,
+        "solve_time_sec": solver.wall_time,
+        "first_feasible_sec": first_feasible[0] if first_feasible else None,
+        "conflicts": solver.num_conflicts,
+        "branches": solver.num_branches,
+    }
+
+
+def _format(record: Dict[str, Any]) -> str:
+    first = record["first_feasible_sec"]
+    return (
+        f"workers={record['num_workers']} seed={record['seed']} {record['status']:<10} "
+        f"objective={record['objective']} bound={record['best_bound']} "
+        f"first={first if first is None else round(first, 3)} "
+        f"wall={record['wall_time_sec']:.3f} conflicts={record['conflicts']}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.jobshop.replay",
+        description="Giải lại model CP-SAT đã capture với tham số / số worker khác")
+    parser.add_argument("captures", nargs="+", help="thư mục capture (hoặc file model.pb)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[None],
+                        help="số worker, mặc định như lúc capture")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[None])
+    parser.add_argument("--time-limit", type=float, help="mặc định như lúc capture")
+    parser.add_argument("--param", action="append", default=[],
+                        help='tham số CP-SAT dạng text proto, vd. "linearization_level: 2"')
+    parser.add_argument("--fresh", action="store_true",
+                        help="bỏ tham số lúc capture, bắt đầu từ tham số mặc định")
+    parser.add_argument("--no-hint", action="store_true", help="bỏ solution hint trong model")
+    parser.add_argument("--log", action="store_true", help="in log tìm kiếm của CP-SAT")
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for path in args.captures:
+        proto, meta = load_capture(path)
+        print(
+            f"{path}: {len(proto.variables)} variables, {len(proto.constraints)} constraints; "
+            f"captured {meta.get('status')} objective={meta.get('objective')} "
+            f"wall={meta.get('wall_time_sec')}",
+            flush=True,
+        )
+        for num_workers in args.workers:
+            for seed in args.seeds:
+                record = replay(
+                    proto,
+                    base_parameters="" if args.fresh else meta.get("parameters", ""),
+                    parameters=args.param,
+                    num_workers=num_workers,
+                    seed=seed,
+                    time_limit_sec=args.time_limit,
+                    hint=not args.no_hint,
+                    log=args.log,
+                )
+                print(f"  {_format(record)}", flush=True)
+                results.append({"capture": path, **record})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"parameters": args.param, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+import collections
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from ortools.sat.python import cp_model
+
+from app.config import settings
+from app.jobshop.bounds import lower_bounds, optimality_gap
+from app.jobshop.dispatch import (
+    assign_pool_members,
+    balance_machines,
+    giffler_thompson,
+    repair_schedule,
+    schedule_makespan,
+)
+from app.jobshop.capture import capture_model
+from app.jobshop.instance import JobShopInstance, assign_machines, balanced_instance, build_instance, machines_from_starts
+from app.jobshop.lns import solve_lns
+from app.jobshop.model_builder import JobShopModel, build_report
+from app.schemas.schedula import ScheduleRequest
+from app.services.solver_pool import bind_solver
+from app.solver_progress import ProgressCallback, ProgressFn
+
+
+logger = logging.getLogger(__name__)
+
+
+def solve_dispatch(
+    request: ScheduleRequest,
+    on_progress: Optional[ProgressFn] = None,
+    instance: Optional[JobShopInstance] = None,
+) -> Dict[str, Any]:
+    """
+    Chế độ dispatch: lịch Giffler–Thompson theo luật request.rule,
+    cho lời giải trong vài mili giây với bài toán rất lớn (không tối ưu)
+    """
+    started = time.perf_counter()
+    instance = balanced_instance(instance or build_instance(request))
+    starts = giffler_thompson(
+        instance.jobs_data,
+        rule=request.rule,
+        fixed_starts=instance.fixed_starts,
+        release_time=instance.release_time,
+    )
+    makespan = max(schedule_makespan(instance.jobs_data, starts),
+                   instance.release_time, instance.fixed_end)
+    wall_time = time.perf_counter() - started
+    if on_progress:
+        on_progress({"solutions": 1, "objective": makespan,
+                    "wall_time_sec": wall_time})
+
+    return {
+        "status": "FEASIBLE",
+        "objective": makespan,
+        "machines": machines_from_starts(instance, starts),
+        "statistics": {
+            "mode": "dispatch",
+            "rule": request.rule,
+            "wall_time_sec": wall_time,
+            "makespan": makespan,
+        },
+    }
+
+
+def with_bounds(result: Dict[str, Any], bounds: Dict[str, Any], solver_bound: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Thêm cận dưới và gap vào kết quả; lời giải chạm cận dưới là tối ưu
+    """
+    best_bound = max(bounds["lower_bound"], solver_bound or 0)
+    result["best_bound"] = best_bound
+    result["gap"] = optimality_gap(result["objective"], best_bound)
+    result["statistics"]["lower_bounds"] = bounds
+    if result["gap"] == 0 and result["status"] == "FEASIBLE":
+        result["status"] = "OPTIMAL"
+    return result
+
+
+def solve_jobshop(
+    request: ScheduleRequest,
+    on_progress: Optional[ProgressFn] = None,
+) -> Dict[str, Any]:
+    instance = build_instance(request)
+    bounds = lower_bounds(instance)
+    if request.mode == "bound_only":
+        return {
+            "status": "BOUND_ONLY",
+            "objective": None,
+            "best_bound": bounds["lower_bound"],
+            "gap": None,
+            "machines": [],
+            "statistics": {"mode": "bound_only", "lower_bounds": bounds},
+        }
+    if request.mode == "dispatch":
+        return with_bounds(solve_dispatch(request, on_progress, instance), bounds)
+
+    # lns với bài toán nhỏ hơn một vùng thì giải thẳng cả model
+    free_tasks = instance.num_tasks - len(instance.fixed_starts)
+    if request.mode == "lns" and free_tasks > request.lns.neighborhood_size:
+        return with_bounds(solve_lns(request, on_progress, instance), bounds)
+
+    jobs_data = instance.jobs_data
+    fixed_starts = instance.fixed_starts
+    release_time = instance.release_time
+    fixed_end = instance.fixed_end
+
+    # Flexible: máy chọn theo cân tải cho lịch heuristic / gợi ý
+    heuristic_jobs = jobs_data
+    if instance.alternatives:
+        heuristic_jobs = balance_machines(jobs_data, instance.alternatives)
+
+    # Lịch Giffler–Thompson (MWKR): makespan của nó là cận trên, dùng làm
+    # horizon (thay cho tổng mọi duration) và làm lời giải gợi ý cho CP-SAT
+    heuristic_starts = giffler_thompson(
+        heuristic_jobs, "MWKR", fixed_starts, release_time)
+    heuristic_makespan = max(
+        schedule_makespan(heuristic_jobs, heuristic_starts), release_time, fixed_end)
+    horizon = heuristic_makespan
+    hinted_starts = heuristic_starts
+
+    # Warm start: sửa lịch gợi ý thành lịch khả thi rồi đưa vào làm hint
+    hint_stats = None
+    if request.hints:
+        hint_starts = instance.hint_starts
+        repaired_starts = repair_schedule(
+            heuristic_jobs, hint_starts, fixed_starts, release_time)
+        hint_makespan = schedule_makespan(heuristic_jobs, repaired_starts)
+        if hint_makespan <= heuristic_makespan:
+            hinted_starts = repaired_starts
+            horizon = max(hint_makespan, release_time, fixed_end)
+        hint_stats = {
+            "provided": len(hint_starts),
+            "repaired": sum(
+                1 for key, start in hint_starts.items()
+                if repaired_starts[key[0]][key[1]] != start
+            ),
+            "makespan": hint_makespan,
+        }
+
+    job_model, build_stats = build_report(
+        lambda: JobShopModel(
+            instance, horizon, names=request.build.names,
+            lower_bound=min(bounds["lower_bound"], horizon)),
+        memory=request.build.memory_report,
+    )
+    job_model.add_hints(hinted_starts, heuristic_jobs, horizon)
+    model = job_model.model
+    num_machines = job_model.num_machines
+
+    solver = cp_model.CpSolver()
+    if request.time_limit_sec is not None:
+        solver.parameters.max_time_in_seconds = request.time_limit_sec
+    if request.num_workers is not None:
+        solver.parameters.num_workers = request.num_workers
+    if request.random_seed is not None:
+        solver.parameters.random_seed = request.random_seed
+
+    def chosen_jobs(solution: Sequence[int], starts: List[List[int]]) -> List[List[Any]]:
+        # (máy, duration) của từng task: lựa chọn của solver, task trong pool
+        # được gán máy cụ thể của pool
+        chosen = [list(job) for job in jobs_data]
+        pool_tasks = collections.defaultdict(list)
+        for i, key in enumerate(job_model.keys):
+            job_id, task_id = key
+            resource, duration = job_model.chosen_option(i, solution)
+            if resource < num_machines:
+                chosen[job_id][task_id] = (resource, duration)
+                continue
+            # máy mong muốn: máy ghi trong tasks / máy thay thế thuộc pool này
+            preferred = next(
+                machine for machine, _ in instance.task_options(job_id, task_id)
+                if job_model.resource_of(machine) == resource)
+            start = starts[job_id][task_id]
+            pool_tasks[resource - num_machines].append(
+                (key, duration, (start, start + duration, preferred, key in fixed_starts)))
+
+        for pool_id, items in pool_tasks.items():
+            machines = assign_pool_members(
+                [item for _, _, item in items], instance.pools[pool_id])
+            for ((job_id, task_id), duration, _), machine in zip(items, machines):
+                chosen[job_id][task_id] = (machine, duration)
+        return chosen
+
+    def assigned_solution(solution: Sequence[int]):
+        solution = list(solution)
+        starts = job_model.solution_starts(solution)
+        assigned = instance
+        if job_model.presences or instance.pools:
+            assigned = assign_machines(instance, chosen_jobs(solution, starts))
+        return assigned, starts
+
+    def machines_assignment(solution: Sequence[int]) -> List[Dict[str, Any]]:
+        return machines_from_starts(*assigned_solution(solution))
+
+    bind_solver(solver)
+    callback = None
+    if on_progress:
+        callback = ProgressCallback(
+            on_progress,
+            machines_assignment if request.stream_assignment else None,
+        )
+    status = solver.solve(model, callback)
+
+    result: Dict[str, Any] = {
+        "status": solver.status_name(status),
+        "objective": solver.objective_value if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None,
+        "machines": [],
+        "statistics": {
+            "conflicts": solver.num_conflicts,
+            "branches": solver.num_branches,
+            "wall_time_sec": solver.wall_time,
+            "heuristic_makespan": heuristic_makespan,
+            "makespan": solver.objective_value if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None,
+            "build": build_stats,
+        },
+    }
+    if hint_stats is not None:
+        result["statistics"]["hint"] = hint_stats
+    if instance.pools:
+        result["statistics"]["pools"] = len(instance.pools)
+    if instance.alternatives:
+        result["statistics"]["flexible_tasks"] = len(instance.alternatives)
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        assigned, starts = assigned_solution(solver.response_proto.solution)
+        result["machines"] = machines_from_starts(assigned, starts)
+        if instance.alternatives:
+            result["statistics"]["alternative_assignments"] = sum(
+                1 for job_id, task_id in instance.alternatives
+                if assigned.jobs_data[job_id][task_id] != jobs_data[job_id][task_id]
+            )
+    else:
+        result["error"] = "No feasible solution found."
+
+    result = with_bounds(
+        result, bounds,
+        solver.best_objective_bound if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None)
+
+    capture_dir = settings.solver_capture_dir
+    min_sec = settings.solver_capture_min_sec
+    if capture_dir and (request.build.capture or (
+            min_sec is not None and solver.wall_time >= min_sec)):
+        # lỗi ghi capture không làm hỏng lần giải
+        try:
+            result["statistics"]["capture"] = capture_model(
+                capture_dir, model.proto, request, solver.parameters, result)
+        except OSError:
+            logger.exception("Cannot capture solver model")
+    return result
@@ -10,6 +10,7 @@ from app.routes.company import route as CompanyRoute
 from app.routes.company.employee import auth_em
 from app.routes.for_machine_manager import manager
 from .database import engine
+from .services.solver_pool import get_solver_pool, shutdown_solver_pool
 
 app = FastAPI(title="Factory Scheduler API")
 
@@ -30,6 +31,7 @@ AdminRouter.include_router(catalog.router)
 AdminRouter.include_router(job_operater.router)
 AdminRouter.include_router(job.router)
 AdminRouter.include_router(factoryCycle.router)
+AdminRouter.include_router(factoryCycle.company_router)
 AdminRouter.include_router(admin_factory_distance.router)
 AdminRouter.include_router(em_to_factory_distance.router)
 
@@ -47,6 +49,17 @@ app.include_router(employee_route.router)
 app.include_router(prefix="/auth", router=auth_em.router)
 
 
+@app.on_event("startup")
+def start_solver_pool():
+    # tạo sẵn worker process cho CP-SAT
+    get_solver_pool()
+
+
+@app.on_event("shutdown")
+def stop_solver_pool():
+    shutdown_solver_pool()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Factory Scheduler API is running!"}
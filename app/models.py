@@ -2,7 +2,7 @@ import datetime
 import enum
 import uuid
 from sqlalchemy import (
-    Column, Float, Integer, String, ForeignKey, DateTime, JSON, UniqueConstraint, Enum
+    Boolean, Column, Float, Integer, String, ForeignKey, DateTime, JSON, UniqueConstraint, Enum
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -433,3 +433,49 @@ class EmployeeBlockTime(Base):
     title = Column(String)
     description = Column(String)
     employee = relationship("Employee", backref="blocked_times")
+
+
+class SolverRun(Base):
+    """
+    Telemetry của mỗi lần giải (job-shop / xếp lịch nhân viên)
+    """
+    __tablename__ = "solver_run"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)  # jobshop / employee
+
+    companyId = Column(Integer, ForeignKey(
+        "company.id", ondelete="SET NULL"), nullable=True, index=True)
+    factoryId = Column(Integer, ForeignKey(
+        "factory.id", ondelete="SET NULL"), nullable=True)
+    factoryCycleId = Column(Integer, ForeignKey(
+        "factory_cycle.id", ondelete="SET NULL"), nullable=True)
+
+    # ===== Kích thước bài toán =====
+    num_jobs = Column(Integer)
+    num_tasks = Column(Integer)
+    num_machines = Column(Integer)
+    features = Column(JSON)
+
+    # ===== Tham số =====
+    mode = Column(String(20))
+    time_limit_sec = Column(Float)
+    num_workers = Column(Integer)
+
+    # ===== Kết quả =====
+    status = Column(String(20))
+    # tính cả thời gian chờ trong pool / thời gian solver chạy
+    wall_time_sec = Column(Float)
+    solve_time_sec = Column(Float)
+    conflicts = Column(Integer)
+    branches = Column(Integer)
+    objective = Column(Float)
+    best_bound = Column(Float)
+    gap = Column(Float)
+    cache_hit = Column(Boolean, default=False, nullable=False)
+    # dùng hết time limit mà chưa chứng minh được tối ưu
+    timed_out = Column(Boolean, default=False, nullable=False)
+    error = Column(String(500))
+
+    createdAt = Column(DateTime(timezone=True),
+                       server_default=func.now(), index=True)
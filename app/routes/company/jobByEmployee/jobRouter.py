@@ -2,18 +2,20 @@ from fastapi.encoders import jsonable_encoder
 import datetime
 from itertools import combinations
 from sqlalchemy.orm import joinedload
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import SessionLocal
-from app.models import Company, Employee, EmployeeBlockTime, EmployeeToFactoryDistance, Factory, FactoryDistance, JobByEmployee, skill_list
-from app.scheduling_optimization_ortools.main_1 import Employee_Scheduling_Problems
+from app.models import Company, Factory, JobByEmployee, skill_list
 from app.schemas.jobByEmployee import JobByEmployeeCreate, JobByEmployeeRead, JobByEmployeeUpdate
+from app.schemas.schedula import SolveJobStatus, SolveJobSubmitted
 from sqlalchemy.exc import IntegrityError
 
+from app.services.employee_schedule_service import get_employee_schedule_or_404, submit_employee_schedule
+from app.services.employee_snapshot_service import load_company_snapshot, snapshot_payload
 from app.services.job_for_employee import validate_company, validate_job
-from app.utils import parse_start_safe, weekday_to_date_this_week
+from app.services.solve_job_service import FAILED, FINAL_STATUSES, cancel_solve, to_status
 
 
 router = APIRouter()
@@ -197,164 +199,58 @@ def delete_job(
 @router.get("/companies/{company_id}/job-json")
 def getJobGeneral(
     company_id: int,
+    compact: bool = False,
     db: Session = Depends(get_db)
 ):
-    company = db.query(Company).filter(Company.id == company_id).first()
-    if not company:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Công ty với ID {company_id} không tồn tại."
-        )
-
-    employeesQuery = db.query(Employee).filter(
-        Employee.companyId == company_id)
-
-    factoryQuery = db.query(Factory).filter(Factory.companyId == company_id)
-
-    employee_ids = [e.id for e in employeesQuery]
-
-    factory_ids = [f.id for f in factoryQuery]
-
-    distancesEmToFa = db.query(EmployeeToFactoryDistance).filter(
-        EmployeeToFactoryDistance.employeeId.in_(employee_ids),
-        EmployeeToFactoryDistance.factoryId.in_(factory_ids)
-    ).all()
-
-    distancesFaToFa = db.query(FactoryDistance).filter(
-        FactoryDistance.factory_from_id.in_(factory_ids),
-        FactoryDistance.factory_to_id.in_(factory_ids)
-    ).all()
-
-    blockedTimes = db.query(EmployeeBlockTime).filter(
-        EmployeeBlockTime.employee_id.in_(employee_ids)
-    ).all()
-
-    employees = []
-    em_locations = []
-    fa_locations = []
-    jobs = []
-    employeeBlockTime = []
-    for e in employeesQuery:
-        employees.append({
-            "employee_id": f"em_{e.id}",  # e.id là int → cần str
-            "name": e.fullName,
-            "skills": e.employeeSkillList,  "specialized": [
-                "SpecificSkills"
-            ]
-        })
-
-        # em_locations.append({
-        #     "location_id": f"lo_em_{e.id}",
-        #     "employee_id": f"em_{e.id}",  # e.id là int → cần str
-
-        # })
-
-    for fa in factoryQuery:
-        fa_locations.append({
-            "location_id": f"lo_fa_{fa.id}",
-            "employee_id": ""
-        })
-
-    jobQuery = db.query(JobByEmployee).filter(
-        JobByEmployee.companyId == company_id)
-
-    for job in jobQuery:
-        jobs.append({
-            "job_duration": job.duration,
-            "job_type": job.skillNeeded,
-            "job_id": f"jo_{job.id}",
-            "expected_date": weekday_to_date_this_week(job.expected_weekday).date(),
-            "location_id": f"lo_fa_{job.factoryId}",
-            "shipment_date":  weekday_to_date_this_week(job.expected_weekday).date()
-        })
-
-    # for em in employees:
-    #     for fa_lo in fa_locations:
-    #         distances.append({
-    #             "hours": 2,
-    #             "measure_point":  em["employee_id"],
-    #             "reference_point": fa_lo["location_id"]
-
-    #         })
-    distance_em_to_fa_map = {
-        (d.employeeId, d.factoryId): d.travel_time_hours
-        for d in distancesEmToFa
-    }
-
-    distance_fa_to_fa_map = {
-        (d.factory_from_id, d.factory_to_id): d.travel_time_hours
-        for d in distancesFaToFa
-    }
-
-    result = []
-
-    for employee in employeesQuery:
-        for factory in factoryQuery:
-            travel_time = distance_em_to_fa_map.get(
-                (employee.id, factory.id),
-                1  # 👈 default nếu chưa có
-            )
-
-            result.append({
-                "hours": travel_time,
-                "measure_point": f"em_{employee.id}",
-                "reference_point": f"lo_fa_{factory.id}",
-            })
-
-    for i, fa_from in enumerate(factoryQuery):
-        for fa_to in factoryQuery[i + 1:]:
-            travel_time = distance_fa_to_fa_map.get(
-                (fa_from.id, fa_to.id),
-                0
-            )
-
-            result.append({
-                "hours": travel_time,
-                "measure_point": f"lo_fa_{fa_from.id}",
-                "reference_point": f"lo_fa_{fa_to.id}",
-            })
+    return snapshot_payload(load_company_snapshot(db, company_id), compact)
 
-    for blocked in blockedTimes:
 
-        employeeBlockTime.append({
-            "job_type": "any",
-            "job_duration": blocked.job_duration,
-            "employee_id": f"em_{blocked.employee_id}",
-            "requested_date": weekday_to_date_this_week(blocked.expected_weekday).date(),
-            "blocked_id": f"bl_{blocked.id}",
-            "start": blocked.start_hour
-        })
-
-    return {"employees": employees, "locations": em_locations + fa_locations, "jobs": jobs, "distances": result, "blocked_times": employeeBlockTime}
-
-
-@router.post("/companies/{company_id}/schedule-job")
+@router.post(
+    "/companies/{company_id}/schedule-job",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=SolveJobSubmitted,
+)
 def getScheduleJob(company_id: int,
+                   decompose: Optional[bool] = None,
                    db: Session = Depends(get_db)):
-    payload = getJobGeneral(company_id, db)
-
-    payload_json = jsonable_encoder(payload)
-
-    schedule = Employee_Scheduling_Problems(payload_json)["data"]
-    # print(schedule)
-
-    for em in schedule:
-        employee_id = em["employee_id"].split("_", 1)[1]
-        print("em id" + employee_id)
-        for job in em["jobs"]:
-            job_id = job["job_id"].split("_", 1)[1]
-            factory_id = job["location_id"].split("_", 1)[1]
+    """
+    Xếp lịch nhân viên chạy nền: trả về solve_id ngay, polling
+    GET /companies/{company_id}/schedule-job/{solve_id} (phase loading /
+    solving / writing), kết quả ở .../result.
+    decompose: chia bài theo ngày / kỹ năng / factory và giải song song,
+    mặc định tự bật với company nhiều job
+    """
+    validate_company(db=db, company_id=company_id)
+    job = submit_employee_schedule(company_id, {"decompose": decompose})
+    return SolveJobSubmitted(solve_id=job.id, status=job.status)
 
-            scheduled_weekday_start, start_hour = parse_start_safe(
-                job["start"])
-            scheduled_weekday_end, end_hour = parse_start_safe(job["end"])
 
-            jobQuery = db.query(JobByEmployee).filter(
-                JobByEmployee.id == job_id).first()
+@router.get("/companies/{company_id}/schedule-job/{solve_id}", response_model=SolveJobStatus)
+def getScheduleJobStatus(company_id: int, solve_id: str):
+    return to_status(get_employee_schedule_or_404(company_id, solve_id))
 
-            jobQuery.employeeId = employee_id
-            jobQuery.scheduled_weekday = scheduled_weekday_start
-            jobQuery.start_hour = start_hour
-            jobQuery.end_hour = end_hour
 
-            db.commit()
+@router.get("/companies/{company_id}/schedule-job/{solve_id}/result")
+def getScheduleJobResult(company_id: int, solve_id: str):
+    job = get_employee_schedule_or_404(company_id, solve_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status not in FINAL_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Solve job is {job.status}"
+        )
+    if job.result is None:
+        # bị cancel, lịch không được ghi
+        raise HTTPException(status_code=404, detail=job.error)
+    return job.result
+
+
+@router.post("/companies/{company_id}/schedule-job/{solve_id}/cancel", response_model=SolveJobStatus)
+def cancelScheduleJob(company_id: int, solve_id: str):
+    """
+    Dừng xếp lịch; lời giải dở không được ghi vào DB
+    """
+    job = get_employee_schedule_or_404(company_id, solve_id)
+    cancel_solve(job)
+    return to_status(job)
@@ -1,11 +1,25 @@
+import datetime
+from typing import Optional
 from sqlalchemy import and_
-from fastapi import APIRouter, Body, HTTPException, Depends
+from fastapi import APIRouter, Body, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import SessionLocal
-from app.models import Factory, FactoryCycle, JobByMachine, JobByMachineOperate
+from app.models import CycleStatus, Factory, FactoryCycle, JobByMachine, JobByMachineOperate
 from app.schemas.JobOperater import BatchJobOpTimeUpdate
 from app.schemas.factoryCycle import FactoryCycleCreate, FactoryCycleResponse, FactoryCycleUpdate
+from app.services.cycle_schedule_service import (
+    build_cycle_request,
+    cycle_now_hours,
+    load_cycle_jobs,
+    load_machine_groups,
+    result_to_job_ops,
+    save_cycle_schedule,
+)
+from app.services.company_solve_service import solve_company_cycles
 from app.services.job_service import validate_cycle, validate_factory
+from app.services.jobshop_service import solve_jobshop_sync
+from app.services.solver_telemetry_service import SolveContext
 
 
 def get_db():
@@ -31,6 +45,8 @@ router = APIRouter(
     prefix="/company/{companyId}/factory/{factoryId}/cycle",
     tags=["Factory-Cycle"])
 
+company_router = APIRouter(prefix="/company/{companyId}/cycles", tags=["Factory-Cycle"])
+
 
 @router.get("", response_model=list[FactoryCycleResponse])
 def list_cycles(companyId: int, factoryId: int, db: Session = Depends(get_db)):
@@ -177,6 +193,9 @@ def update_job_ops_time_in_cycle(
             {
                 JobByMachineOperate.start: item.start,
                 JobByMachineOperate.end: item.end,
+                # flexible: op được chuyển sang máy khác cùng type
+                **({JobByMachineOperate.machineId: item.machineId}
+                   if item.machineId is not None else {}),
             },
             synchronize_session=False
         )
@@ -191,3 +210,181 @@ def update_job_ops_time_in_cycle(
     db.commit()
 
     return {"detail": f"Updated {len(data.items)} job operations"}
+
+
+@router.post("/{cycleId}/resolve")
+def resolve_cycle(
+    companyId: int,
+    factoryId: int,
+    cycleId: int,
+    warm_start: bool = Query(
+        True, description="Dùng lịch đã lưu (start/end) làm lời giải gợi ý"),
+    time_limit_sec: Optional[float] = Query(None, gt=0),
+    flexible: bool = Query(
+        False, description="Cho phép chuyển op sang máy cùng type đã duyệt trong factory"),
+    pooled: bool = Query(
+        False, description="Như flexible, nhưng gộp các máy cùng type thành một tài nguyên sức chứa N"),
+    db: Session = Depends(get_db),
+):
+    """
+    Giải lại lịch của cycle. Kết quả job_ops (giờ, kèm machineId) có thể gửi
+    thẳng vào PUT /{cycleId}/job-ops/time để lưu.
+    """
+    validate_factory(db, companyId, factoryId)
+    validate_cycle(db, factoryId, cycleId)
+
+    jobs = load_cycle_jobs(db, cycleId)
+    if not jobs:
+        raise HTTPException(400, "Cycle không có job nào để xếp lịch")
+
+    machine_groups = load_machine_groups(
+        db, factoryId) if flexible or pooled else None
+    request = build_cycle_request(
+        jobs,
+        warm_start=warm_start,
+        time_limit_sec=time_limit_sec,
+        machine_groups=machine_groups,
+        pooled=pooled,
+    )
+    result = solve_jobshop_sync(
+        request, SolveContext(companyId, factoryId, cycleId))
+    result["job_ops"] = result_to_job_ops(jobs, result, machine_groups)
+    return result
+
+
+@router.post("/{cycleId}/solve")
+def solve_cycle(
+    companyId: int,
+    factoryId: int,
+    cycleId: int,
+    warm_start: bool = Query(True),
+    time_limit_sec: Optional[float] = Query(None, gt=0),
+    flexible: bool = Query(False),
+    pooled: bool = Query(False),
+    db: Session = Depends(get_db),
+):
+    """
+    Như /resolve nhưng lưu luôn kết quả: đọc cả cycle bằng một query, giải,
+    rồi ghi start/end (và machineId) của mọi op bằng một lệnh UPDATE hàng loạt
+    trong một transaction. Không có lời giải thì không ghi gì.
+    Cycle processing được xếp lại từ hiện tại như /reschedule: op đã chạy
+    giữ nguyên, không bị ghi đè.
+    """
+    validate_factory(db, companyId, factoryId)
+    cycle = validate_cycle(db, factoryId, cycleId)
+    now_hours = cycle_now_hours(cycle)
+
+    jobs = load_cycle_jobs(db, cycleId)
+    if not jobs:
+        raise HTTPException(400, "Cycle không có job nào để xếp lịch")
+
+    machine_groups = load_machine_groups(
+        db, factoryId) if flexible or pooled else None
+    request = build_cycle_request(
+        jobs,
+        warm_start=warm_start,
+        time_limit_sec=time_limit_sec,
+        now_hours=now_hours,
+        machine_groups=machine_groups,
+        pooled=pooled,
+    )
+    result = solve_jobshop_sync(
+        request, SolveContext(companyId, factoryId, cycleId))
+    if not result["machines"]:
+        raise HTTPException(
+            422, f"Không tìm được lịch cho cycle (status {result['status']})")
+
+    job_ops = result_to_job_ops(jobs, result, machine_groups)
+    try:
+        updated = save_cycle_schedule(db, jobs, job_ops)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "status": result["status"],
+        "objective": result["objective"],
+        "statistics": result["statistics"],
+        "cache": result.get("cache"),
+        "now_hours": now_hours,
+        "updated": updated,
+    }
+
+
+@router.post("/{cycleId}/reschedule")
+def reschedule_cycle_from_now(
+    companyId: int,
+    factoryId: int,
+    cycleId: int,
+    now: Optional[datetime.datetime] = Query(
+        None, description="Thời điểm xếp lại lịch, mặc định là hiện tại"),
+    warm_start: bool = Query(True),
+    time_limit_sec: Optional[float] = Query(None, gt=0),
+    flexible: bool = Query(False),
+    pooled: bool = Query(False),
+    db: Session = Depends(get_db),
+):
+    """
+    Xếp lại lịch giữa chu kỳ: op đã xong/đang chạy (start trước now) giữ nguyên,
+    chỉ xếp lại các op còn lại bắt đầu từ now.
+    start/end của op tính bằng giờ kể từ startTime của cycle.
+    """
+    validate_factory(db, companyId, factoryId)
+    cycle = validate_cycle(db, factoryId, cycleId)
+
+    if cycle.status != CycleStatus.processing:
+        raise HTTPException(
+            400, "Chỉ xếp lại lịch từ hiện tại cho cycle đang processing")
+    now_hours = cycle_now_hours(cycle, now)
+
+    jobs = load_cycle_jobs(db, cycleId)
+    if not jobs:
+        raise HTTPException(400, "Cycle không có job nào để xếp lịch")
+
+    machine_groups = load_machine_groups(
+        db, factoryId) if flexible or pooled else None
+    request = build_cycle_request(
+        jobs,
+        warm_start=warm_start,
+        time_limit_sec=time_limit_sec,
+        now_hours=now_hours,
+        machine_groups=machine_groups,
+        pooled=pooled,
+    )
+    result = solve_jobshop_sync(
+        request, SolveContext(companyId, factoryId, cycleId))
+    result["now_hours"] = now_hours
+    result["job_ops"] = result_to_job_ops(jobs, result, machine_groups)
+    return result
+
+
+@company_router.post("/solve")
+def solve_company(
+    companyId: int,
+    time_budget_sec: Optional[float] = Query(
+        None, gt=0, description="Thời gian cho cả lần giải, mặc định solver_time_limit_sec"),
+    warm_start: bool = Query(True),
+    flexible: bool = Query(False),
+    pooled: bool = Query(False),
+    cpu_budget: Optional[int] = Query(
+        None, ge=1, description="Tổng số luồng CP-SAT, mặc định solver_batch_cpu_budget"),
+    db: Session = Depends(get_db),
+):
+    """
+    Giải song song mọi cycle draft/processing của các factory trong company
+    và lưu lịch như /{cycleId}/solve; trả về tóm tắt từng cycle
+    """
+    time_budget_sec = min(
+        time_budget_sec or settings.solver_time_limit_sec,
+        settings.solver_hard_time_limit_sec,
+    )
+    return solve_company_cycles(
+        db,
+        companyId,
+        time_budget_sec,
+        warm_start=warm_start,
+        flexible=flexible,
+        pooled=pooled,
+        cpu_budget=cpu_budget,
+    )
@@ -1,25 +1,54 @@
-from fastapi import APIRouter, FastAPI
-from pydantic import BaseModel
-from typing import List, Tuple, Dict, Any
-from ortools.sat.python import cp_model
-import collections
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+import time
+from fastapi import APIRouter, FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.schemas.schedula import (
+    BatchScheduleRequest,
+    BatchStatus,
+    BatchSubmitted,
+    ScheduleRequest,
+    SolveJobStatus,
+    SolveJobSubmitted,
+)
+from app.services.batch_solve_service import (
+    batch_results,
+    cancel_batch,
+    get_batch_or_404,
+    iter_batch_results,
+    submit_batch,
+    to_batch_status,
+)
+from app.services.jobshop_service import solve_jobshop_request, submit_jobshop_request
+from app.services.solver_telemetry_service import failure_status, record_employee_run, solver_trends
+from app.services.solve_job_service import (
+    FAILED,
+    FINAL_STATUSES,
+    cancel_solve,
+    get_solve_or_404,
+    iter_solve_events,
+    solve_in_pool_async,
+    to_status,
+)
 # from app.scheduling_optimization_ortools.main import Employee_Scheduling_Problems
 from app.scheduling_optimization_ortools.main_1 import Employee_Scheduling_Problems
 
 router = APIRouter(prefix="/schedula", tags=["schedulas"])
 
 
-# ----------------------------
-# Input schema
-# ----------------------------
-class JobData(BaseModel):
-    job_id: int
-    tasks: List[Tuple[str, int]]  # (machine_code, duration)
-
-
-class ScheduleRequest(BaseModel):
-    jobs: List[JobData]
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
 
 # ----------------------------
@@ -27,114 +56,170 @@ class ScheduleRequest(BaseModel):
 # ----------------------------
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def schedule_jobshop(request: ScheduleRequest):
+async def schedule_jobshop(request: ScheduleRequest, http_request: Request):
+    return await solve_jobshop_request(http_request, request)
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=SolveJobSubmitted)
+def submit_schedule_jobshop(request: ScheduleRequest):
+    """
+    Giải bất đồng bộ: trả về solve_id ngay, client polling GET /schedula/jobs/{solve_id}
+    """
+    job = submit_jobshop_request(request)
+    return SolveJobSubmitted(solve_id=job.id, status=job.status)
+
+
+@router.get("/jobs/{solve_id}", response_model=SolveJobStatus)
+def get_solve_status(solve_id: str):
+    return to_status(get_solve_or_404(solve_id))
+
+
+@router.get("/jobs/{solve_id}/result")
+def get_solve_result(solve_id: str):
+    job = get_solve_or_404(solve_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status not in FINAL_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Solve job is {job.status}"
+        )
+    if job.result is None:
+        # bị cancel trước khi có lời giải
+        raise HTTPException(status_code=404, detail=job.error)
+    return job.result
+
+
+@router.post("/jobs/{solve_id}/cancel", response_model=SolveJobStatus)
+def cancel_solve_job(solve_id: str):
+    """
+    Dừng solve: nếu solver đã có lời giải thì vẫn trả về lời giải tốt nhất hiện có
+    """
+    job = get_solve_or_404(solve_id)
+    cancel_solve(job)
+    return to_status(job)
+
+
+@router.get("/jobs/{solve_id}/events")
+async def stream_solve_events(solve_id: str):
+    """
+    Server-Sent Events: mỗi lời giải tốt hơn là một event "solution"
+    (makespan, bound, lịch đầy đủ nếu stream_assignment), kết thúc bằng "done"
+    """
+    job = get_solve_or_404(solve_id)
 
-    job_index_to_id = {i: job.job_id for i, job in enumerate(request.jobs)}
+    async def event_source():
+        async for event in iter_solve_events(job):
+            data = json.dumps(jsonable_encoder(event))
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def schedule_jobshop_ws(websocket: WebSocket):
+    """
+    Gửi ScheduleRequest, nhận lần lượt các lời giải trung gian.
+    Client gửi {"action": "stop"} khi lịch đã đủ tốt để dừng và nhận kết quả cuối.
+    """
+    await websocket.accept()
+    try:
+        request = ScheduleRequest(**await websocket.receive_json())
+    except ValidationError as exc:
+        await websocket.close(code=1003, reason=str(exc)[:120])
+        return
+
+    job = submit_jobshop_request(request)
+    await websocket.send_json({"event": "submitted", "solve_id": job.id})
+
+    async def listen_for_stop():
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if message.get("action") == "stop":
+                    cancel_solve(job)
+        except WebSocketDisconnect:
+            cancel_solve(job)
+
+    listener = asyncio.create_task(listen_for_stop())
+    try:
+        async for event in iter_solve_events(job):
+            await websocket.send_json(jsonable_encoder(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        cancel_solve(job)
+    finally:
+        listener.cancel()
 
-    # Lấy tất cả machine code
-    machine_codes = list({
-        task[0]
-        for job in request.jobs
-        for task in job.tasks
-    })
 
-    # Map string → index
-    machine_to_index = {code: i for i, code in enumerate(machine_codes)}
-    index_to_machine = {i: code for code, i in machine_to_index.items()}
+@router.post("/batch")
+async def schedule_jobshop_batch(batch: BatchScheduleRequest, http_request: Request):
+    """
+    Giải nhiều bài job-shop song song, trả về NDJSON: dòng "submitted", mỗi bài
+    xong là một dòng "result" (theo thứ tự hoàn thành), cuối cùng là "done".
+    Client ngắt kết nối thì các bài chưa xong bị cancel.
+    """
+    batch_job = submit_batch(batch)
 
-    jobs_data = [
-        [(machine_to_index[machine_code], duration)
-         for machine_code, duration in job.tasks]
-        for job in request.jobs
-    ]
+    async def lines():
+        yield json.dumps({
+            "event": "submitted",
+            "batch_id": batch_job.id,
+            "solve_ids": [job.id for job in batch_job.jobs],
+        }) + "\n"
+        finished = False
+        try:
+            async for event in iter_batch_results(batch_job):
+                if await http_request.is_disconnected():
+                    break
+                yield json.dumps(jsonable_encoder(event)) + "\n"
+            finished = True
+        finally:
+            if not finished:
+                cancel_batch(batch_job)
 
-    machines_count = 1 + max(task[0] for job in jobs_data for task in job)
-    all_machines = range(machines_count)
-    horizon = sum(task[1] for job in jobs_data for task in job)
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-    model = cp_model.CpModel()
 
-    task_type = collections.namedtuple("task_type", "start end interval")
-    assigned_task_type = collections.namedtuple(
-        "assigned_task_type", "start job index duration"
+@router.post("/batch/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=BatchSubmitted)
+def submit_schedule_jobshop_batch(batch: BatchScheduleRequest):
+    """
+    Batch chạy nền: polling GET /schedula/batch/{batch_id}
+    """
+    batch_job = submit_batch(batch)
+    return BatchSubmitted(
+        batch_id=batch_job.id,
+        solve_ids=[job.id for job in batch_job.jobs],
     )
 
-    all_tasks = {}
-    machine_to_intervals = collections.defaultdict(list)
-
-    for job_id, job in enumerate(jobs_data):
-        for task_id, task in enumerate(job):
-            machine, duration = task
-            suffix = f"_{job_id}_{task_id}"
-            start_var = model.new_int_var(0, horizon, "start" + suffix)
-            end_var = model.new_int_var(0, horizon, "end" + suffix)
-            interval_var = model.new_interval_var(
-                start_var, duration, end_var, "interval" + suffix)
-            all_tasks[job_id, task_id] = task_type(
-                start=start_var, end=end_var, interval=interval_var)
-            machine_to_intervals[machine].append(interval_var)
-
-    for machine in all_machines:
-        model.add_no_overlap(machine_to_intervals[machine])
-
-    for job_id, job in enumerate(jobs_data):
-        for task_id in range(len(job) - 1):
-            model.add(all_tasks[job_id, task_id + 1].start >=
-                      all_tasks[job_id, task_id].end)
-
-    obj_var = model.new_int_var(0, horizon, "makespan")
-    model.add_max_equality(obj_var, [all_tasks[job_id, len(
-        job) - 1].end for job_id, job in enumerate(jobs_data)])
-    model.minimize(obj_var)
-
-    solver = cp_model.CpSolver()
-    status = solver.solve(model)
-
-    result: Dict[str, Any] = {
-        "status": solver.status_name(status),
-        "objective": solver.objective_value if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None,
-        "machines": [],
-        "statistics": {
-            "conflicts": solver.num_conflicts,
-            "branches": solver.num_branches,
-            "wall_time_sec": solver.wall_time,
-        },
+
+@router.get("/batch/{batch_id}", response_model=BatchStatus)
+def get_batch_status(batch_id: str):
+    return to_batch_status(get_batch_or_404(batch_id))
+
+
+@router.get("/batch/{batch_id}/results")
+def get_batch_results(batch_id: str):
+    """
+    Kết quả các bài đã xong, có ngay cả khi batch chưa xong hoặc đã bị cancel
+    """
+    batch_job = get_batch_or_404(batch_id)
+    return {
+        "batch_id": batch_job.id,
+        "status": batch_job.status,
+        "results": batch_results(batch_job),
     }
 
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        assigned_jobs = collections.defaultdict(list)
-        for job_id, job in enumerate(jobs_data):
-            for task_id, task in enumerate(job):
-                machine = task[0]
-                assigned_jobs[machine].append(
-                    assigned_task_type(
-                        start=solver.value(all_tasks[job_id, task_id].start),
-                        job=job_id,
-                        index=task_id,
-                        duration=task[1],
-                    )
-                )
-
-        for machine in all_machines:
-            assigned_jobs[machine].sort(key=lambda t: t.start)
-            machine_tasks = [
-                {
-                    "job": job_index_to_id[t.job],   # trả về job_id thật
-                    "task_index": t.index,
-                    "start": t.start,
-                    "end": t.start + t.duration,
-                    "duration": t.duration,
-                }
-                for t in assigned_jobs[machine]
-            ]
-            result["machines"].append({
-                "machine_id": index_to_machine[machine],  # trả về string
-                "tasks": machine_tasks,
-            })
-    else:
-        result["error"] = "No feasible solution found."
 
-    return result
+@router.post("/batch/{batch_id}/cancel", response_model=BatchStatus)
+def cancel_batch_job(batch_id: str):
+    batch_job = get_batch_or_404(batch_id)
+    cancel_batch(batch_job)
+    return to_batch_status(batch_job)
 
 
 class Employee_Scheduling_Problems_Request(BaseModel):
@@ -142,5 +227,31 @@ class Employee_Scheduling_Problems_Request(BaseModel):
 
 
 @router.post("/schedula-for-employee", status_code=status.HTTP_201_CREATED)
-def schedule_for_employee(request: Employee_Scheduling_Problems_Request):
-    return Employee_Scheduling_Problems(request.payload)
+async def schedule_for_employee(request: Employee_Scheduling_Problems_Request, http_request: Request):
+    started = time.perf_counter()
+    try:
+        result = await solve_in_pool_async(
+            http_request, Employee_Scheduling_Problems, request.payload, with_progress=False)
+    except HTTPException as exc:
+        await run_in_threadpool(
+            record_employee_run, request.payload, None, time.perf_counter() - started,
+            None, str(exc.detail), failure_status(exc))
+        raise
+    await run_in_threadpool(
+        record_employee_run, request.payload, result, time.perf_counter() - started)
+    return result
+
+
+@router.get("/telemetry/trends")
+def get_solver_trends(
+    company_id: Optional[int] = Query(None),
+    kind: Optional[Literal["jobshop", "employee"]] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+    bucket: Literal["day", "week"] = Query("day"),
+    db: Session = Depends(get_db),
+):
+    """
+    Thống kê các lần giải theo company và theo ngày / tuần: p50/p95 thời gian
+    giải, số lần hết time limit, lỗi, trúng cache
+    """
+    return solver_trends(db, company_id=company_id, kind=kind, days=days, bucket=bucket)
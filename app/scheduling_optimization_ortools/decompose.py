@@ -0,0 +1,262 @@
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.scheduling_optimization_ortools.dispatch import Assignment, Slot, greedy_schedule
+from app.scheduling_optimization_ortools.problem import EmployeeProblem
+from app.scheduling_optimization_ortools.solver import solve_assignment
+
+
+@dataclass
+class Cluster:
+    """
+    Bài con: một nhóm job cùng các (employee, ngày) được giao cho nhóm đó.
+    problem / candidates / fixed / hint dùng chỉ số riêng của bài con; jobs
+    và employees ánh xạ về chỉ số của bài gốc.
+    """
+    jobs: List[int]
+    employees: List[int]
+    problem: EmployeeProblem
+    candidates: Dict[Slot, List[int]]
+    fixed: Assignment = field(default_factory=dict)
+    hint: Assignment = field(default_factory=dict)
+
+    def to_global(self, assignment: Assignment) -> Assignment:
+        return {
+            self.jobs[job]: (self.employees[employee], day, start)
+            for job, (employee, day, start) in assignment.items()
+        }
+
+
+def subproblem(
+    problem: EmployeeProblem,
+    jobs: Sequence[int],
+    slots: Dict[Slot, List[int]],
+    fixed: Optional[Assignment] = None,
+    hint: Optional[Assignment] = None,
+) -> Cluster:
+    """
+    Cắt bài gốc theo các job và lựa chọn (employee, ngày) → job (chỉ số gốc);
+    ma trận giờ di chuyển lấy bằng np.ix_ theo employee / location của bài con
+    """
+    jobs = sorted(jobs)
+    employees = sorted({employee for employee, _ in slots})
+    locations = sorted({problem.jobs[job].location for job in jobs})
+    job_index = {job: i for i, job in enumerate(jobs)}
+    employee_index = {employee: i for i, employee in enumerate(employees)}
+    location_index = {location: i for i, location in enumerate(locations)}
+
+    sub = EmployeeProblem(
+        employee_ids=[problem.employee_ids[e] for e in employees],
+        employee_names=[problem.employee_names[e] for e in employees],
+        employee_skills=[problem.employee_skills[e] for e in employees],
+        location_ids=[problem.location_ids[location] for location in locations],
+        jobs=[
+            replace(problem.jobs[job], location=location_index[problem.jobs[job].location])
+            for job in jobs
+        ],
+        home_travel=problem.home_travel[np.ix_(employees, locations)],
+        site_travel=problem.site_travel[np.ix_(locations, locations)],
+        blocked={
+            (employee_index[employee], day): intervals
+            for (employee, day), intervals in problem.blocked.items()
+            if employee in employee_index
+        },
+        day_start=problem.day_start,
+        day_end=problem.day_end,
+    )
+    return Cluster(
+        jobs=jobs,
+        employees=employees,
+        problem=sub,
+        candidates={
+            (employee_index[employee], day): [job_index[job] for job in slot_jobs]
+            for (employee, day), slot_jobs in slots.items()
+        },
+        fixed={
+            job_index[job]: (employee_index[employee], day, start)
+            for job, (employee, day, start) in (fixed or {}).items()
+        },
+        hint={
+            job_index[job]: (employee_index[employee], day, start)
+            for job, (employee, day, start) in (hint or {}).items()
+        },
+    )
+
+
+def _split_by_location(problem: EmployeeProblem, jobs: List[int], max_jobs: int) -> List[List[int]]:
+    # nhóm quá lớn: chia theo factory (location), gom các factory nhỏ vào
+    # chung một nhóm (first-fit decreasing), factory quá lớn thì cắt đoạn
+    if len(jobs) <= max_jobs:
+        return [jobs]
+    by_location: Dict[int, List[int]] = {}
+    for job in jobs:
+        by_location.setdefault(problem.jobs[job].location, []).append(job)
+
+    groups: List[List[int]] = []
+    for location in sorted(by_location, key=lambda loc: (-len(by_location[loc]), loc)):
+        location_jobs = by_location[location]
+        while len(location_jobs) > max_jobs:
+            groups.append(location_jobs[:max_jobs])
+            location_jobs = location_jobs[max_jobs:]
+        for group in groups:
+            if len(group) + len(location_jobs) <= max_jobs:
+                group.extend(location_jobs)
+                break
+        else:
+            groups.append(list(location_jobs))
+    return groups
+
+
+def _capacity(problem: EmployeeProblem, slot: Slot) -> int:
+    busy = sum(end - start for start, end in problem.blocked.get(slot, []))
+    return problem.day_end - problem.day_start - busy
+
+
+def partition(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    max_cluster_jobs: int,
+    hint: Optional[Assignment] = None,
+) -> List[Cluster]:
+    """
+    Chia bài theo (ngày mong muốn, kỹ năng), nhóm lớn hơn max_cluster_jobs
+    chia tiếp theo factory. Mỗi (employee, ngày) chỉ được giao cho một nhóm
+    nên các bài con độc lập với nhau: (employee, ngày) lời giải gợi ý hint
+    dùng cho nhóm nào thì giao cho nhóm đó (lộ trình giữ làm gợi ý của bài
+    con), còn lại (employee, ngày) chỉ một nhóm dùng được giao trước,
+    (employee, ngày) nhiều nhóm dùng được (employee đa kỹ năng) giao cho nhóm
+    đang thiếu nhiều giờ nhất.
+    Job không còn lựa chọn nào trong nhóm của mình được xếp ở bước ghép lại
+    (reconcile_cluster).
+    """
+    groups: Dict[Tuple[int, str], List[int]] = {}
+    for job in sorted({job for slot_jobs in candidates.values() for job in slot_jobs}):
+        groups.setdefault((problem.jobs[job].days[0], problem.jobs[job].job_type or ""), []).append(job)
+
+    cluster_jobs: List[List[int]] = []
+    for key in sorted(groups):
+        cluster_jobs.extend(_split_by_location(problem, groups[key], max_cluster_jobs))
+    cluster_of = {job: c for c, jobs in enumerate(cluster_jobs) for job in jobs}
+
+    demand = [sum(problem.jobs[job].duration for job in jobs) for jobs in cluster_jobs]
+    supply = [0] * len(cluster_jobs)
+    wanting = {
+        slot: sorted({cluster_of[job] for job in slot_jobs})
+        for slot, slot_jobs in candidates.items()
+    }
+    routes: Dict[Slot, List[int]] = {}
+    for job, (employee, day, _) in (hint or {}).items():
+        routes.setdefault((employee, day), []).append(job)
+
+    cluster_slots: List[Dict[Slot, List[int]]] = [{} for _ in cluster_jobs]
+    cluster_hints: List[Assignment] = [{} for _ in cluster_jobs]
+    for slot in sorted(wanting, key=lambda s: (s not in routes, len(wanting[s]), s)):
+        if slot in routes:
+            hours: Counter = Counter()
+            for job in routes[slot]:
+                hours[cluster_of[job]] += problem.jobs[job].duration
+            chosen = max(hours, key=lambda c: (hours[c], -c))
+            # lộ trình lẫn job của nhóm khác: bỏ, bài con tự xếp lại
+            if len(hours) == 1:
+                cluster_hints[chosen].update((job, hint[job]) for job in routes[slot])
+        else:
+            chosen = max(wanting[slot], key=lambda c: demand[c] - supply[c])
+        supply[chosen] += _capacity(problem, slot)
+        cluster_slots[chosen][slot] = [job for job in candidates[slot] if cluster_of[job] == chosen]
+
+    # nhóm không được giao (employee, ngày) nào: job của nó chờ bước ghép lại
+    return [
+        subproblem(problem, jobs, slots, hint=cluster_hint)
+        for jobs, slots, cluster_hint in zip(cluster_jobs, cluster_slots, cluster_hints)
+        if slots
+    ]
+
+
+def plan_clusters(
+    problem: EmployeeProblem,
+    max_cluster_jobs: int,
+) -> Tuple[Dict[Slot, List[int]], List[Cluster]]:
+    """
+    Bước chuẩn bị của bài chia nhỏ, chạy như một task của pool solver: lựa
+    chọn (employee, ngày) của cả bài, lịch tham lam của cả bài và partition
+    theo lịch đó
+    """
+    candidates = problem.candidates()
+    return candidates, partition(
+        problem, candidates, max_cluster_jobs, greedy_schedule(problem, candidates))
+
+
+def reconcile_cluster(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    assignment: Assignment,
+    max_slots_per_job: int,
+) -> Optional[Cluster]:
+    """
+    Bài ghép lại sau khi giải các bài con: mỗi job chưa xếp được với tối đa
+    max_slots_per_job (employee, ngày) làm được nó và còn nhiều giờ trống
+    nhất, kể cả employee đã giao cho nhóm khác; job đã xếp trong các
+    (employee, ngày) đó giữ nguyên (fixed) để tính đúng giờ trống và đường
+    đi. None nếu mọi job đã được xếp.
+    """
+    used: Dict[Slot, int] = {}
+    for job, (employee, day, _) in assignment.items():
+        used[employee, day] = used.get((employee, day), 0) + problem.jobs[job].duration
+
+    options: Dict[int, List[Slot]] = {}
+    for slot, slot_jobs in candidates.items():
+        for job in slot_jobs:
+            if job not in assignment:
+                options.setdefault(job, []).append(slot)
+    if not options:
+        return None
+
+    slots: Dict[Slot, List[int]] = {}
+    for job, job_slots in options.items():
+        job_slots = sorted(job_slots, key=lambda slot: (
+            used.get(slot, 0) - _capacity(problem, slot), slot[1], slot[0]))
+        for slot in job_slots[:max_slots_per_job]:
+            slots.setdefault(slot, []).append(job)
+    fixed = {
+        job: placed for job, placed in assignment.items()
+        if (placed[0], placed[1]) in slots
+    }
+    for job, (employee, day, _) in fixed.items():
+        slots[employee, day].append(job)
+    return subproblem(problem, list(options) + list(fixed), slots, fixed)
+
+
+def solve_reconcile(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    assignment: Assignment,
+    time_limit_sec: float,
+    num_workers: Optional[int],
+    random_seed: Optional[int],
+    max_candidates_per_job: int,
+) -> Tuple[Assignment, int, Optional[Dict[str, Any]]]:
+    """
+    Dựng và giải bài ghép lại (reconcile_cluster) trong cùng một task của
+    pool solver. Trả về các job xếp thêm (chỉ số gốc), số job chờ ghép và
+    thống kê của solve_assignment (None nếu không còn job nào).
+    """
+    repair = reconcile_cluster(problem, candidates, assignment, max_candidates_per_job)
+    if repair is None:
+        return {}, 0, None
+    solution, statistics = solve_assignment(
+        repair.problem,
+        repair.candidates,
+        time_limit_sec,
+        num_workers,
+        random_seed,
+        max_candidates_per_job,
+        repair.fixed or None,
+    )
+    placed = {
+        job: placed for job, placed in repair.to_global(solution).items()
+        if job not in assignment
+    }
+    return placed, len(repair.jobs) - len(repair.fixed), statistics
@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.scheduling_optimization_ortools.problem import EmployeeProblem
+
+
+# job index → (employee, weekday, giờ bắt đầu)
+Assignment = Dict[int, Tuple[int, int, int]]
+Slot = Tuple[int, int]  # (employee, weekday)
+
+
+def append_start(
+    problem: EmployeeProblem,
+    slot: Slot,
+    route: List[Tuple[int, int, int]],
+    job: int,
+) -> Optional[int]:
+    """
+    Giờ sớm nhất để thêm job vào cuối lộ trình route [(start, end, location)]
+    của employee trong ngày (đi từ job trước / từ nhà, tránh giờ bận);
+    None nếu không còn vừa trong ngày
+    """
+    employee, day = slot
+    location = problem.jobs[job].location
+    duration = problem.jobs[job].duration
+    if route:
+        _, last_end, last_location = route[-1]
+        start = last_end + problem.travel(last_location, location)
+    else:
+        start = problem.day_start + problem.travel_from_home(employee, location)
+    for block_start, block_end in sorted(problem.blocked.get(slot, [])):
+        if start < block_end and start + duration > block_start:
+            start = block_end
+    if start + duration > problem.day_end:
+        return None
+    return start
+
+
+def greedy_schedule(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    fixed: Optional[Assignment] = None,
+) -> Assignment:
+    """
+    Lịch tham lam: job ít lựa chọn trước (rồi job dài trước), mỗi job nối vào
+    cuối lộ trình của ngày / employee cho giờ kết thúc sớm nhất.
+    fixed: các job đã xếp, giữ nguyên, job mới chỉ nối sau chúng.
+    Dùng làm gợi ý cho CP-SAT và làm lời giải dự phòng.
+    """
+    assignment: Assignment = dict(fixed or {})
+    options: Dict[int, List[Slot]] = {}
+    for slot, jobs in candidates.items():
+        for job in jobs:
+            if job not in assignment:
+                options.setdefault(job, []).append(slot)
+
+    routes: Dict[Slot, List[Tuple[int, int, int]]] = {}
+    for job, (employee, day, start) in sorted(assignment.items(), key=lambda item: item[1]):
+        routes.setdefault((employee, day), []).append(
+            (start, start + problem.jobs[job].duration, problem.jobs[job].location))
+    for job in sorted(options, key=lambda j: (len(options[j]), -problem.jobs[j].duration)):
+        best = None
+        for slot in options[job]:
+            start = append_start(problem, slot, routes.get(slot, []), job)
+            if start is None:
+                continue
+            # ưu tiên: ngày sớm nhất (ngày mong muốn), rồi kết thúc sớm
+            key = (slot[1], start + problem.jobs[job].duration, slot[0])
+            if best is None or key < best[0]:
+                best = (key, slot, start)
+        if best is None:
+            continue
+        _, slot, start = best
+        routes.setdefault(slot, []).append(
+            (start, start + problem.jobs[job].duration, problem.jobs[job].location))
+        assignment[job] = (slot[0], slot[1], start)
+    return assignment
@@ -0,0 +1,65 @@
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.scheduling_optimization_ortools.problem import EmployeeProblem, parse_payload, problem_from_snapshot
+from app.scheduling_optimization_ortools.snapshot import CompanySnapshot
+from app.scheduling_optimization_ortools.solver import solve_employee_problem
+
+
+def solve_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tham số CP-SAT từ "options" của request, thiếu thì lấy theo settings
+    """
+    return {
+        "time_limit_sec": (
+            options.get("time_limit_sec")
+            or settings.employee_time_limit_sec
+            or settings.solver_time_limit_sec
+        ),
+        "num_workers": (
+            options.get("num_workers")
+            or settings.employee_num_workers
+            or settings.solver_num_workers
+        ),
+        "random_seed": options.get("random_seed"),
+        "max_candidates_per_job": (
+            options.get("max_candidates_per_job") or settings.employee_max_candidates_per_job),
+    }
+
+
+def _solve(
+    problem: EmployeeProblem,
+    options: Dict[str, Any],
+    on_progress: Optional[Callable[[Dict[str, Any]], None]],
+) -> Dict[str, Any]:
+    return solve_employee_problem(problem, **solve_options(options), on_progress=on_progress)
+
+
+def Employee_Scheduling_Problems(
+    payload: Dict[str, Any],
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Xếp lịch nhân viên cho payload của getJobGeneral (employees, locations,
+    jobs, distances, blocked_times). "options" (tùy chọn) trong payload:
+    time_limit_sec, num_workers, random_seed, max_candidates_per_job,
+    day_start_hour, day_end_hour.
+
+    Trả về {"data": [{"employee_id", "name", "jobs": [{"job_id", "location_id",
+    "start": "Monday-8", "end": "Monday-12", ...}]}], "unassigned", "status",
+    "statistics"}
+    """
+    return _solve(parse_payload(payload), payload.get("options") or {}, on_progress)
+
+
+def Employee_Scheduling_Snapshot(
+    snapshot: CompanySnapshot,
+    options: Optional[Dict[str, Any]] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Như Employee_Scheduling_Problems nhưng đọc thẳng snapshot của company
+    (load_company_snapshot), không dựng payload JSON
+    """
+    options = options or {}
+    return _solve(problem_from_snapshot(snapshot, options), options, on_progress)
@@ -0,0 +1,348 @@
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.scheduling_optimization_ortools.snapshot import CompanySnapshot
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@dataclass
+class EmployeeJob:
+    job_id: str
+    job_type: str
+    location: int
+    duration: int
+    # các weekday được xếp: từ expected_date tới shipment_date (trong tuần)
+    days: List[int]
+
+
+@dataclass
+class EmployeeProblem:
+    """
+    Payload của getJobGeneral đã chuẩn hóa về chỉ số nguyên. Thời gian tính
+    bằng giờ nguyên trong ngày (start/end trả về dạng "Monday-8"); travel time
+    làm tròn lên giờ nguyên nên lịch theo giờ nguyên không bị sai.
+    """
+    employee_ids: List[str]
+    employee_names: List[Optional[str]]
+    employee_skills: List[set]
+    location_ids: List[str]
+    jobs: List[EmployeeJob]
+    # ma trận giờ nguyên: (employee, location) giờ đi từ nhà tới location,
+    # (location, location) giờ đi giữa hai location
+    home_travel: np.ndarray
+    site_travel: np.ndarray
+    # (employee, weekday) → [(start, end)] giờ bận
+    blocked: Dict[Tuple[int, int], List[Tuple[int, int]]] = field(default_factory=dict)
+    day_start: int = 8
+    day_end: int = 17
+
+    def travel_from_home(self, employee: int, location: int) -> int:
+        return int(self.home_travel[employee, location])
+
+    def travel(self, location_from: int, location_to: int) -> int:
+        return int(self.site_travel[location_from, location_to])
+
+    def longest_free(self, employee: int, day: int) -> int:
+        # khoảng trống dài nhất trong ngày giữa các giờ bận (đã gộp, đã sắp xếp)
+        longest, free_from = 0, self.day_start
+        for start, end in self.blocked.get((employee, day), []):
+            longest = max(longest, start - free_from)
+            free_from = max(free_from, end)
+        return max(longest, self.day_end - free_from)
+
+    def candidates(self) -> Dict[Tuple[int, int], List[int]]:
+        """
+        (employee, weekday) → các job employee đó làm được trong ngày: đúng kỹ
+        năng, ngày nằm trong khoảng của job và job vừa khung giờ làm việc
+        (tính cả đường đi từ nhà) và vừa một khoảng trống giữa các giờ bận
+        """
+        window = self.day_end - self.day_start
+        by_skill: Dict[str, List[int]] = {}
+        for employee, skills in enumerate(self.employee_skills):
+            for skill in skills:
+                by_skill.setdefault(skill, []).append(employee)
+
+        candidates: Dict[Tuple[int, int], List[int]] = {}
+        for index, job in enumerate(self.jobs):
+            for employee in by_skill.get(job.job_type, []):
+                if job.duration + self.travel_from_home(employee, job.location) > window:
+                    continue
+                for day in job.days:
+                    if (employee, day) in self.blocked and job.duration > self.longest_free(employee, day):
+                        continue
+                    candidates.setdefault((employee, day), []).append(index)
+        return candidates
+
+    def limit_candidates(
+        self,
+        candidates: Dict[Tuple[int, int], List[int]],
+        max_per_job: int,
+        keep: Dict[int, Tuple[int, int]],
+    ) -> Dict[Tuple[int, int], List[int]]:
+        """
+        Giữ tối đa max_per_job lựa chọn (employee, ngày) cho mỗi job để model
+        không phình theo số employee: đúng ngày mong muốn trước, rồi
+        (employee, ngày) chưa nhận quá một ngày công lựa chọn (để các circuit
+        không dồn vào vài employee), rồi gần nhà, rồi employee ít kỹ năng (để
+        dành người đa năng cho job khác).
+        keep: job → lựa chọn luôn giữ lại (lời giải gợi ý)
+        """
+        options: Dict[int, List[Tuple[int, int]]] = {}
+        for slot, jobs in candidates.items():
+            for job in jobs:
+                options.setdefault(job, []).append(slot)
+
+        window = max(1, self.day_end - self.day_start)
+        load: Dict[Tuple[int, int], int] = {}
+        limited: Dict[Tuple[int, int], List[int]] = {}
+        # job ít lựa chọn trước: nó không có chỗ khác để đi
+        for job in sorted(options, key=lambda j: (len(options[j]), j)):
+            slots = options[job]
+            if len(slots) > max_per_job:
+                location = self.jobs[job].location
+                slots = sorted(slots, key=lambda slot: (
+                    slot[1],
+                    load.get(slot, 0) // window,
+                    self.travel_from_home(slot[0], location),
+                    len(self.employee_skills[slot[0]]),
+                    slot[0],
+                ))[:max_per_job]
+                if job in keep and keep[job] not in slots:
+                    slots[-1] = keep[job]
+            for slot in slots:
+                load[slot] = load.get(slot, 0) + self.jobs[job].duration
+                limited.setdefault(slot, []).append(job)
+        return limited
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # gộp các khoảng giờ bận chồng nhau (no_overlap không cho phép chúng giao nhau)
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _weekday(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value.weekday()
+    return date.fromisoformat(str(value)[:10]).weekday()
+
+
+def _job_days(job: Dict[str, Any]) -> List[int]:
+    expected = job.get("expected_date")
+    shipment = job.get("shipment_date") or expected
+    if expected is None:
+        return list(range(len(WEEKDAYS)))
+    first = _weekday(expected)
+    if isinstance(expected, str):
+        expected = date.fromisoformat(expected[:10])
+    if isinstance(shipment, str):
+        shipment = date.fromisoformat(shipment[:10])
+    extra = max(0, min((shipment - expected).days, len(WEEKDAYS) - 1 - first))
+    return list(range(first, first + extra + 1))
+
+
+def _hours(value: Any) -> int:
+    return int(math.ceil(round(float(value or 0), 6)))
+
+
+def _hours_matrix(matrix: np.ndarray, same_location: bool = False) -> np.ndarray:
+    # giờ → giờ nguyên (làm tròn lên) như _hours; same_location: ma trận
+    # (location, location), đường chéo là 0
+    hours = np.ceil(np.round(np.nan_to_num(matrix), 6)).astype(np.int64)
+    if same_location:
+        np.fill_diagonal(hours, 0)
+    return hours
+
+
+def _padded(matrix: Any, shape: Tuple[int, int]) -> np.ndarray:
+    # ma trận khai báo đặt vào góc trên trái; location chỉ có trong jobs là 0
+    padded = np.zeros(shape)
+    matrix = np.asarray(matrix if matrix is not None else [], dtype=float)
+    if matrix.size:
+        rows, columns = min(matrix.shape[0], shape[0]), min(matrix.shape[1], shape[1])
+        padded[:rows, :columns] = matrix[:rows, :columns]
+    return padded
+
+
+def _day_window(options: Dict[str, Any]) -> Tuple[int, int]:
+    return (
+        int(options.get("day_start_hour", settings.employee_day_start_hour)),
+        int(options.get("day_end_hour", settings.employee_day_end_hour)),
+    )
+
+
+def _blocked_slots(
+    blocks: Iterable[Tuple[Optional[int], Optional[int], Any, Any]],
+    day_start: int,
+    day_end: int,
+) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+    # blocks: (employee, weekday, giờ bắt đầu, số giờ) → giờ bận đã cắt theo khung ngày và gộp
+    blocked: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for employee, day, start, duration in blocks:
+        if employee is None or day is None:
+            continue
+        # không có giờ bắt đầu: bận cả ngày
+        if start is None:
+            start, end = day_start, day_end
+        else:
+            start = int(start)
+            end = start + _hours(duration)
+        start, end = max(start, day_start), min(end, day_end)
+        if start < end:
+            blocked.setdefault((employee, day), []).append((start, end))
+    return {slot: merge_intervals(intervals) for slot, intervals in blocked.items()}
+
+
+def parse_payload(payload: Dict[str, Any]) -> EmployeeProblem:
+    """
+    payload: {"employees", "locations", "jobs", "distances", "blocked_times"}
+    như getJobGeneral trả về, "options" (tùy chọn) ghi đè day_start_hour /
+    day_end_hour.
+    Dạng gọn (getJobGeneral?compact=true) thay "distances" bằng "travel":
+    {"employees": [[giờ]], "locations": [[giờ]]} theo thứ tự của
+    "employees" / "locations"
+    """
+    options = payload.get("options") or {}
+    employees = payload.get("employees") or []
+    employee_index = {employee["employee_id"]: i for i, employee in enumerate(employees)}
+
+    location_ids = list(dict.fromkeys(
+        [location["location_id"] for location in payload.get("locations") or []]
+        + [job["location_id"] for job in payload.get("jobs") or []]
+    ))
+    location_index = {location_id: i for i, location_id in enumerate(location_ids)}
+
+    jobs = [
+        EmployeeJob(
+            job_id=job["job_id"],
+            job_type=job.get("job_type"),
+            location=location_index[job["location_id"]],
+            duration=_hours(job.get("job_duration")),
+            days=_job_days(job),
+        )
+        for job in payload.get("jobs") or []
+    ]
+
+    home_shape = (len(employees), len(location_ids))
+    site_shape = (len(location_ids), len(location_ids))
+    travel = payload.get("travel")
+    if travel is not None:
+        home_travel = _padded(travel.get("employees"), home_shape)
+        site_travel = _padded(travel.get("locations"), site_shape)
+    else:
+        home_travel, site_travel = np.zeros(home_shape), np.zeros(site_shape)
+        home_rows: List[Tuple[int, int, float]] = []
+        site_rows: List[Tuple[int, int, float]] = []
+        for distance in payload.get("distances") or []:
+            measure = distance["measure_point"]
+            reference = location_index.get(distance["reference_point"])
+            if reference is None:
+                continue
+            hours = float(distance.get("hours") or 0)
+            if measure in employee_index:
+                home_rows.append((employee_index[measure], reference, hours))
+            elif measure in location_index:
+                site_rows.append((location_index[measure], reference, hours))
+        if home_rows:
+            employee, location, hours = np.asarray(home_rows).T
+            home_travel[employee.astype(np.int64), location.astype(np.int64)] = hours
+        if site_rows:
+            source, target, hours = np.asarray(site_rows).T
+            source, target = source.astype(np.int64), target.astype(np.int64)
+            site_travel[source, target] = hours
+            site_travel[target, source] = hours
+
+    day_start, day_end = _day_window(options)
+    blocked = _blocked_slots(
+        (
+            (employee_index.get(block.get("employee_id")), _weekday(block.get("requested_date")),
+             block.get("start"), block.get("job_duration"))
+            for block in payload.get("blocked_times") or []
+        ),
+        day_start,
+        day_end,
+    )
+
+    return EmployeeProblem(
+        employee_ids=[employee["employee_id"] for employee in employees],
+        employee_names=[employee.get("name") for employee in employees],
+        employee_skills=[set(employee.get("skills") or []) for employee in employees],
+        location_ids=location_ids,
+        jobs=jobs,
+        home_travel=_hours_matrix(home_travel),
+        site_travel=_hours_matrix(site_travel, same_location=True),
+        blocked=blocked,
+        day_start=day_start,
+        day_end=day_end,
+    )
+
+
+def problem_from_snapshot(
+    snapshot: CompanySnapshot,
+    options: Optional[Dict[str, Any]] = None,
+) -> EmployeeProblem:
+    """
+    EmployeeProblem dựng thẳng từ snapshot của company (không qua payload
+    JSON); id trả về cùng dạng với getJobGeneral (em_1, lo_fa_2, jo_3).
+    Ma trận giờ di chuyển của snapshot dùng thẳng, location chỉ có trong jobs
+    (factory không thuộc company) có giờ di chuyển 0.
+    """
+    options = options or {}
+    employee_index = {employee.id: i for i, employee in enumerate(snapshot.employees)}
+    factories = list(dict.fromkeys(
+        list(snapshot.factory_ids) + [job.factory_id for job in snapshot.jobs]))
+    factory_index = {factory_id: i for i, factory_id in enumerate(factories)}
+
+    jobs = [
+        EmployeeJob(
+            job_id=f"jo_{job.id}",
+            job_type=job.skill,
+            location=factory_index[job.factory_id],
+            duration=_hours(job.duration),
+            days=(
+                [job.expected_weekday] if job.expected_weekday is not None
+                else list(range(len(WEEKDAYS)))
+            ),
+        )
+        for job in snapshot.jobs
+    ]
+
+    home_travel = _padded(snapshot.employee_travel, (len(snapshot.employees), len(factories)))
+    site_travel = _padded(snapshot.factory_travel, (len(factories), len(factories)))
+
+    day_start, day_end = _day_window(options)
+    blocked = _blocked_slots(
+        (
+            (employee_index.get(block.employee_id), block.weekday, block.start_hour, block.duration)
+            for block in snapshot.blocks
+        ),
+        day_start,
+        day_end,
+    )
+
+    return EmployeeProblem(
+        employee_ids=[f"em_{employee.id}" for employee in snapshot.employees],
+        employee_names=[employee.name for employee in snapshot.employees],
+        employee_skills=[set(employee.skills) for employee in snapshot.employees],
+        location_ids=[f"lo_fa_{factory_id}" for factory_id in factories],
+        jobs=jobs,
+        home_travel=_hours_matrix(home_travel),
+        site_travel=_hours_matrix(site_travel, same_location=True),
+        blocked=blocked,
+        day_start=day_start,
+        day_end=day_end,
+    )
@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# travel time mặc định khi chưa khai báo khoảng cách (giờ)
+DEFAULT_EMPLOYEE_TRAVEL_HOURS = 1
+DEFAULT_FACTORY_TRAVEL_HOURS = 0
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotEmployee:
+    id: int
+    name: Optional[str]
+    skills: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotJob:
+    id: int
+    factory_id: Optional[int]
+    skill: Optional[str]
+    duration: Optional[int]
+    expected_weekday: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotBlock:
+    id: int
+    employee_id: int
+    weekday: int
+    start_hour: Optional[int]
+    duration: Optional[int]
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompanySnapshot:
+    """
+    Dữ liệu xếp lịch nhân viên của một company, đọc một lần từ DB
+    (load_company_snapshot). Bất biến và pickle được: gửi thẳng sang worker
+    process của pool.
+    """
+    company_id: int
+    employees: Tuple[SnapshotEmployee, ...]
+    factory_ids: Tuple[int, ...]
+    jobs: Tuple[SnapshotJob, ...]
+    blocks: Tuple[SnapshotBlock, ...]
+    # giờ di chuyển theo thứ tự employees / factory_ids (chỉ đọc), ô chưa
+    # khai báo đã điền giá trị mặc định
+    employee_travel: np.ndarray  # (employee, factory)
+    factory_travel: np.ndarray  # (factory, factory)
+
+    @property
+    def sizes(self) -> Dict[str, int]:
+        return {
+            "employees": len(self.employees),
+            "factories": len(self.factory_ids),
+            "jobs": len(self.jobs),
+            "blocked_times": len(self.blocks),
+        }
+
+
+def index_of(ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # vị trí của values trong ids (tăng dần), -1 nếu không có
+    if not len(ids):
+        return np.full(len(values), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    return np.where(ids[positions] == values, positions, -1)
+
+
+def _declared(
+    rows: Sequence[Tuple[int, int, float]],
+    row_ids: np.ndarray,
+    column_ids: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (id, id, giờ) → chỉ số hàng / cột / giờ của các dòng thuộc hai bảng id
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    table = np.asarray(rows, dtype=float)
+    rows_at = index_of(row_ids, table[:, 0].astype(np.int64))
+    columns_at = index_of(column_ids, table[:, 1].astype(np.int64))
+    keep = (rows_at >= 0) & (columns_at >= 0)
+    return rows_at[keep], columns_at[keep], table[keep, 2]
+
+
+def employee_travel_matrix(
+    employee_ids: Sequence[int],
+    factory_ids: Sequence[int],
+    rows: Sequence[Tuple[int, int, float]],
+) -> np.ndarray:
+    """
+    Ma trận (employee, factory) giờ đi từ nhà, ids tăng dần; cặp chưa khai
+    báo là DEFAULT_EMPLOYEE_TRAVEL_HOURS
+    """
+    employee_ids = np.asarray(employee_ids, dtype=np.int64)
+    factory_ids = np.asarray(factory_ids, dtype=np.int64)
+    matrix = np.full((len(employee_ids), len(factory_ids)), DEFAULT_EMPLOYEE_TRAVEL_HOURS, dtype=float)
+    employees, factories, hours = _declared(rows, employee_ids, factory_ids)
+    matrix[employees, factories] = hours
+    matrix.flags.writeable = False
+    return matrix
+
+
+def factory_travel_matrix(
+    factory_ids: Sequence[int],
+    rows: Sequence[Tuple[int, int, float]],
+) -> np.ndarray:
+    """
+    Ma trận (factory, factory) giờ di chuyển, ids tăng dần; khoảng cách chỉ
+    khai báo một chiều dùng cho cả hai chiều, cặp chưa khai báo là
+    DEFAULT_FACTORY_TRAVEL_HOURS
+    """
+    factory_ids = np.asarray(factory_ids, dtype=np.int64)
+    matrix = np.full((len(factory_ids), len(factory_ids)), DEFAULT_FACTORY_TRAVEL_HOURS, dtype=float)
+    sources, targets, hours = _declared(rows, factory_ids, factory_ids)
+    # chiều ngược trước để chiều đã khai báo được ưu tiên
+    matrix[targets, sources] = hours
+    matrix[sources, targets] = hours
+    np.fill_diagonal(matrix, 0)
+    matrix.flags.writeable = False
+    return matrix
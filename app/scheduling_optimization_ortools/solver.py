@@ -0,0 +1,342 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from ortools.sat.python import cp_model
+
+from app.scheduling_optimization_ortools.dispatch import Assignment, Slot, greedy_schedule
+from app.scheduling_optimization_ortools.problem import WEEKDAYS, EmployeeProblem
+from app.services.solver_pool import bind_solver
+from app.solver_progress import ProgressCallback, ProgressFn
+
+
+class EmployeeModel:
+    """
+    Model CP-SAT giao job cho employee và xếp thứ tự trong từng ngày.
+
+    Mỗi cặp (employee, ngày) có một literal cho từng job làm được (đã lọc theo
+    kỹ năng / ngày / khung giờ), mỗi job nhiều nhất một literal được chọn; giờ
+    bắt đầu của job dùng chung cho mọi lựa chọn. Trong một (employee, ngày):
+    no_overlap giữa các job được chọn và giờ bận; nếu các job ở nhiều location
+    thì thêm circuit (nhà → job → ... → nhà) để tính thời gian di chuyển, chỉ
+    một location thì chỉ cần đường đi từ nhà tới đó.
+    Mục tiêu: xếp được nhiều giờ việc nhất, rồi ít giờ di chuyển, rồi đúng
+    ngày mong muốn.
+    fixed: các job đã xếp được giữ nguyên (employee, ngày, giờ bắt đầu), chỉ
+    có mặt trong lựa chọn (employee, ngày) của chính nó.
+    """
+
+    def __init__(
+        self,
+        problem: EmployeeProblem,
+        candidates: Dict[Slot, List[int]],
+        fixed: Optional[Assignment] = None,
+    ):
+        self.problem = problem
+        self.model = model = cp_model.CpModel()
+        jobs = problem.jobs
+        day_start, day_end = problem.day_start, problem.day_end
+
+        job_ids = sorted({job for slot_jobs in candidates.values() for job in slot_jobs})
+        self.start = {
+            job: model.new_int_var(day_start, day_end - jobs[job].duration, f"start_{job}")
+            for job in job_ids
+        }
+        # (job, employee, ngày) → literal
+        self.chosen: Dict[Tuple[int, int, int], cp_model.IntVar] = {}
+        # (employee, ngày) → literal "có làm việc" / các cung của circuit
+        # (job trước, job sau), None là nhà; để đặt hint đầy đủ
+        self.works: Dict[Slot, cp_model.IntVar] = {}
+        self.arcs: Dict[Slot, Dict[Tuple[Optional[int], Optional[int]], cp_model.IntVar]] = {}
+        choices: Dict[int, List[cp_model.IntVar]] = {}
+        travel_terms = []
+        late_terms = []
+        self.circuits = 0
+
+        for slot, slot_jobs in candidates.items():
+            employee, day = slot
+            literals = {}
+            for job in slot_jobs:
+                literal = model.new_bool_var(f"x_{job}_{employee}_{day}")
+                literals[job] = literal
+                self.chosen[job, employee, day] = literal
+                choices.setdefault(job, []).append(literal)
+                late = day - jobs[job].days[0]
+                if late:
+                    late_terms.append(late * literal)
+
+            intervals = [
+                model.new_optional_fixed_size_interval_var(
+                    self.start[job], jobs[job].duration, literal, f"i_{job}_{employee}_{day}")
+                for job, literal in literals.items()
+            ]
+            intervals += [
+                model.new_fixed_size_interval_var(block_start, block_end - block_start, "")
+                for block_start, block_end in problem.blocked.get(slot, [])
+            ]
+            if len(intervals) > 1:
+                model.add_no_overlap(intervals)
+
+            locations = {jobs[job].location for job in slot_jobs}
+            if len(locations) == 1:
+                location = locations.pop()
+                home = problem.travel_from_home(employee, location)
+                for job, literal in literals.items():
+                    if home:
+                        model.add(self.start[job] >= day_start + home).only_enforce_if(literal)
+                if home:
+                    works = model.new_bool_var(f"works_{employee}_{day}")
+                    model.add_max_equality(works, list(literals.values()))
+                    self.works[slot] = works
+                    travel_terms.append(home * works)
+                continue
+
+            # circuit: node 0 là nhà, node i + 1 là job thứ i; job không được chọn
+            # thì tự vòng, employee nghỉ cả ngày thì nhà tự vòng
+            self.circuits += 1
+            idle = model.new_bool_var(f"idle_{employee}_{day}")
+            arcs = [(0, 0, idle)]
+            slot_arcs = self.arcs[slot] = {(None, None): idle}
+            for i, (job, literal) in enumerate(literals.items()):
+                model.add_implication(literal, idle.Not())
+                arcs.append((i + 1, i + 1, literal.Not()))
+
+                home = problem.travel_from_home(employee, jobs[job].location)
+                first = slot_arcs[None, job] = model.new_bool_var("")
+                arcs.append((0, i + 1, first))
+                if home:
+                    model.add(self.start[job] >= day_start + home).only_enforce_if(first)
+                    travel_terms.append(home * first)
+                slot_arcs[job, None] = model.new_bool_var("")
+                arcs.append((i + 1, 0, slot_arcs[job, None]))
+
+                for k, (other, _) in enumerate(literals.items()):
+                    if other == job:
+                        continue
+                    travel = problem.travel(jobs[job].location, jobs[other].location)
+                    # bỏ cung không thể xảy ra: hai job không vừa liên tiếp trong ngày
+                    if day_start + jobs[job].duration + travel + jobs[other].duration > day_end:
+                        continue
+                    arc = slot_arcs[job, other] = model.new_bool_var("")
+                    arcs.append((i + 1, k + 1, arc))
+                    model.add(
+                        self.start[other] >= self.start[job] + jobs[job].duration + travel
+                    ).only_enforce_if(arc)
+                    if travel:
+                        travel_terms.append(travel * arc)
+            model.add_circuit(arcs)
+
+        # thiếu một giờ việc luôn tệ hơn mọi chi phí di chuyển / trễ ngày
+        weight = self.weight = (
+            1 + len(candidates) * (day_end - day_start) + (len(WEEKDAYS) - 1) * len(self.chosen))
+        scheduled = []
+        for job, literals in choices.items():
+            model.add_at_most_one(literals)
+            scheduled.append(max(jobs[job].duration, 1) * sum(literals))
+        model.minimize(-weight * sum(scheduled) + sum(travel_terms) + sum(late_terms))
+
+        for job, (employee, day, start) in (fixed or {}).items():
+            model.add(self.chosen[job, employee, day] == 1)
+            model.add(self.start[job] == start)
+
+    def add_hints(self, assignment: Assignment):
+        for (job, employee, day), literal in self.chosen.items():
+            hinted = assignment.get(job)
+            self.model.add_hint(literal, hinted is not None and hinted[:2] == (employee, day))
+        for job, (_, _, start) in assignment.items():
+            self.model.add_hint(self.start[job], start)
+
+        routes: Dict[Slot, List[Tuple[int, int]]] = {}
+        for job, (employee, day, start) in assignment.items():
+            routes.setdefault((employee, day), []).append((start, job))
+        for slot, works in self.works.items():
+            self.model.add_hint(works, slot in routes)
+        for slot, slot_arcs in self.arcs.items():
+            route = [job for _, job in sorted(routes.get(slot, []))]
+            used = set(zip([None] + route, route + [None])) if route else {(None, None)}
+            for key, arc in slot_arcs.items():
+                self.model.add_hint(arc, key in used)
+
+    def objective(self, assignment: Assignment) -> int:
+        """
+        Giá trị mục tiêu của model cho một lịch bất kỳ (vd. lịch tham lam)
+        """
+        problem = self.problem
+        jobs = problem.jobs
+        routes: Dict[Slot, List[Tuple[int, int]]] = {}
+        value = 0
+        for job, (employee, day, start) in assignment.items():
+            routes.setdefault((employee, day), []).append((start, job))
+            value += day - jobs[job].days[0] - self.weight * max(jobs[job].duration, 1)
+        for (employee, _), route in routes.items():
+            locations = [jobs[job].location for _, job in sorted(route)]
+            value += problem.travel_from_home(employee, locations[0])
+            value += sum(problem.travel(a, b) for a, b in zip(locations, locations[1:]))
+        return value
+
+    def assignment(self, solver: cp_model.CpSolver) -> Assignment:
+        return {
+            job: (employee, day, solver.value(self.start[job]))
+            for (job, employee, day), literal in self.chosen.items()
+            if solver.boolean_value(literal)
+        }
+
+
+def format_schedule(problem: EmployeeProblem, assignment: Assignment) -> List[Dict[str, Any]]:
+    """
+    {"employee_id", "name", "jobs": [...]} cho mọi employee, job theo thứ tự
+    thời gian; start / end dạng "Monday-8" (parse_start_safe)
+    """
+    routes: Dict[int, List[Tuple[int, int, int]]] = {}
+    for job, (employee, day, start) in assignment.items():
+        routes.setdefault(employee, []).append((day, start, job))
+
+    data = []
+    for employee, employee_id in enumerate(problem.employee_ids):
+        items = []
+        previous = None  # (ngày, location) của job trước
+        for day, start, job in sorted(routes.get(employee, [])):
+            location = problem.jobs[job].location
+            if previous is not None and previous[0] == day:
+                travel = problem.travel(previous[1], location)
+            else:
+                travel = problem.travel_from_home(employee, location)
+            previous = (day, location)
+            items.append({
+                "job_id": problem.jobs[job].job_id,
+                "job_type": problem.jobs[job].job_type,
+                "location_id": problem.location_ids[location],
+                "start": f"{WEEKDAYS[day]}-{start}",
+                "end": f"{WEEKDAYS[day]}-{start + problem.jobs[job].duration}",
+                "duration": problem.jobs[job].duration,
+                "travel_hours": travel,
+            })
+        data.append({
+            "employee_id": employee_id,
+            "name": problem.employee_names[employee],
+            "jobs": items,
+        })
+    return data
+
+
+def schedule_summary(problem: EmployeeProblem, assignment: Assignment) -> Dict[str, int]:
+    return {
+        "scheduled_jobs": len(assignment),
+        "scheduled_hours": sum(problem.jobs[job].duration for job in assignment),
+    }
+
+
+def solve_assignment(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    time_limit_sec: Optional[float] = None,
+    num_workers: Optional[int] = None,
+    random_seed: Optional[int] = None,
+    max_candidates_per_job: Optional[int] = None,
+    fixed: Optional[Assignment] = None,
+    hint: Optional[Assignment] = None,
+    on_progress: Optional[ProgressFn] = None,
+) -> Tuple[Assignment, Dict[str, Any]]:
+    """
+    Giải bằng CP-SAT với lịch tham lam (nối sau các job fixed / hint) làm
+    gợi ý; trả về lịch nào xếp được nhiều job hơn rồi có mục tiêu thấp hơn
+    (CP-SAT không tìm được lời giải trong time limit thì là lịch tham lam),
+    statistics["schedule"] cho biết lịch nào được dùng.
+    max_candidates_per_job: số lựa chọn (employee, ngày) tối đa của mỗi job
+    trong model (lịch tham lam được tính trên mọi lựa chọn)
+    hint: lịch dựng sẵn (hợp lệ) để lịch tham lam nối tiếp, không bị giữ cố
+    định như fixed
+    """
+    hint = greedy_schedule(problem, candidates, {**(hint or {}), **(fixed or {})})
+    if max_candidates_per_job:
+        candidates = problem.limit_candidates(candidates, max_candidates_per_job, {
+            job: (employee, day) for job, (employee, day, _) in hint.items()
+        })
+
+    employee_model = EmployeeModel(problem, candidates, fixed)
+    employee_model.add_hints(hint)
+
+    solver = cp_model.CpSolver()
+    if time_limit_sec is not None:
+        solver.parameters.max_time_in_seconds = time_limit_sec
+    if num_workers is not None:
+        solver.parameters.num_workers = num_workers
+    if random_seed is not None:
+        solver.parameters.random_seed = random_seed
+
+    bind_solver(solver)
+    status = solver.solve(
+        employee_model.model, ProgressCallback(on_progress) if on_progress else None)
+
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    assignment, objective = hint, employee_model.objective(hint)
+    if found:
+        # lời giải CP-SAT khi hết giờ có thể tệ hơn chính gợi ý tham lam
+        solved = employee_model.assignment(solver)
+        if (-len(solved), solver.objective_value) <= (-len(hint), objective):
+            assignment, objective = solved, solver.objective_value
+    use_solver = assignment is not hint
+    return assignment, {
+        "status": solver.status_name(status) if use_solver else "GREEDY",
+        "solver_status": solver.status_name(status),
+        "schedule": "cpsat" if use_solver else "greedy",
+        "wall_time_sec": solver.wall_time,
+        "conflicts": solver.num_conflicts,
+        "branches": solver.num_branches,
+        "objective": objective,
+        "best_bound": solver.best_objective_bound if found else None,
+        "candidates": len(employee_model.chosen),
+        "circuits": employee_model.circuits,
+        **schedule_summary(problem, assignment),
+        "greedy": schedule_summary(problem, hint),
+    }
+
+
+def employee_result(
+    problem: EmployeeProblem,
+    candidates: Dict[Slot, List[int]],
+    assignment: Assignment,
+    status: str,
+    statistics: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    {"status", "data", "unassigned", "statistics"} trả về cho client
+    """
+    candidate_jobs = {job for slot_jobs in candidates.values() for job in slot_jobs}
+    unassigned = [
+        {
+            "job_id": job.job_id,
+            "reason": "not_scheduled" if index in candidate_jobs else "no_eligible_employee",
+        }
+        for index, job in enumerate(problem.jobs)
+        if index not in assignment
+    ]
+    return {
+        "status": status,
+        "data": format_schedule(problem, assignment),
+        "unassigned": unassigned,
+        "statistics": statistics,
+    }
+
+
+def solve_employee_problem(
+    problem: EmployeeProblem,
+    time_limit_sec: Optional[float] = None,
+    num_workers: Optional[int] = None,
+    random_seed: Optional[int] = None,
+    max_candidates_per_job: Optional[int] = None,
+    on_progress: Optional[ProgressFn] = None,
+) -> Dict[str, Any]:
+    """
+    Giải cả bài trong một model CP-SAT (xem solve_assignment)
+    """
+    candidates = problem.candidates()
+    assignment, statistics = solve_assignment(
+        problem,
+        candidates,
+        time_limit_sec=time_limit_sec,
+        num_workers=num_workers,
+        random_seed=random_seed,
+        max_candidates_per_job=max_candidates_per_job,
+        on_progress=on_progress,
+    )
+    return employee_result(
+        problem, candidates, assignment, statistics.pop("status"), statistics)
@@ -51,6 +51,7 @@ class JobOpTimeUpdate(BaseModel):
     task_index: int
     start: float
     end: float
+    machineId: Optional[int] = None  # flexible: máy mới của op
 
 
 class BatchJobOpTimeUpdate(BaseModel):
@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, Field
+
+
+# ----------------------------
+# Job-shop input schema
+# ----------------------------
+class JobData(BaseModel):
+    job_id: int
+    tasks: List[Tuple[str, int]]  # (machine_code, duration)
+    # flexible job shop: task index → các máy thay thế (machine_code, duration),
+    # solver chọn đúng một trong máy ở tasks và các máy này
+    alternatives: Optional[Dict[int, List[Tuple[str, int]]]] = None
+
+
+class TaskHint(BaseModel):
+    job_id: int
+    task_index: int
+    start: int
+
+
+class LnsOptions(BaseModel):
+    # chiến lược chọn vùng giải lại, dùng luân phiên
+    strategies: List[Literal["time_window", "machines", "jobs"]] = [
+        "time_window", "machines", "jobs"]
+    # số task tối đa được giải lại mỗi vòng (quyết định kích thước model con)
+    neighborhood_size: int = Field(500, ge=2)
+    # time limit của CP-SAT cho mỗi vòng; tổng thời gian theo time_limit_sec
+    iteration_time_limit_sec: float = Field(2.0, gt=0)
+    max_iterations: Optional[int] = Field(None, ge=1)
+    seed: int = 0
+
+
+class BuildOptions(BaseModel):
+    # đặt tên biến trong model CP-SAT (dễ đọc khi debug / export model),
+    # tắt để dựng model nhanh và nhẹ hơn với bài toán lớn
+    names: bool = True
+    # đo bộ nhớ lúc dựng model, trả về trong statistics.build (chậm hơn)
+    memory_report: bool = False
+    # ghi model + request vào solver_capture_dir để chạy lại offline
+    # (chỉ mode cp_sat, bỏ qua cache)
+    capture: bool = False
+
+
+class ScheduleRequest(BaseModel):
+    jobs: List[JobData]
+
+    # cp_sat: tối ưu bằng CP-SAT; dispatch: lịch Giffler–Thompson tức thì;
+    # lns: giải lại từng vùng nhỏ bằng CP-SAT, cho bài toán rất lớn;
+    # bound_only: chỉ tính cận dưới của makespan, không giải
+    mode: Literal["cp_sat", "dispatch", "lns", "bound_only"] = "cp_sat"
+    # luật ưu tiên cho mode dispatch
+    rule: Literal["SPT", "LPT", "MWKR", "FIFO"] = "MWKR"
+    lns: LnsOptions = Field(default_factory=LnsOptions)
+    build: BuildOptions = Field(default_factory=BuildOptions)
+
+    # nhóm máy giống hệt nhau (tên nhóm → machine code): task trên một máy của
+    # nhóm chạy được trên mọi máy trong nhóm. CP-SAT coi cả nhóm là một tài
+    # nguyên sức chứa N (cumulative) rồi mới gán máy cụ thể
+    machine_pools: Optional[Dict[str, List[str]]] = None
+
+    # lịch cũ dùng làm gợi ý (warm start), được sửa lại nếu không còn hợp lệ
+    hints: Optional[List[TaskHint]] = None
+
+    # reschedule giữa chu kỳ: task đã chạy/đang chạy giữ nguyên start,
+    # các task còn lại không được bắt đầu trước release_time
+    frozen: Optional[List[TaskHint]] = None
+    release_time: int = Field(0, ge=0)
+
+    # giới hạn thời gian cho CP-SAT (giây), None = dùng cấu hình mặc định
+    time_limit_sec: Optional[float] = Field(None, gt=0)
+    num_workers: Optional[int] = Field(None, ge=1)
+    # seed của CP-SAT (kết quả lặp lại được khi num_workers = 1)
+    random_seed: Optional[int] = None
+    # stream: gửi kèm lịch máy/task đầy đủ ở mỗi lời giải trung gian
+    stream_assignment: bool = False
+    # False: bỏ qua cache, luôn giải lại
+    use_cache: bool = True
+
+
+class BatchScheduleRequest(BaseModel):
+    requests: List[ScheduleRequest] = Field(..., min_length=1)
+    # tổng số luồng CP-SAT cho cả batch, chia đều cho các bài giải đồng thời;
+    # None = dùng cấu hình mặc định
+    cpu_budget: Optional[int] = Field(None, ge=1)
+
+
+# ----------------------------
+# Solve job (chạy nền)
+# ----------------------------
+class SolveJobStatus(BaseModel):
+    solve_id: str
+    kind: str
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+
+class SolveJobSubmitted(BaseModel):
+    solve_id: str
+    status: str
+
+
+class BatchItemStatus(SolveJobStatus):
+    index: int
+
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    status: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    total: int
+    completed: int
+    num_workers: int
+    items: List[BatchItemStatus]
+
+
+class BatchSubmitted(BaseModel):
+    batch_id: str
+    solve_ids: List[str]
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.schemas.schedula import BatchItemStatus, BatchScheduleRequest, BatchStatus
+from app.services.jobshop_service import submit_jobshop_request
+from app.services.solve_job_service import (
+    CANCELLED,
+    FAILED,
+    FINAL_STATUSES,
+    FINISHED,
+    RUNNING,
+    SolveJob,
+    cancel_solve,
+    split_cpu_budget,
+    to_status,
+)
+
+
+@dataclass
+class BatchJob:
+    id: str
+    jobs: List[SolveJob]
+    num_workers: int
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    cancel_requested: bool = False
+    # chỉ số các bài đã xong, theo thứ tự hoàn thành
+    completed: List[int] = field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return len(self.completed) == len(self.jobs)
+
+    @property
+    def status(self) -> str:
+        if not self.done:
+            return RUNNING
+        if self.cancel_requested:
+            return CANCELLED
+        if all(job.status == FAILED for job in self.jobs):
+            return FAILED
+        return FINISHED
+
+
+_batches: Dict[str, BatchJob] = {}
+_lock = threading.Lock()
+
+
+def batch_num_workers(batch: BatchScheduleRequest) -> int:
+    """
+    Số luồng CP-SAT cho mỗi bài: chia đều cpu_budget cho số bài chạy đồng thời
+    (tối đa bằng số worker process của pool)
+    """
+    return split_cpu_budget(len(batch.requests), batch.cpu_budget)
+
+
+def _prune_finished():
+    finished = [b for b in _batches.values() if b.done]
+    overflow = len(finished) - settings.solve_job_retention
+    if overflow <= 0:
+        return
+    finished.sort(key=lambda b: b.finished_at)
+    for batch in finished[:overflow]:
+        del _batches[batch.id]
+
+
+def submit_batch(batch: BatchScheduleRequest) -> BatchJob:
+    """
+    Đưa mọi bài của batch vào pool (mỗi bài là một solve job riêng, dùng cache
+    như /schedula/jobs); pool giải song song tối đa solver_pool_workers bài
+    """
+    num_workers = batch_num_workers(batch)
+    jobs = [
+        submit_jobshop_request(request.model_copy(update={
+            "num_workers": min(request.num_workers or num_workers, num_workers),
+        }))
+        for request in batch.requests
+    ]
+    batch_job = BatchJob(id=uuid.uuid4().hex, jobs=jobs, num_workers=num_workers)
+    completed_lock = threading.Lock()
+
+    def on_done(index: int):
+        with completed_lock:
+            batch_job.completed.append(index)
+            if batch_job.done:
+                batch_job.finished_at = datetime.utcnow()
+
+    with _lock:
+        _prune_finished()
+        _batches[batch_job.id] = batch_job
+
+    for index, job in enumerate(jobs):
+        if job.task is None:
+            on_done(index)  # trúng cache
+        else:
+            job.task.future.add_done_callback(lambda _, index=index: on_done(index))
+    return batch_job
+
+
+def cancel_batch(batch_job: BatchJob):
+    """
+    Dừng các bài chưa xong: bài đang giải trả về lời giải tốt nhất hiện có,
+    bài còn trong hàng đợi bị bỏ
+    """
+    batch_job.cancel_requested = True
+    for job in batch_job.jobs:
+        cancel_solve(job)
+
+
+def get_batch_or_404(batch_id: str) -> BatchJob:
+    batch_job = _batches.get(batch_id)
+    if not batch_job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch_job
+
+
+def item_result(batch_job: BatchJob, index: int) -> Dict[str, Any]:
+    job = batch_job.jobs[index]
+    return {
+        "index": index,
+        "solve_id": job.id,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def batch_results(batch_job: BatchJob) -> List[Dict[str, Any]]:
+    """
+    Kết quả đã có (kể cả khi batch bị cancel giữa chừng), theo thứ tự hoàn thành
+    """
+    return [item_result(batch_job, index) for index in list(batch_job.completed)]
+
+
+def batch_summary(batch_job: BatchJob) -> Dict[str, Any]:
+    counts = {FINISHED: 0, CANCELLED: 0, FAILED: 0}
+    for index in batch_job.completed:
+        status = batch_job.jobs[index].status
+        if status in FINAL_STATUSES:
+            counts[status] += 1
+    return {
+        "event": "done",
+        "batch_id": batch_job.id,
+        "status": batch_job.status,
+        "total": len(batch_job.jobs),
+        **counts,
+    }
+
+
+async def iter_batch_results(batch_job: BatchJob, poll_sec: float = 0.2) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Phát kết quả từng bài ngay khi bài đó xong, kết thúc bằng sự kiện "done"
+    """
+    cursor = 0
+    while True:
+        completed = batch_job.completed
+        while cursor < len(completed):
+            yield {"event": "result", **item_result(batch_job, completed[cursor])}
+            cursor += 1
+        if cursor == len(batch_job.jobs):
+            yield batch_summary(batch_job)
+            return
+        await asyncio.sleep(poll_sec)
+
+
+def to_batch_status(batch_job: BatchJob) -> BatchStatus:
+    return BatchStatus(
+        batch_id=batch_job.id,
+        status=batch_job.status,
+        created_at=batch_job.created_at,
+        finished_at=batch_job.finished_at,
+        total=len(batch_job.jobs),
+        completed=len(batch_job.completed),
+        num_workers=batch_job.num_workers,
+        items=[
+            BatchItemStatus(index=index, **to_status(job).model_dump())
+            for index, job in enumerate(batch_job.jobs)
+        ],
+    )
@@ -0,0 +1,183 @@
+import concurrent.futures
+import datetime
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Company, CycleStatus, Factory, FactoryCycle
+from app.services.cycle_schedule_service import (
+    build_cycle_request,
+    cycle_now_hours,
+    cycle_schedule_rows,
+    load_cycles_jobs,
+    load_machine_groups,
+    result_to_job_ops,
+    save_schedule_rows,
+)
+from app.services.jobshop_service import submit_jobshop_request
+from app.services.solve_job_service import SolveJob, cancel_solve, split_cpu_budget, split_time_budget
+from app.services.solver_telemetry_service import SolveContext
+
+
+# cycle được xếp lịch khi giải cả company
+SOLVABLE_STATUSES = (CycleStatus.draft, CycleStatus.processing)
+
+
+def load_company_cycles(db: Session, company_id: int) -> List[FactoryCycle]:
+    return (
+        db.query(FactoryCycle)
+        .join(Factory, Factory.id == FactoryCycle.factoryId)
+        .filter(
+            Factory.companyId == company_id,
+            FactoryCycle.status.in_(SOLVABLE_STATUSES),
+        )
+        .order_by(FactoryCycle.factoryId, FactoryCycle.id)
+        .all()
+    )
+
+
+def _outcome(job: SolveJob) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    # đọc thẳng từ future: callback cập nhật job.status có thể chưa chạy xong
+    if job.task is None:
+        return job.result, None  # trúng cache
+    future = job.task.future
+    if not future.done():
+        return None, "Solve did not finish within the time budget"
+    error = future.exception()
+    if error is not None:
+        return None, str(error) or type(error).__name__
+    return future.result(), None
+
+
+def solve_company_cycles(
+    db: Session,
+    company_id: int,
+    time_budget_sec: float,
+    warm_start: bool = True,
+    flexible: bool = False,
+    pooled: bool = False,
+    cpu_budget: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Giải mọi cycle draft/processing của các factory trong company song song
+    trong pool solver, cả lần chạy gói trong time_budget_sec; hết giờ thì cycle
+    đang giải dừng và trả về lời giải tốt nhất hiện có.
+    Lịch của mọi cycle có lời giải được ghi bằng một lệnh UPDATE hàng loạt
+    trong một transaction. Cycle processing được xếp lại từ hiện tại
+    (cycle_now_hours): op đã chạy giữ nguyên.
+    """
+    started = time.perf_counter()
+    if db.get(Company, company_id) is None:
+        raise HTTPException(404, "Company not found")
+
+    cycles = load_company_cycles(db, company_id)
+    jobs_by_cycle = load_cycles_jobs(db, [cycle.id for cycle in cycles])
+    skipped = [cycle.id for cycle in cycles if not jobs_by_cycle[cycle.id]]
+    cycles = [cycle for cycle in cycles if jobs_by_cycle[cycle.id]]
+    if not cycles:
+        raise HTTPException(400, "Company không có cycle draft/processing nào có job để xếp lịch")
+
+    # cùng một thời điểm cho mọi cycle processing
+    now = datetime.datetime.utcnow()
+    now_by_cycle = {}
+    items = []
+    for cycle in cycles:
+        try:
+            now_by_cycle[cycle.id] = cycle_now_hours(cycle, now)
+        except HTTPException as exc:
+            items.append({
+                "cycleId": cycle.id,
+                "factoryId": cycle.factoryId,
+                "status": "ERROR",
+                "objective": None,
+                "gap": None,
+                "now_hours": None,
+                "stopped": False,
+                "updated": 0,
+                "error": exc.detail,
+            })
+    cycles = [cycle for cycle in cycles if cycle.id in now_by_cycle]
+
+    groups_by_factory = {}
+    if flexible or pooled:
+        groups_by_factory = {
+            factory_id: load_machine_groups(db, factory_id)
+            for factory_id in {cycle.factoryId for cycle in cycles}
+        }
+
+    time_limit = split_time_budget(len(cycles), time_budget_sec)
+    num_workers = split_cpu_budget(len(cycles), cpu_budget)
+    solves = []
+    for cycle in cycles:
+        request = build_cycle_request(
+            jobs_by_cycle[cycle.id],
+            warm_start=warm_start,
+            time_limit_sec=time_limit,
+            now_hours=now_by_cycle[cycle.id],
+            machine_groups=groups_by_factory.get(cycle.factoryId),
+            pooled=pooled,
+        )
+        solves.append(submit_jobshop_request(
+            request.model_copy(update={"num_workers": num_workers}),
+            SolveContext(company_id, cycle.factoryId, cycle.id),
+        ))
+
+    # hết time budget: dừng cycle chưa xong (đang giải thì lấy lời giải tốt
+    # nhất, còn trong hàng đợi thì bỏ) và chờ thêm solver_stop_grace_sec
+    futures = [job.task.future for job in solves if job.task is not None]
+    remaining = time_budget_sec + settings.solver_stop_grace_sec - (time.perf_counter() - started)
+    _, pending = concurrent.futures.wait(futures, timeout=max(0.0, remaining))
+    if pending:
+        for job in solves:
+            cancel_solve(job)
+        concurrent.futures.wait(pending, timeout=settings.solver_stop_grace_sec)
+
+    rows = []
+    for cycle, job in zip(cycles, solves):
+        result, error = _outcome(job)
+        item = {
+            "cycleId": cycle.id,
+            "factoryId": cycle.factoryId,
+            "status": result["status"] if result else "ERROR",
+            "objective": result["objective"] if result else None,
+            "gap": result.get("gap") if result else None,
+            "now_hours": now_by_cycle[cycle.id],
+            "stopped": job.task is not None and job.task.cancelled,
+            "updated": 0,
+            "error": error,
+        }
+        if result and result["machines"]:
+            jobs = jobs_by_cycle[cycle.id]
+            job_ops = result_to_job_ops(
+                jobs, result, groups_by_factory.get(cycle.factoryId))
+            cycle_rows = cycle_schedule_rows(jobs, job_ops)
+            rows.extend(cycle_rows)
+            item["updated"] = len(cycle_rows)
+        elif error is None:
+            item["error"] = "Không tìm được lịch cho cycle"
+        items.append(item)
+    items.sort(key=lambda item: (item["factoryId"], item["cycleId"]))
+
+    try:
+        updated = save_schedule_rows(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "companyId": company_id,
+        "time_budget_sec": time_budget_sec,
+        "cycle_time_limit_sec": time_limit,
+        "num_workers": num_workers,
+        "cycles": len(items),
+        "solved": sum(1 for item in items if item["error"] is None),
+        "failed": sum(1 for item in items if item["error"] is not None),
+        "updated": updated,
+        "skipped": skipped,
+        "wall_time_sec": time.perf_counter() - started,
+        "items": items,
+    }
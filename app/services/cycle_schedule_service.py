@@ -0,0 +1,274 @@
+import datetime
+import math
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import (
+    CycleStatus,
+    FactoryCycle,
+    JobByMachine,
+    JobByMachineOperate,
+    Machine,
+    MachineInFactory,
+    RequestStatus,
+)
+from app.schemas.schedula import JobData, ScheduleRequest, TaskHint
+
+
+# JobByMachineOperate lưu duration/start/end theo giờ (float),
+# solver làm việc với số nguyên: quy đổi sang phút
+CYCLE_TIME_SCALE = 60
+
+
+def to_solver_time(hours: float) -> int:
+    return int(math.ceil(round(hours * CYCLE_TIME_SCALE, 6)))
+
+
+def to_solver_start(hours: float) -> int:
+    return int(round(hours * CYCLE_TIME_SCALE))
+
+
+def to_hours(value: int) -> float:
+    return value / CYCLE_TIME_SCALE
+
+
+def machine_code_key(machine_id: int, machine: Optional[Machine]) -> str:
+    if machine is not None and machine.code:
+        return machine.code
+    return f"machine_{machine_id}"
+
+
+def machine_key(op: JobByMachineOperate) -> str:
+    return machine_code_key(op.machineId, op.machine)
+
+
+def load_machine_groups(db: Session, factory_id: int) -> Dict[str, List[Machine]]:
+    """
+    Máy đã được duyệt vào factory, nhóm theo Machine.type:
+    các máy cùng type thay thế được cho nhau (flexible job shop)
+    """
+    machines = (
+        db.query(Machine)
+        .join(MachineInFactory, MachineInFactory.machineId == Machine.id)
+        .filter(
+            MachineInFactory.factoryId == factory_id,
+            MachineInFactory.status == RequestStatus.approved,
+            Machine.type.isnot(None),
+        )
+        .order_by(Machine.id)
+        .all()
+    )
+    groups: Dict[str, List[Machine]] = {}
+    for machine in machines:
+        groups.setdefault(machine.type, []).append(machine)
+    return groups
+
+
+def load_cycle_jobs(db: Session, cycle_id: int) -> List[JobByMachine]:
+    return (
+        db.query(JobByMachine)
+        .options(
+            joinedload(JobByMachine.job_ops)
+            .joinedload(JobByMachineOperate.machine)
+        )
+        .filter(JobByMachine.factoryCycleId == cycle_id)
+        .order_by(JobByMachine.id)
+        .all()
+    )
+
+
+def load_cycles_jobs(db: Session, cycle_ids: List[int]) -> Dict[int, List[JobByMachine]]:
+    """
+    Như load_cycle_jobs cho nhiều cycle bằng một query, nhóm theo cycle id
+    """
+    jobs = (
+        db.query(JobByMachine)
+        .options(
+            joinedload(JobByMachine.job_ops)
+            .joinedload(JobByMachineOperate.machine)
+        )
+        .filter(JobByMachine.factoryCycleId.in_(cycle_ids))
+        .order_by(JobByMachine.id)
+        .all()
+    )
+    jobs_by_cycle: Dict[int, List[JobByMachine]] = {cycle_id: [] for cycle_id in cycle_ids}
+    for job in jobs:
+        jobs_by_cycle[job.factoryCycleId].append(job)
+    return jobs_by_cycle
+
+
+def naive_utc(value: datetime.datetime) -> datetime.datetime:
+    # startTime lưu dạng UTC không kèm tzinfo: giờ có offset phải đổi về UTC trước
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def cycle_now_hours(cycle: FactoryCycle, now: Optional[datetime.datetime] = None) -> Optional[float]:
+    """
+    now_hours cho build_cycle_request: số giờ từ startTime của cycle tới now
+    (mặc định hiện tại). Cycle processing đã có op chạy nên phải giữ cố định
+    phần đã chạy; cycle khác (draft) trả về None, xếp lại từ đầu.
+    """
+    if cycle.status != CycleStatus.processing:
+        return None
+    if cycle.startTime is None:
+        raise HTTPException(400, "Cycle chưa có startTime")
+    now = now or datetime.datetime.utcnow()
+    return max(0.0, (naive_utc(now) - naive_utc(cycle.startTime)).total_seconds() / 3600)
+
+
+def build_cycle_request(
+    jobs: List[JobByMachine],
+    warm_start: bool = False,
+    time_limit_sec: Optional[float] = None,
+    now_hours: Optional[float] = None,
+    machine_groups: Optional[Dict[str, List[Machine]]] = None,
+    pooled: bool = False,
+) -> ScheduleRequest:
+    """
+    Chuyển job/op của cycle sang ScheduleRequest.
+    warm_start: dùng start đã lưu của từng op làm gợi ý cho solver.
+    now_hours: số giờ tính từ startTime của cycle; op có start trước thời điểm
+    này (đã xong hoặc đang chạy) được giữ cố định, op còn lại xếp từ now_hours.
+    machine_groups: (load_machine_groups) op được chạy trên mọi máy cùng type
+    với máy của nó, cùng duration.
+    pooled: mỗi nhóm máy cùng type thành một pool (cumulative) thay vì liệt kê
+    máy thay thế cho từng op.
+    """
+    machine_groups = machine_groups or {}
+    machine_pools = None
+    alternative_groups = machine_groups
+    if pooled:
+        machine_pools = {
+            machine_type: [machine_code_key(machine.id, machine) for machine in group]
+            for machine_type, group in machine_groups.items()
+            if len(group) > 1
+        }
+        alternative_groups = {}
+
+    request_jobs = []
+    hints = []
+    frozen = []
+    for job in jobs:
+        ops = sorted(job.job_ops, key=lambda op: op.task_index)
+        alternatives = {}
+        for position, op in enumerate(ops):
+            machine_type = op.machine.type if op.machine is not None else None
+            twins = [
+                machine for machine in alternative_groups.get(machine_type, [])
+                if machine.id != op.machineId
+            ]
+            if twins:
+                alternatives[position] = [
+                    (machine_code_key(machine.id, machine), to_solver_time(op.duration or 0))
+                    for machine in twins
+                ]
+        request_jobs.append(JobData(
+            job_id=job.id,
+            tasks=[(machine_key(op), to_solver_time(op.duration or 0))
+                   for op in ops],
+            alternatives=alternatives or None,
+        ))
+        # chỉ giữ cố định phần đầu liên tiếp của job (các op đã bắt đầu)
+        in_frozen_prefix = now_hours is not None
+        for position, op in enumerate(ops):
+            started = op.start is not None and now_hours is not None and op.start < now_hours
+            in_frozen_prefix = in_frozen_prefix and started
+            if op.start is None:
+                continue
+            item = TaskHint(
+                job_id=job.id,
+                task_index=position,
+                start=to_solver_start(op.start),
+            )
+            if in_frozen_prefix:
+                frozen.append(item)
+            elif warm_start:
+                hints.append(item)
+
+    return ScheduleRequest(
+        jobs=request_jobs,
+        hints=hints or None,
+        frozen=frozen or None,
+        release_time=to_solver_start(now_hours) if now_hours else 0,
+        time_limit_sec=time_limit_sec,
+        machine_pools=machine_pools or None,
+    )
+
+
+def result_to_job_ops(
+    jobs: List[JobByMachine],
+    result: Dict[str, Any],
+    machine_groups: Optional[Dict[str, List[Machine]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Kết quả solver → danh sách {jobId, task_index, machineId, start, end} theo giờ,
+    cùng dạng với BatchJobOpTimeUpdate
+    """
+    task_index_by_position = {
+        job.id: [op.task_index for op in sorted(
+            job.job_ops, key=lambda op: op.task_index)]
+        for job in jobs
+    }
+    machine_id_by_key = {
+        machine_key(op): op.machineId for job in jobs for op in job.job_ops
+    }
+    for group in (machine_groups or {}).values():
+        for machine in group:
+            machine_id_by_key[machine_code_key(machine.id, machine)] = machine.id
+
+    job_ops = []
+    for machine in result.get("machines", []):
+        for task in machine["tasks"]:
+            job_ops.append({
+                "jobId": task["job"],
+                "frozen": task.get("frozen", False),
+                "task_index": task_index_by_position[task["job"]][task["task_index"]],
+                "machineId": machine_id_by_key.get(machine["machine_id"]),
+                "start": to_hours(task["start"]),
+                "end": to_hours(task["end"]),
+            })
+    job_ops.sort(key=lambda item: (item["jobId"], item["task_index"]))
+    return job_ops
+
+
+def cycle_schedule_rows(jobs: List[JobByMachine], job_ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Các dòng {id, start, end, machineId} để UPDATE theo khóa chính từ
+    result_to_job_ops; op cố định (frozen) giữ nguyên
+    """
+    op_by_key = {
+        (op.jobId, op.task_index): op for job in jobs for op in job.job_ops
+    }
+    rows = []
+    for item in job_ops:
+        if item["frozen"]:
+            continue
+        op = op_by_key[item["jobId"], item["task_index"]]
+        rows.append({
+            "id": op.id,
+            "start": item["start"],
+            "end": item["end"],
+            "machineId": item["machineId"] if item["machineId"] is not None else op.machineId,
+        })
+    return rows
+
+
+def save_schedule_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    # một lệnh UPDATE theo khóa chính (executemany), trong transaction của db
+    if rows:
+        db.execute(update(JobByMachineOperate), rows)
+    return len(rows)
+
+
+def save_cycle_schedule(db: Session, jobs: List[JobByMachine], job_ops: List[Dict[str, Any]]) -> int:
+    """
+    Ghi start/end/machineId của result_to_job_ops vào DB bằng một lệnh UPDATE
+    theo khóa chính (executemany), trong cùng transaction của db.
+    Op cố định (frozen) giữ nguyên. Trả về số op được cập nhật.
+    """
+    return save_schedule_rows(db, cycle_schedule_rows(jobs, job_ops))
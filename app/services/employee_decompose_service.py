@@ -0,0 +1,153 @@
+import concurrent.futures
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.scheduling_optimization_ortools.decompose import plan_clusters, solve_reconcile
+from app.scheduling_optimization_ortools.dispatch import Assignment
+from app.scheduling_optimization_ortools.main_1 import solve_options
+from app.scheduling_optimization_ortools.problem import EmployeeProblem
+from app.scheduling_optimization_ortools.solver import employee_result, schedule_summary, solve_assignment
+from app.services.solve_job_service import split_cpu_budget, split_time_budget, submit_to_pool
+from app.services.solver_pool import SolveCancelled, SolveTask, get_solver_pool
+
+
+def decompose_enabled(job_count: int, options: Dict[str, Any]) -> bool:
+    # options["decompose"] ghi đè, không có thì chia khi đủ employee_decompose_min_jobs
+    decompose = options.get("decompose")
+    if decompose is not None:
+        return bool(decompose)
+    minimum = settings.employee_decompose_min_jobs
+    return minimum is not None and job_count >= minimum
+
+
+def _wait_tasks(
+    tasks: List[SolveTask],
+    stop_requested: Callable[[], bool],
+    on_done: Callable[[int, concurrent.futures.Future], None] = lambda i, future: None,
+):
+    """
+    Chờ các task của pool solver, on_done(i, future) khi task thứ i xong;
+    stop_requested() đúng thì dừng mọi task và raise SolveCancelled
+    """
+    index = {task.future: i for i, task in enumerate(tasks)}
+    pending = set(index)
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            on_done(index[future], future)
+        if pending and stop_requested():
+            for task in tasks:
+                get_solver_pool().cancel(task.id)
+            raise SolveCancelled("Solve cancelled")
+
+
+def solve_decomposed(
+    problem: EmployeeProblem,
+    options: Dict[str, Any],
+    stop_requested: Callable[[], bool] = lambda: False,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Xếp lịch nhân viên theo bài con (partition: ngày / kỹ năng / factory),
+    các bài con giải song song trong pool solver; sau đó một bước ghép lại
+    ngắn (employee_reconcile_share của time limit) xếp các job còn sót vào
+    giờ trống của mọi employee làm được, kể cả employee thuộc nhóm khác.
+    Lịch tham lam của cả bài quyết định (employee, ngày) nào thuộc bài con
+    nào và là gợi ý của các bài con. Mọi bước (kể cả chuẩn bị và ghép lại)
+    chạy trong pool, thời gian chuẩn bị tính vào time limit.
+    Trả về cùng dạng với Employee_Scheduling_Problems.
+    "options": như Employee_Scheduling_Problems, thêm max_cluster_jobs,
+    cpu_budget
+    """
+    started = time.perf_counter()
+    params = solve_options(options)
+    deadline = started + params["time_limit_sec"]
+    reconcile_time = params["time_limit_sec"] * settings.employee_reconcile_share
+
+    plan = submit_to_pool(
+        plan_clusters,
+        problem,
+        options.get("max_cluster_jobs") or settings.employee_cluster_max_jobs,
+        with_progress=False,
+    )
+    _wait_tasks([plan], stop_requested)
+    candidates, clusters = plan.future.result()
+
+    cluster_limit = split_time_budget(
+        len(clusters), max(deadline - time.perf_counter() - reconcile_time, 0))
+    num_workers = split_cpu_budget(len(clusters), options.get("cpu_budget"))
+
+    assignment: Assignment = {}
+    statuses: Counter = Counter()
+    # conflicts / branches cộng dồn của mọi bài con
+    effort: Counter = Counter()
+
+    def cluster_done(i: int, future: concurrent.futures.Future):
+        if future.exception() is not None:
+            statuses["ERROR"] += 1
+        else:
+            solution, statistics = future.result()
+            statuses[statistics["status"]] += 1
+            effort.update(conflicts=statistics["conflicts"], branches=statistics["branches"])
+            assignment.update(clusters[i].to_global(solution))
+        if on_progress:
+            on_progress({
+                "clusters": len(clusters),
+                "solved_clusters": sum(statuses.values()),
+                **schedule_summary(problem, assignment),
+            })
+
+    _wait_tasks([
+        submit_to_pool(
+            solve_assignment,
+            cluster.problem,
+            cluster.candidates,
+            cluster_limit,
+            num_workers,
+            params["random_seed"],
+            params["max_candidates_per_job"],
+            cluster.fixed or None,
+            cluster.hint or None,
+            with_progress=False,
+        )
+        for cluster in clusters
+    ], stop_requested, cluster_done)
+    decomposed = schedule_summary(problem, assignment)
+
+    # bài con chạy quá giờ thì bước ghép lại vẫn có ít nhất reconcile_time
+    repair = submit_to_pool(
+        solve_reconcile,
+        problem,
+        candidates,
+        assignment,
+        max(deadline - time.perf_counter(), reconcile_time),
+        params["num_workers"],
+        params["random_seed"],
+        params["max_candidates_per_job"],
+        with_progress=False,
+    )
+    _wait_tasks([repair], stop_requested)
+    reconcile_jobs = 0
+    if repair.future.exception() is None:
+        placed, reconcile_jobs, statistics = repair.future.result()
+        assignment.update(placed)
+        if statistics is not None:
+            effort.update(conflicts=statistics["conflicts"], branches=statistics["branches"])
+
+    return employee_result(problem, candidates, assignment, "DECOMPOSED", {
+        "mode": "decomposed",
+        "clusters": len(clusters),
+        "cluster_statuses": dict(statuses),
+        "cluster_time_limit_sec": cluster_limit,
+        "num_workers": num_workers,
+        "conflicts": effort["conflicts"],
+        "branches": effort["branches"],
+        "reconcile_jobs": reconcile_jobs,
+        "reconciled_jobs": len(assignment) - decomposed["scheduled_jobs"],
+        "wall_time_sec": time.perf_counter() - started,
+        **schedule_summary(problem, assignment),
+        "decomposed": decomposed,
+    })
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import JobByEmployee
+from app.scheduling_optimization_ortools.main_1 import Employee_Scheduling_Snapshot
+from app.scheduling_optimization_ortools.problem import problem_from_snapshot
+from app.scheduling_optimization_ortools.snapshot import CompanySnapshot
+from app.services.employee_decompose_service import decompose_enabled, solve_decomposed
+from app.services.employee_snapshot_service import load_company_snapshot
+from app.services.solve_job_service import (
+    CANCELLED,
+    FAILED,
+    FINISHED,
+    RUNNING,
+    SolveJob,
+    cancel_solve,
+    finish_solve,
+    get_solve_or_404,
+    record_progress,
+    register_solve,
+    submit_to_pool,
+)
+from app.services.solver_pool import SolveCancelled
+from app.services.solver_telemetry_service import CANCELLED_STATUS, failure_status, record_employee_run
+from app.utils import parse_start_safe
+
+
+logger = logging.getLogger(__name__)
+
+# các cột lịch được ghi lại từ kết quả xếp lịch nhân viên
+SCHEDULE_COLUMNS = ("employeeId", "scheduled_weekday", "start_hour", "end_hour")
+
+# các bước của một lần xếp lịch nhân viên chạy nền
+LOADING = "loading"
+SOLVING = "solving"
+WRITING = "writing"
+
+
+def _id(value: str) -> int:
+    # "em_12" / "jo_34" → 12 / 34
+    return int(value.split("_", 1)[1])
+
+
+def employee_schedule_rows(
+    snapshot: CompanySnapshot,
+    result: Dict[str, Any],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Các dòng {id, employeeId, scheduled_weekday, start_hour, end_hour} từ
+    result["data"] của Employee_Scheduling_Snapshot, cùng các id job /
+    employee không thuộc snapshot của company (bị bỏ qua)
+    """
+    employee_ids = {employee.id for employee in snapshot.employees}
+    rows = []
+    skipped = []
+    for employee in result["data"]:
+        employee_id = _id(employee["employee_id"])
+        if employee_id not in employee_ids:
+            skipped.extend(job["job_id"] for job in employee["jobs"])
+            continue
+        for job in employee["jobs"]:
+            weekday, start_hour = parse_start_safe(job["start"])
+            _, end_hour = parse_start_safe(job["end"])
+            rows.append({
+                "id": _id(job["job_id"]),
+                "employeeId": employee_id,
+                "scheduled_weekday": weekday,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+            })
+    return rows, skipped
+
+
+def save_employee_schedule(
+    db: Session,
+    snapshot: CompanySnapshot,
+    result: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Ghi lịch nhân viên vào JobByEmployee: một query kiểm tra id (job thuộc
+    company, kèm giá trị hiện tại), một lệnh UPDATE theo khóa chính
+    (executemany) chỉ cho các job thay đổi, trong một transaction.
+    Trả về tóm tắt các thay đổi.
+    """
+    rows, skipped = employee_schedule_rows(snapshot, result)
+
+    current = {}
+    if rows:
+        query = db.query(
+            JobByEmployee.id, *[getattr(JobByEmployee, column) for column in SCHEDULE_COLUMNS]
+        ).filter(
+            JobByEmployee.companyId == snapshot.company_id,
+            JobByEmployee.id.in_([row["id"] for row in rows]),
+        )
+        current = {job.id: job for job in query}
+
+    scheduled = [row for row in rows if row["id"] in current]
+    skipped += [f"jo_{row['id']}" for row in rows if row["id"] not in current]
+    changed = []
+    changes = []
+    for row in scheduled:
+        job = current[row["id"]]
+        previous = {column: getattr(job, column) for column in SCHEDULE_COLUMNS}
+        if all(previous[column] == row[column] for column in SCHEDULE_COLUMNS):
+            continue
+        changed.append(row)
+        changes.append({
+            "jobId": row["id"],
+            **{column: row[column] for column in SCHEDULE_COLUMNS},
+            "previous": previous,
+        })
+
+    try:
+        if changed:
+            db.execute(update(JobByEmployee), changed)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "companyId": snapshot.company_id,
+        "status": result.get("status"),
+        "scheduled": len(scheduled),
+        "updated": len(changed),
+        "unchanged": len(scheduled) - len(changed),
+        "skipped": skipped,
+        "unassigned": result.get("unassigned", []),
+        "changes": changes,
+    }
+
+
+def _set_phase(job: SolveJob, phase: str):
+    job.progress = {"phase": phase}
+    job.events.append({"event": "phase", "phase": phase})
+
+
+def _check_cancelled(job: SolveJob):
+    if job.cancel_requested:
+        raise SolveCancelled("Đã hủy xếp lịch, lịch không được ghi")
+
+
+def _solve_in_pool(job: SolveJob, snapshot: CompanySnapshot, options: Dict[str, Any]) -> Dict[str, Any]:
+    task = job.task = submit_to_pool(
+        Employee_Scheduling_Snapshot,
+        snapshot,
+        options,
+        on_progress=lambda progress: record_progress(job, {"phase": SOLVING, **progress}),
+    )
+    # cancel_solve trước khi job.task được gán thì chưa dừng được task
+    if job.cancel_requested:
+        cancel_solve(job)
+    return task.future.result()
+
+
+def _solve(job: SolveJob, snapshot: CompanySnapshot, options: Dict[str, Any]) -> Dict[str, Any]:
+    _set_phase(job, SOLVING)
+    started = time.perf_counter()
+    try:
+        if decompose_enabled(len(snapshot.jobs), options):
+            result = solve_decomposed(
+                problem_from_snapshot(snapshot, options),
+                options,
+                stop_requested=lambda: job.cancel_requested,
+                on_progress=lambda progress: record_progress(job, {"phase": SOLVING, **progress}),
+            )
+        else:
+            result = _solve_in_pool(job, snapshot, options)
+    except SolveCancelled as exc:
+        record_employee_run(
+            snapshot, None, time.perf_counter() - started, snapshot.company_id, str(exc),
+            status=CANCELLED_STATUS)
+        raise
+    except Exception as exc:
+        record_employee_run(
+            snapshot, None, time.perf_counter() - started, snapshot.company_id,
+            str(exc) or type(exc).__name__, failure_status(exc))
+        raise
+    # pool dừng giữa chừng vẫn trả về lời giải dở: ghi là CANCELLED
+    record_employee_run(
+        snapshot, result, time.perf_counter() - started, snapshot.company_id,
+        status=CANCELLED_STATUS if job.cancel_requested else None)
+    return result
+
+
+def _run_employee_schedule(job: SolveJob, company_id: int, options: Dict[str, Any]):
+    job.status = RUNNING
+    job.started_at = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        snapshot = load_company_snapshot(db, company_id)
+        _check_cancelled(job)
+        result = _solve(job, snapshot, options)
+        # dừng giữa chừng: không ghi lời giải dở vào DB
+        _check_cancelled(job)
+        _set_phase(job, WRITING)
+        summary = save_employee_schedule(db, snapshot, result)
+    except SolveCancelled as exc:
+        finish_solve(job, CANCELLED, error=str(exc))
+    except HTTPException as exc:
+        finish_solve(job, FAILED, error=str(exc.detail))
+    except Exception as exc:
+        logger.exception("Employee schedule %s failed", job.id)
+        finish_solve(job, FAILED, error=str(exc) or type(exc).__name__)
+    else:
+        finish_solve(job, FINISHED, summary)
+    finally:
+        db.close()
+
+
+def submit_employee_schedule(company_id: int, options: Optional[Dict[str, Any]] = None) -> SolveJob:
+    """
+    Xếp lịch nhân viên của company chạy nền: đọc snapshot (loading), giải
+    trong pool solver (solving, kèm objective tốt nhất hiện có, hoặc số bài
+    con đã xong khi chia bài), ghi lịch (writing). Trả về ngay SolveJob; kết
+    quả là tóm tắt của save_employee_schedule.
+    options: như Employee_Scheduling_Problems, "decompose" bật / tắt chia bài
+    (mặc định theo employee_decompose_min_jobs)
+    """
+    job = register_solve("employee", company_id=company_id)
+    job.progress = {"phase": LOADING}
+    threading.Thread(
+        target=_run_employee_schedule,
+        args=(job, company_id, options or {}),
+        name=f"employee-schedule-{job.id}",
+        daemon=True,
+    ).start()
+    return job
+
+
+def get_employee_schedule_or_404(company_id: int, solve_id: str) -> SolveJob:
+    job = get_solve_or_404(solve_id)
+    if job.kind != "employee" or job.company_id != company_id:
+        raise HTTPException(status_code=404, detail="Solve job not found")
+    return job
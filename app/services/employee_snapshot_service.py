@@ -0,0 +1,183 @@
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Company, Employee, EmployeeBlockTime, EmployeeToFactoryDistance, Factory, FactoryDistance, JobByEmployee
+from app.scheduling_optimization_ortools.snapshot import (
+    CompanySnapshot,
+    SnapshotBlock,
+    SnapshotEmployee,
+    SnapshotJob,
+    employee_travel_matrix,
+    factory_travel_matrix,
+)
+from app.utils import weekday_to_date_this_week
+
+
+def load_company_snapshot(db: Session, company_id: int) -> CompanySnapshot:
+    """
+    Đọc mọi dữ liệu xếp lịch nhân viên của company bằng một số query cố định
+    (company, employees, factories, jobs, hai bảng khoảng cách, giờ bận),
+    chỉ lấy các cột cần dùng; số query không tăng theo số factory.
+    """
+    if db.query(Company.id).filter(Company.id == company_id).first() is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Công ty với ID {company_id} không tồn tại."
+        )
+
+    employee_ids = select(Employee.id).where(Employee.companyId == company_id)
+    factory_ids = select(Factory.id).where(Factory.companyId == company_id)
+
+    employees = tuple(
+        SnapshotEmployee(id=id, name=name, skills=tuple(skills or ()))
+        for id, name, skills in db.query(Employee.id, Employee.fullName, Employee.employeeSkillList)
+        .filter(Employee.companyId == company_id)
+        .order_by(Employee.id)
+    )
+    factories = tuple(
+        id for id, in db.query(Factory.id)
+        .filter(Factory.companyId == company_id)
+        .order_by(Factory.id)
+    )
+    jobs = tuple(
+        SnapshotJob(id=id, factory_id=factory_id, skill=skill, duration=duration,
+                    expected_weekday=weekday)
+        for id, factory_id, skill, duration, weekday in db.query(
+            JobByEmployee.id,
+            JobByEmployee.factoryId,
+            JobByEmployee.skillNeeded,
+            JobByEmployee.duration,
+            JobByEmployee.expected_weekday,
+        )
+        .filter(JobByEmployee.companyId == company_id)
+        .order_by(JobByEmployee.id)
+    )
+    employee_travel = db.query(
+        EmployeeToFactoryDistance.employeeId,
+        EmployeeToFactoryDistance.factoryId,
+        EmployeeToFactoryDistance.travel_time_hours,
+    ).filter(
+        EmployeeToFactoryDistance.employeeId.in_(employee_ids),
+        EmployeeToFactoryDistance.factoryId.in_(factory_ids),
+        EmployeeToFactoryDistance.travel_time_hours.isnot(None),
+    ).all()
+    factory_travel = db.query(
+        FactoryDistance.factory_from_id,
+        FactoryDistance.factory_to_id,
+        FactoryDistance.travel_time_hours,
+    ).filter(
+        FactoryDistance.factory_from_id.in_(factory_ids),
+        FactoryDistance.factory_to_id.in_(factory_ids),
+        FactoryDistance.travel_time_hours.isnot(None),
+    ).all()
+    blocks = tuple(
+        SnapshotBlock(id=id, employee_id=employee_id, weekday=weekday,
+                      start_hour=start_hour, duration=duration)
+        for id, employee_id, weekday, start_hour, duration in db.query(
+            EmployeeBlockTime.id,
+            EmployeeBlockTime.employee_id,
+            EmployeeBlockTime.expected_weekday,
+            EmployeeBlockTime.start_hour,
+            EmployeeBlockTime.job_duration,
+        )
+        .filter(EmployeeBlockTime.employee_id.in_(employee_ids))
+        .order_by(EmployeeBlockTime.id)
+    )
+
+    return CompanySnapshot(
+        company_id=company_id,
+        employees=employees,
+        factory_ids=factories,
+        jobs=jobs,
+        blocks=blocks,
+        employee_travel=employee_travel_matrix(
+            [employee.id for employee in employees], factories, employee_travel),
+        factory_travel=factory_travel_matrix(factories, factory_travel),
+    )
+
+
+def _this_week(weekday):
+    return weekday_to_date_this_week(weekday).date() if weekday is not None else None
+
+
+def _distances(snapshot: CompanySnapshot) -> List[Dict[str, Any]]:
+    # dạng cũ: một dict cho mỗi cặp employee × factory và factory × factory
+    employee_travel = snapshot.employee_travel.tolist()
+    factory_travel = snapshot.factory_travel.tolist()
+    distances = [
+        {
+            "hours": hours,
+            "measure_point": f"em_{employee.id}",
+            "reference_point": f"lo_fa_{factory_id}",
+        }
+        for employee, row in zip(snapshot.employees, employee_travel)
+        for factory_id, hours in zip(snapshot.factory_ids, row)
+    ]
+    for i, fa_from in enumerate(snapshot.factory_ids):
+        for j in range(i + 1, len(snapshot.factory_ids)):
+            distances.append({
+                "hours": factory_travel[i][j],
+                "measure_point": f"lo_fa_{fa_from}",
+                "reference_point": f"lo_fa_{snapshot.factory_ids[j]}",
+            })
+    return distances
+
+
+def snapshot_payload(snapshot: CompanySnapshot, compact: bool = False) -> Dict[str, Any]:
+    """
+    Payload JSON của getJobGeneral (employees, locations, jobs, distances,
+    blocked_times) dựng từ snapshot, không truy vấn thêm.
+    compact: thay "distances" bằng "travel": hai ma trận giờ di chuyển theo
+    thứ tự employees / locations (parse_payload đọc được cả hai dạng)
+    """
+    if compact:
+        travel = {
+            "travel": {
+                "employees": snapshot.employee_travel.tolist(),
+                "locations": snapshot.factory_travel.tolist(),
+            },
+        }
+    else:
+        travel = {"distances": _distances(snapshot)}
+
+    return {
+        "employees": [
+            {
+                "employee_id": f"em_{employee.id}",
+                "name": employee.name,
+                "skills": list(employee.skills),
+                "specialized": ["SpecificSkills"],
+            }
+            for employee in snapshot.employees
+        ],
+        "locations": [
+            {"location_id": f"lo_fa_{factory_id}", "employee_id": ""}
+            for factory_id in snapshot.factory_ids
+        ],
+        "jobs": [
+            {
+                "job_duration": job.duration,
+                "job_type": job.skill,
+                "job_id": f"jo_{job.id}",
+                "expected_date": _this_week(job.expected_weekday),
+                "location_id": f"lo_fa_{job.factory_id}",
+                "shipment_date": _this_week(job.expected_weekday),
+            }
+            for job in snapshot.jobs
+        ],
+        **travel,
+        "blocked_times": [
+            {
+                "job_type": "any",
+                "job_duration": block.duration,
+                "employee_id": f"em_{block.employee_id}",
+                "requested_date": _this_week(block.weekday),
+                "blocked_id": f"bl_{block.id}",
+                "start": block.start_hour,
+            }
+            for block in snapshot.blocks
+        ],
+    }
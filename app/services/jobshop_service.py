@@ -0,0 +1,146 @@
+import copy
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.jobshop.cache import ScheduleCache, instance_key
+from app.jobshop.solver import solve_jobshop
+from app.schemas.schedula import ScheduleRequest
+from app.services.solve_job_service import (
+    SolveJob,
+    apply_solver_defaults,
+    register_finished_solve,
+    solve_in_pool,
+    solve_in_pool_async,
+    submit_solve,
+)
+from app.services.solver_telemetry_service import (
+    CANCELLED_STATUS,
+    SolveContext,
+    failure_status,
+    record_jobshop_run,
+)
+
+
+_cache = ScheduleCache(
+    max_entries=settings.solver_cache_size,
+    disk_dir=settings.solver_cache_dir,
+)
+
+
+def _cache_lookup(request: ScheduleRequest, key: str) -> Optional[Dict[str, Any]]:
+    if not request.use_cache or request.build.capture:
+        return None
+    entry = _cache.get(key, request.time_limit_sec)
+    if entry is None:
+        return None
+
+    result = copy.deepcopy(entry["result"])
+    result["cache"] = {
+        "hit": True,
+        "key": key,
+        "cached_at": datetime.utcfromtimestamp(entry["cached_at"]),
+        "time_limit_sec": entry["time_limit_sec"],
+    }
+    return result
+
+
+def _cache_store(request: ScheduleRequest, key: str, result: Dict[str, Any]):
+    _cache.put(key, request.time_limit_sec, result)
+    result["cache"] = {"hit": False, "key": key}
+
+
+async def solve_jobshop_request(
+    http_request: Request,
+    request: ScheduleRequest,
+    context: Optional[SolveContext] = None,
+) -> Dict[str, Any]:
+    """
+    Giải job-shop (đồng bộ với client): cache → pool → lưu cache
+    """
+    started = time.perf_counter()
+    request = apply_solver_defaults(request)
+    key = instance_key(request)
+
+    cached = _cache_lookup(request, key)
+    if cached is None:
+        try:
+            result = await solve_in_pool_async(http_request, solve_jobshop, request)
+        except HTTPException as exc:
+            await run_in_threadpool(
+                record_jobshop_run, request, None, time.perf_counter() - started,
+                context, str(exc.detail), failure_status(exc))
+            raise
+        _cache_store(request, key, result)
+    else:
+        result = cached
+
+    await run_in_threadpool(
+        record_jobshop_run, request, result, time.perf_counter() - started, context)
+    return result
+
+
+def solve_jobshop_sync(
+    request: ScheduleRequest,
+    context: Optional[SolveContext] = None,
+) -> Dict[str, Any]:
+    """
+    Như solve_jobshop_request nhưng cho route sync (chờ pool trong threadpool)
+    """
+    started = time.perf_counter()
+    request = apply_solver_defaults(request)
+    key = instance_key(request)
+
+    cached = _cache_lookup(request, key)
+    if cached is None:
+        try:
+            result = solve_in_pool(solve_jobshop, request)
+        except HTTPException as exc:
+            record_jobshop_run(
+                request, None, time.perf_counter() - started, context, str(exc.detail),
+                failure_status(exc))
+            raise
+        _cache_store(request, key, result)
+    else:
+        result = cached
+
+    record_jobshop_run(request, result, time.perf_counter() - started, context)
+    return result
+
+
+def submit_jobshop_request(
+    request: ScheduleRequest,
+    context: Optional[SolveContext] = None,
+) -> SolveJob:
+    """
+    Giải job-shop chạy nền; nếu trúng cache thì trả về job đã xong ngay
+    """
+    started = time.perf_counter()
+    request = apply_solver_defaults(request)
+    key = instance_key(request)
+
+    cached = _cache_lookup(request, key)
+    if cached is not None:
+        record_jobshop_run(request, cached, time.perf_counter() - started, context)
+        return register_finished_solve("jobshop", cached)
+
+    job = submit_solve("jobshop", solve_jobshop, request)
+
+    def on_done(future):
+        exception = future.exception()
+        error = None if exception is None else str(exception)
+        failure = None if exception is None else failure_status(exception)
+        result = future.result() if error is None else None
+        # kết quả bị cancel giữa chừng không đại diện cho time limit: không cache
+        if error is None and not job.task.cancelled:
+            _cache_store(request, key, result)
+        record_jobshop_run(
+            request, result, time.perf_counter() - started, context, error,
+            status=CANCELLED_STATUS if job.task.cancelled else failure)
+
+    job.task.future.add_done_callback(on_done)
+    return job
@@ -0,0 +1,274 @@
+import asyncio
+import math
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+from app.schemas.schedula import ScheduleRequest, SolveJobStatus
+from app.services.solver_pool import (
+    SolveCancelled,
+    SolveTask,
+    SolveTimeout,
+    get_solver_pool,
+)
+
+
+# Trạng thái của một lần giải chạy nền
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_STATUSES = {FINISHED, FAILED, CANCELLED}
+
+
+@dataclass
+class SolveJob:
+    id: str
+    kind: str
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    task: Optional[SolveTask] = None
+    # các lời giải trung gian cho SSE / WebSocket
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    # job chạy nhiều bước (vd. xếp lịch nhân viên) có thể bị cancel trước
+    # khi có task trong pool
+    cancel_requested: bool = False
+    company_id: Optional[int] = None
+
+
+_jobs: Dict[str, SolveJob] = {}
+_lock = threading.Lock()
+
+
+def apply_solver_defaults(request: ScheduleRequest) -> ScheduleRequest:
+    """
+    Điền time limit / số worker mặc định nếu client không gửi,
+    time limit không vượt quá giới hạn cứng của pool
+    """
+    time_limit = request.time_limit_sec or settings.solver_time_limit_sec
+    return request.model_copy(update={
+        "time_limit_sec": min(time_limit, settings.solver_hard_time_limit_sec),
+        "num_workers": request.num_workers or settings.solver_num_workers,
+    })
+
+
+def split_cpu_budget(count: int, cpu_budget: Optional[int] = None) -> int:
+    # số luồng CP-SAT cho mỗi bài khi giải song song count bài trong pool
+    budget = cpu_budget or settings.solver_batch_cpu_budget or os.cpu_count() or 1
+    concurrent = max(1, min(count, settings.solver_pool_workers))
+    return max(1, budget // concurrent)
+
+
+def split_time_budget(count: int, time_budget_sec: float) -> float:
+    """
+    Time limit mỗi bài để count bài xong trong time_budget_sec: pool giải
+    solver_pool_workers bài một lúc, các bài còn lại chờ tới lượt sau
+    """
+    waves = math.ceil(count / max(1, settings.solver_pool_workers))
+    return time_budget_sec / max(1, waves)
+
+
+def submit_to_pool(
+    fn: Callable[..., Any],
+    *args,
+    with_progress: bool = True,
+    on_start: Optional[Callable[[], None]] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> SolveTask:
+    return get_solver_pool().submit(
+        fn,
+        *args,
+        with_progress=with_progress,
+        on_start=on_start,
+        on_progress=on_progress,
+    )
+
+
+def solve_in_pool(fn: Callable[..., Any], *args, with_progress: bool = True) -> Any:
+    """
+    Dùng cho route sync: chờ kết quả từ pool (CPU chạy ở process khác)
+    """
+    task = submit_to_pool(fn, *args, with_progress=with_progress)
+    return _task_result(task)
+
+
+async def solve_in_pool_async(
+    http_request: Request,
+    fn: Callable[..., Any],
+    *args,
+    with_progress: bool = True,
+) -> Any:
+    """
+    Chờ kết quả từ pool, tự cancel nếu client ngắt kết nối
+    """
+    task = submit_to_pool(fn, *args, with_progress=with_progress)
+    future = asyncio.wrap_future(task.future)
+    while True:
+        done, _ = await asyncio.wait({future}, timeout=0.5)
+        if done:
+            return _task_result(task)
+        if await http_request.is_disconnected():
+            get_solver_pool().cancel(task.id)
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+def _task_result(task: SolveTask) -> Any:
+    try:
+        return task.future.result()
+    except SolveCancelled as exc:
+        raise HTTPException(status_code=499, detail=str(exc))
+    except SolveTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _prune_finished():
+    # Giữ lại tối đa solve_job_retention job đã xong (bỏ job cũ nhất)
+    finished = [j for j in _jobs.values() if j.status in FINAL_STATUSES]
+    overflow = len(finished) - settings.solve_job_retention
+    if overflow <= 0:
+        return
+    finished.sort(key=lambda j: j.finished_at)
+    for job in finished[:overflow]:
+        del _jobs[job.id]
+
+
+def record_progress(job: SolveJob, progress: Dict[str, Any]):
+    job.progress = {k: v for k, v in progress.items() if k != "machines"}
+
+    # Chỉ giữ lịch đầy đủ ở lời giải mới nhất để giới hạn bộ nhớ
+    if job.events and "machines" in job.events[-1]:
+        job.events[-1] = {k: v for k, v in job.events[-1].items()
+                          if k != "machines"}
+    job.events.append({"event": "solution", **progress})
+
+
+def finish_solve(job: SolveJob, status: str, result: Any = None, error: Optional[str] = None):
+    job.result = result
+    job.error = error
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    job.events.append({
+        "event": "done",
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+    })
+
+
+def _on_done(job: SolveJob, task: SolveTask):
+    try:
+        finish_solve(job, CANCELLED if task.cancelled else FINISHED, task.future.result())
+    except SolveCancelled as exc:
+        finish_solve(job, CANCELLED, error=str(exc))
+    except Exception as exc:
+        finish_solve(job, FAILED, error=str(exc))
+
+
+async def iter_solve_events(job: SolveJob, poll_sec: float = 0.2) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Phát lần lượt các lời giải trung gian rồi sự kiện "done" cuối cùng
+    """
+    cursor = 0
+    while True:
+        events = job.events
+        while cursor < len(events):
+            event = events[cursor]
+            cursor += 1
+            yield event
+            if event["event"] == "done":
+                return
+        await asyncio.sleep(poll_sec)
+
+
+def submit_solve(kind: str, fn: Callable[..., Any], *args, with_progress: bool = True) -> SolveJob:
+    """
+    Đưa một lần giải vào pool, trả về ngay SolveJob để client polling.
+    Nếu with_progress, fn phải nhận keyword on_progress.
+    """
+    job = SolveJob(id="", kind=kind)
+
+    def on_start():
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+
+    def on_progress(progress: Dict[str, Any]):
+        record_progress(job, progress)
+
+    task = submit_to_pool(
+        fn,
+        *args,
+        with_progress=with_progress,
+        on_start=on_start,
+        on_progress=on_progress,
+    )
+    job.id = task.id
+    job.task = task
+
+    with _lock:
+        _prune_finished()
+        _jobs[job.id] = job
+    task.future.add_done_callback(lambda _: _on_done(job, task))
+    return job
+
+
+def register_solve(kind: str, **fields) -> SolveJob:
+    """
+    Ghi nhận một solve job tự quản lý trạng thái (không phải một task của
+    pool), kết thúc bằng finish_solve
+    """
+    job = SolveJob(id=uuid.uuid4().hex, kind=kind, **fields)
+    with _lock:
+        _prune_finished()
+        _jobs[job.id] = job
+    return job
+
+
+def register_finished_solve(kind: str, result: Any) -> SolveJob:
+    """
+    Ghi nhận một kết quả có sẵn (vd. trúng cache) như một solve job đã xong
+    """
+    job = register_solve(kind, started_at=datetime.utcnow())
+    finish_solve(job, FINISHED, result)
+    return job
+
+
+def cancel_solve(job: SolveJob):
+    if job.status not in FINAL_STATUSES:
+        job.cancel_requested = True
+        if job.task is not None:
+            get_solver_pool().cancel(job.task.id)
+
+
+def get_solve_or_404(solve_id: str) -> SolveJob:
+    job = _jobs.get(solve_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Solve job not found")
+    return job
+
+
+def to_status(job: SolveJob) -> SolveJobStatus:
+    return SolveJobStatus(
+        solve_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        progress=job.progress,
+        error=job.error,
+    )
@@ -0,0 +1,354 @@
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class SolveCancelled(Exception):
+    pass
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+class SolverWorkerError(Exception):
+    pass
+
+
+# ----------------------------
+# Phía worker process
+# ----------------------------
+_worker_conn = None
+_worker_send_lock = threading.Lock()
+_worker_stop_event = None
+_active_solver = None
+
+
+def report_progress(event: Dict[str, Any]):
+    """
+    Gửi tiến độ từ worker về process web. Ngoài pool thì không làm gì.
+    """
+    if _worker_conn is None:
+        return
+    with _worker_send_lock:
+        _worker_conn.send(("progress", event))
+
+
+def bind_solver(solver):
+    """
+    Đăng ký CpSolver đang chạy để yêu cầu dừng (cancel / hết giờ)
+    có thể gọi stop_search() và vẫn nhận lời giải tốt nhất hiện có.
+    """
+    global _active_solver
+    _active_solver = solver
+
+
+def stop_requested() -> bool:
+    """
+    True khi process web đã yêu cầu dừng (cancel / hết giờ). Dùng cho các vòng
+    lặp gọi CP-SAT nhiều lần (LNS) để không bắt đầu vòng mới. Ngoài pool luôn False.
+    """
+    return _worker_stop_event is not None and _worker_stop_event.is_set()
+
+
+def _stop_watcher(stop_event):
+    while True:
+        if stop_event.wait(0.1):
+            solver = _active_solver
+            if solver is not None:
+                solver.stop_search()
+            time.sleep(0.1)
+
+
+def _worker_main(conn, stop_event):
+    global _worker_conn, _worker_stop_event, _active_solver
+    _worker_conn = conn
+    _worker_stop_event = stop_event
+    threading.Thread(target=_stop_watcher, args=(
+        stop_event,), daemon=True).start()
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        fn, args, with_progress = message
+        kwargs = {"on_progress": report_progress} if with_progress else {}
+        try:
+            result = fn(*args, **kwargs)
+            reply = ("result", result)
+        except Exception as exc:
+            reply = ("error", f"{type(exc).__name__}: {exc}")
+        finally:
+            _active_solver = None
+
+        with _worker_send_lock:
+            conn.send(reply)
+
+
+# ----------------------------
+# Phía process web
+# ----------------------------
+class SolveTask:
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        args: tuple,
+        with_progress: bool,
+        hard_time_limit_sec: float,
+        on_start: Optional[Callable[[], None]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.with_progress = with_progress
+        self.hard_time_limit_sec = hard_time_limit_sec
+        self.on_start = on_start
+        self.on_progress = on_progress
+        self.future: Future = Future()
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.stop_event),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.solves = 0
+
+    def retire(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SolverPool:
+    """
+    Pool process tạo sẵn cho CP-SAT, tách tải solver khỏi process web.
+
+    - mỗi slot giữ một worker process, nhận task từ hàng đợi chung
+    - cancel / hết hard limit: gửi stop_search() để lấy lời giải tốt nhất,
+      quá stop_grace_sec mà chưa trả về thì terminate worker
+    - worker được thay mới sau max_tasks_per_worker lần giải
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_tasks_per_worker: int,
+        hard_time_limit_sec: float,
+        stop_grace_sec: float = 5.0,
+        start_method: str = "spawn",
+    ):
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.hard_time_limit_sec = hard_time_limit_sec
+        self.stop_grace_sec = stop_grace_sec
+        self._ctx = multiprocessing.get_context(start_method)
+        self._queue: "queue.Queue[Optional[SolveTask]]" = queue.Queue()
+        self._tasks: Dict[str, SolveTask] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Pre-fork: tạo toàn bộ worker ngay khi khởi tạo pool
+        self._slots = []
+        for i in range(workers):
+            worker = _Worker(self._ctx)
+            thread = threading.Thread(
+                target=self._slot_loop,
+                args=(worker,),
+                name=f"solver-slot-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._slots.append(thread)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        with_progress: bool = False,
+        hard_time_limit_sec: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> SolveTask:
+        if self._closed:
+            raise RuntimeError("Solver pool is shut down")
+
+        task = SolveTask(
+            fn=fn,
+            args=args,
+            with_progress=with_progress,
+            hard_time_limit_sec=hard_time_limit_sec or self.hard_time_limit_sec,
+            on_start=on_start,
+            on_progress=on_progress,
+        )
+        with self._lock:
+            self._tasks[task.id] = task
+        task.future.add_done_callback(lambda _: self._forget(task.id))
+        self._queue.put(task)
+        return task
+
+    def cancel(self, task_id: str) -> bool:
+        task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        task.cancel_event.set()
+        return True
+
+    def shutdown(self):
+        self._closed = True
+        for task in list(self._tasks.values()):
+            task.cancel_event.set()
+        for _ in self._slots:
+            self._queue.put(None)
+        for thread in self._slots:
+            thread.join(timeout=self.stop_grace_sec + 5)
+
+    def _forget(self, task_id: str):
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def _slot_loop(self, worker: _Worker):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+
+            if task.cancelled:
+                task.future.set_exception(SolveCancelled("Solve cancelled"))
+                continue
+            task.future.set_running_or_notify_cancel()
+
+            if worker is None or not worker.process.is_alive():
+                worker = _Worker(self._ctx)
+
+            worker = self._run_task(worker, task)
+
+            if worker is not None:
+                worker.solves += 1
+                if worker.solves >= self.max_tasks_per_worker:
+                    # Thay worker để giới hạn bộ nhớ tích lũy
+                    worker.retire()
+                    worker = None
+            if worker is None and not self._closed:
+                worker = _Worker(self._ctx)
+
+        if worker is not None:
+            worker.retire()
+
+    def _run_task(self, worker: _Worker, task: SolveTask) -> Optional[_Worker]:
+        """
+        Chạy task trên worker, trả về worker nếu còn dùng được, None nếu đã bị kill
+        """
+        worker.stop_event.clear()
+        try:
+            worker.conn.send((task.fn, task.args, task.with_progress))
+        except Exception as exc:
+            task.future.set_exception(SolverWorkerError(str(exc)))
+            worker.kill()
+            return None
+
+        if task.on_start:
+            task.on_start()
+
+        deadline = time.monotonic() + task.hard_time_limit_sec
+        stop_requested_at = None
+        timed_out = False
+
+        while True:
+            if worker.conn.poll(0.1):
+                try:
+                    kind, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    task.future.set_exception(
+                        SolverWorkerError("Solver worker died"))
+                    worker.kill()
+                    return None
+
+                if kind == "progress":
+                    if task.on_progress:
+                        task.on_progress(payload)
+                elif kind == "result":
+                    task.future.set_result(payload)
+                    return worker
+                else:
+                    task.future.set_exception(SolverWorkerError(payload))
+                    return worker
+                continue
+
+            if not worker.process.is_alive():
+                task.future.set_exception(
+                    SolverWorkerError("Solver worker died"))
+                worker.kill()
+                return None
+
+            now = time.monotonic()
+            if stop_requested_at is None:
+                if task.cancelled or now > deadline:
+                    timed_out = not task.cancelled
+                    worker.stop_event.set()
+                    stop_requested_at = now
+            elif now - stop_requested_at > self.stop_grace_sec:
+                worker.kill()
+                if timed_out:
+                    task.future.set_exception(SolveTimeout(
+                        f"Solve exceeded {task.hard_time_limit_sec}s"))
+                else:
+                    task.future.set_exception(
+                        SolveCancelled("Solve cancelled"))
+                return None
+
+
+_pool: Optional[SolverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_solver_pool() -> SolverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from app.config import settings
+
+            _pool = SolverPool(
+                workers=settings.solver_pool_workers,
+                max_tasks_per_worker=settings.solver_pool_max_tasks_per_worker,
+                hard_time_limit_sec=settings.solver_hard_time_limit_sec,
+                stop_grace_sec=settings.solver_stop_grace_sec,
+                start_method=settings.solver_pool_start_method,
+            )
+        return _pool
+
+
+def shutdown_solver_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
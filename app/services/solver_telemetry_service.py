@@ -0,0 +1,258 @@
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import SolverRun
+from app.scheduling_optimization_ortools.snapshot import CompanySnapshot
+from app.schemas.schedula import ScheduleRequest
+from app.services.solver_pool import SolveCancelled, SolveTimeout
+
+
+logger = logging.getLogger(__name__)
+
+# trạng thái dừng trước time limit
+PROVEN_STATUSES = {"OPTIMAL", "INFEASIBLE", "MODEL_INVALID", "BOUND_ONLY"}
+# bị dừng (cancel / client ngắt kết nối): không tính là hết giờ
+CANCELLED_STATUS = "CANCELLED"
+# bị pool dừng ở giới hạn cứng (SolveTimeout / 504)
+TIMEOUT_STATUS = "TIMEOUT"
+
+
+@dataclass
+class SolveContext:
+    """
+    Lần giải thuộc company / factory / cycle nào (để thống kê theo company)
+    """
+    company_id: Optional[int] = None
+    factory_id: Optional[int] = None
+    cycle_id: Optional[int] = None
+
+
+def jobshop_features(request: ScheduleRequest) -> Dict[str, Any]:
+    machines = {
+        machine_code
+        for job in request.jobs
+        for machine_code, _ in job.tasks + [
+            option for options in (job.alternatives or {}).values() for option in options
+        ]
+    }
+    return {
+        "num_jobs": len(request.jobs),
+        "num_tasks": sum(len(job.tasks) for job in request.jobs),
+        "num_machines": len(machines),
+        "features": {
+            "frozen": len(request.frozen or []),
+            "hints": len(request.hints or []),
+            "flexible_tasks": sum(len(job.alternatives or {}) for job in request.jobs),
+            "pools": len(request.machine_pools or {}),
+            "release_time": request.release_time,
+        },
+    }
+
+
+def failure_status(exc: BaseException) -> Optional[str]:
+    """
+    status ghi cho một lần giải lỗi: TIMEOUT / CANCELLED theo loại lỗi của
+    pool (kể cả khi đã đổi thành HTTPException 504 / 499), còn lại None
+    """
+    if isinstance(exc, SolveTimeout) or (isinstance(exc, HTTPException) and exc.status_code == 504):
+        return TIMEOUT_STATUS
+    if isinstance(exc, SolveCancelled) or (isinstance(exc, HTTPException) and exc.status_code == 499):
+        return CANCELLED_STATUS
+    return None
+
+
+def _timed_out(status: str, error: Optional[str], statuses: Dict[str, int]) -> bool:
+    # hết giờ: pool dừng ở giới hạn cứng, hoặc giải xong (không lỗi, không bị
+    # cancel) mà còn trạng thái chưa chứng minh được
+    if status == TIMEOUT_STATUS:
+        return True
+    if status == CANCELLED_STATUS or error is not None:
+        return False
+    return any(name not in PROVEN_STATUSES for name in statuses)
+
+
+def _save(run: SolverRun):
+    # telemetry không được làm hỏng lần giải: lỗi ghi DB chỉ log lại
+    db = SessionLocal()
+    try:
+        db.add(run)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Cannot record solver run")
+    finally:
+        db.close()
+
+
+def record_jobshop_run(
+    request: ScheduleRequest,
+    result: Optional[Dict[str, Any]],
+    wall_time_sec: float,
+    context: Optional[SolveContext] = None,
+    error: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    Ghi một lần giải job-shop. status mặc định lấy từ result (vd. truyền
+    CANCELLED khi bị dừng giữa chừng, TIMEOUT khi pool dừng ở giới hạn cứng,
+    xem failure_status), không có result thì là "ERROR".
+    """
+    if not settings.solver_telemetry_enabled:
+        return
+    context = context or SolveContext()
+    result = result or {}
+    statistics = result.get("statistics", {})
+    status = status or result.get("status") or "ERROR"
+    cache_hit = bool(result.get("cache", {}).get("hit"))
+
+    _save(SolverRun(
+        kind="jobshop",
+        companyId=context.company_id,
+        factoryId=context.factory_id,
+        factoryCycleId=context.cycle_id,
+        mode=request.mode,
+        time_limit_sec=request.time_limit_sec,
+        num_workers=request.num_workers,
+        status=status,
+        wall_time_sec=wall_time_sec,
+        solve_time_sec=statistics.get("wall_time_sec"),
+        conflicts=statistics.get("conflicts"),
+        branches=statistics.get("branches"),
+        objective=result.get("objective"),
+        best_bound=result.get("best_bound"),
+        gap=result.get("gap"),
+        cache_hit=cache_hit,
+        timed_out=(
+            not cache_hit and request.mode != "dispatch" and _timed_out(status, error, {status: 1})
+        ),
+        error=error[:500] if error else None,
+        **jobshop_features(request),
+    ))
+
+
+def record_employee_run(
+    payload: Any,
+    result: Optional[Dict[str, Any]],
+    wall_time_sec: float,
+    company_id: Optional[int] = None,
+    error: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    """
+    Ghi một lần xếp lịch nhân viên; kích thước bài toán là số phần tử
+    của từng danh sách trong payload (employees, jobs, ...) hoặc
+    CompanySnapshot.sizes. status mặc định là trạng thái CP-SAT trong
+    result (bài chia nhỏ: "DECOMPOSED"), không có result thì là "ERROR";
+    CANCELLED / TIMEOUT như record_jobshop_run.
+    """
+    if not settings.solver_telemetry_enabled:
+        return
+    sizes = {}
+    if isinstance(payload, CompanySnapshot):
+        sizes = payload.sizes
+    elif isinstance(payload, dict):
+        sizes = {key: len(value) for key, value in payload.items() if isinstance(value, list)}
+    result = result or {}
+    statistics = result.get("statistics", {})
+    status = status or statistics.get("solver_status") or result.get("status") or "ERROR"
+    # bài chia nhỏ hết giờ khi có bài con chưa chứng minh được tối ưu
+    statuses = statistics.get("cluster_statuses") or {status: 1}
+
+    _save(SolverRun(
+        kind="employee",
+        companyId=company_id,
+        mode=statistics.get("mode"),
+        num_jobs=sizes.get("jobs"),
+        features=sizes,
+        status=status,
+        wall_time_sec=wall_time_sec,
+        solve_time_sec=statistics.get("wall_time_sec"),
+        conflicts=statistics.get("conflicts"),
+        branches=statistics.get("branches"),
+        objective=statistics.get("objective"),
+        best_bound=statistics.get("best_bound"),
+        timed_out=_timed_out(status, error, statuses),
+        error=error[:500] if error else None,
+    ))
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    # nội suy tuyến tính giữa hai phần tử gần nhất, values đã sắp xếp
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    low = math.floor(position)
+    high = math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def solver_trends(
+    db: Session,
+    company_id: Optional[int] = None,
+    kind: Optional[str] = None,
+    days: int = 30,
+    bucket: str = "day",
+) -> List[Dict[str, Any]]:
+    """
+    Thống kê theo company và theo ngày / tuần: số lần giải, p50/p95 thời gian
+    giải (không tính lần trúng cache), số lần hết giờ, lỗi, trúng cache
+    """
+    query = db.query(
+        SolverRun.companyId,
+        SolverRun.kind,
+        SolverRun.createdAt,
+        SolverRun.wall_time_sec,
+        SolverRun.solve_time_sec,
+        SolverRun.num_tasks,
+        SolverRun.gap,
+        SolverRun.cache_hit,
+        SolverRun.timed_out,
+        SolverRun.error,
+    ).filter(SolverRun.createdAt >= datetime.utcnow() - timedelta(days=days))
+    if company_id is not None:
+        query = query.filter(SolverRun.companyId == company_id)
+    if kind is not None:
+        query = query.filter(SolverRun.kind == kind)
+
+    groups = defaultdict(list)
+    for row in query:
+        day = row.createdAt.date()
+        if bucket == "week":
+            day -= timedelta(days=day.weekday())
+        groups[row.companyId, row.kind, day].append(row)
+
+    trends = []
+    for (company, run_kind, period), rows in sorted(
+            groups.items(), key=lambda item: (item[0][0] or 0, item[0][1], item[0][2])):
+        solved = [row for row in rows if not row.cache_hit and row.error is None]
+        solve_times = sorted(row.solve_time_sec for row in solved if row.solve_time_sec is not None)
+        wall_times = sorted(row.wall_time_sec for row in rows if row.wall_time_sec is not None)
+        gaps = [row.gap for row in solved if row.gap is not None]
+        timeouts = sum(1 for row in rows if row.timed_out)
+        # lần bị pool dừng ở giới hạn cứng có error nhưng vẫn là một lần giải
+        attempted = len(solved) + sum(1 for row in rows if row.timed_out and row.error is not None)
+        trends.append({
+            "companyId": company,
+            "kind": run_kind,
+            "period": period,
+            "runs": len(rows),
+            "cache_hits": sum(1 for row in rows if row.cache_hit),
+            "errors": sum(1 for row in rows if row.error is not None),
+            "timeouts": timeouts,
+            "timeout_rate": timeouts / attempted if attempted else None,
+            "p50_solve_time_sec": _percentile(solve_times, 0.5),
+            "p95_solve_time_sec": _percentile(solve_times, 0.95),
+            "p95_wall_time_sec": _percentile(wall_times, 0.95),
+            "mean_gap": sum(gaps) / len(gaps) if gaps else None,
+            "max_tasks": max((row.num_tasks or 0 for row in rows), default=0),
+        })
+    return trends
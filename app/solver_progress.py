@@ -0,0 +1,35 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ortools.sat.python import cp_model
+
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+
+
+class ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Gọi on_progress mỗi khi CP-SAT tìm được lời giải tốt hơn.
+    Nếu có assignment_fn thì kèm luôn lịch máy/task của lời giải đó.
+    """
+
+    def __init__(
+        self,
+        on_progress: ProgressFn,
+        assignment_fn: Optional[Callable[[Sequence[int]], List[Dict[str, Any]]]] = None,
+    ):
+        super().__init__()
+        self._on_progress = on_progress
+        self._assignment_fn = assignment_fn
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        self.solutions += 1
+        event = {
+            "solutions": self.solutions,
+            "objective": self.objective_value,
+            "best_bound": self.best_objective_bound,
+            "wall_time_sec": self.wall_time,
+        }
+        if self._assignment_fn is not None:
+            event["machines"] = self._assignment_fn(self.response_proto.solution)
+        self._on_progress(event)